@@ -2,22 +2,51 @@
 # Phiên b?n s?a l?i logic c?p nh?t glossary, ??m b?o ??ng b? hóa nh?t quán.
 
 import argparse
+import ast
+import hashlib
 import os
 import re
 import time
-from typing import Dict, List, Optional, Sequence, Tuple
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
 
 from playwright.sync_api import Error, TimeoutError, sync_playwright
 
+try:
+    import psutil
+except ImportError:  # psutil là tuỳ chọn, chỉ cần cho watchdog bộ nhớ Chrome
+    psutil = None
+
+import chapter_store
+import db_writer
+import novel_db
+from chapter_diff import MAX_PARTIAL_RATIO, changed_ratio, diff_passages, splice_translation
 from context_builder import build_context_sections
-from prompt_builder import build_initialisation_prompt, build_translation_prompt
-from response_parser import ParseError, parse_initialisation_response, split_translation_and_updates
+from prompt_builder import (
+    build_initialisation_prompt,
+    build_partial_translation_prompt,
+    build_translation_prompt,
+)
+from response_parser import (
+    ParseError,
+    parse_initialisation_response,
+    parse_partial_translation_response,
+    split_translation_and_updates,
+)
 from story_db import (
+    clear_submission,
+    close_stores as close_story_stores,
     connect,
+    fetch_pending_submission,
     initialise_database,
     insert_glossary_entries,
     insert_relationship_entries,
+    list_pending_submissions,
     purge_placeholder_entries,
+    record_submission,
+    store_for,
     write_metadata,
 )
 
@@ -32,6 +61,8 @@ SEND_BUTTON_SELECTOR = ".run-button"
 NEW_CHAT_BUTTON_SELECTOR = "button[aria-label='New chat']"
 STOP_BUTTON_SELECTOR = "button:has-text('Stop')"
 CONTENT_BLOCKED_SELECTOR = 'button:has-text("Content blocked")'
+# Các khối text của một câu trả lời là các đoạn riêng; nối lại bằng dòng trống.
+RESPONSE_CHUNK_SEPARATOR = "\n\n"
 SYSTEM_INSTRUCTIONS_BUTTON_SELECTOR = "button[aria-label='System instructions']"
 SYSTEM_INSTRUCTIONS_TEXTAREA_SELECTOR = 'textarea[placeholder*="Optional tone and style instructions"]'
 MAX_RETRIES = 3
@@ -40,12 +71,30 @@ STABILITY_CHECK_INTERVAL = 1
 STABILITY_TIMEOUT = 30
 ACTION_DELAY_SECONDS = 2
 DB_FILENAME = "story_data.sqlite"
+# Số chương đầu gửi kèm prompt khởi tạo glossary của một bộ truyện.
+INITIAL_CHAPTER_COUNT = 3
+# Database của crawler; tiến độ dịch được ghi vào đây nếu file tồn tại.
+NOVEL_INDEX_DB = novel_db.DEFAULT_DB_FILE
+# Số chương có bản gốc đã đổi còn được dịch lại trong lần chạy này (--retranslate-changed).
+RETRANSLATE_BUDGET = 0
+PROBE_INTERVAL = 0.25
+# Số lần đọc lại trạng thái trang khi evaluate lỗi (ví dụ trang đang điều hướng).
+PROBE_RETRIES = 8
+GENERATION_TIMEOUT = 300
+TAB_POLL_GRACE_SECONDS = 5
 # ======================================================
 
 DEFAULT_PROFILE_PATHS = [
     os.path.expanduser(f"~/chrome-for-automation{idx}") for idx in range(0, 6)
 ]
 
+BROWSER_ARGS = [
+    "--no-sandbox",
+    "--disable-extensions",
+    "--disable-gpu",
+    "--disable-dev-shm-usage",
+]
+
 RATE_LIMIT_KEYWORDS = (
     "you've reached your rate limit",
     "you have reached your rate limit",
@@ -53,12 +102,85 @@ RATE_LIMIT_KEYWORDS = (
 )
 
 
+# Tên tiến trình (chữ thường) được tính vào RSS của trình duyệt.
+BROWSER_PROCESS_NAMES = ("chrome", "chromium", "headless_shell", "msedge")
+
+
 class RateLimitError(RuntimeError):
     """Được ném ra khi AI Studio báo đã chạm giới hạn tần suất."""
 
 
+@dataclass
+class MemorySample:
+    """Một lần đo bộ nhớ của trình duyệt."""
+
+    timestamp: float
+    profile: Optional[str]
+    chapters: int
+    rss_mb: Optional[float]
+    js_heap_mb: List[float]
+
+    def describe(self) -> str:
+        rss = f"{self.rss_mb:.0f} MB" if self.rss_mb is not None else "không rõ"
+        heaps = ", ".join(f"{value:.0f}" for value in self.js_heap_mb) or "không rõ"
+        return f"RSS Chrome {rss} | JS heap (MB/tab): {heaps} | {self.chapters} chương từ lần khởi chạy"
+
+
+def _is_browser_process(process) -> bool:
+    try:
+        name = process.name().lower()
+    except psutil.Error:
+        return False
+    return any(marker in name for marker in BROWSER_PROCESS_NAMES)
+
+
+def sample_browser_rss_mb() -> Optional[float]:
+    """Tổng RSS của các tiến trình trình duyệt do tool khởi chạy (cần psutil).
+
+    Chỉ tính tiến trình Chrome/Chromium (browser, renderer, GPU...), bỏ qua
+    driver Node của Playwright nằm cùng cây tiến trình con.
+    """
+    if psutil is None:
+        return None
+    total = 0
+    try:
+        children = psutil.Process(os.getpid()).children(recursive=True)
+    except psutil.Error:
+        return None
+    for child in children:
+        if not _is_browser_process(child):
+            continue
+        try:
+            total += child.memory_info().rss
+        except psutil.Error:
+            continue
+    return total / (1024 * 1024)
+
+
+def sample_js_heap_mb(page) -> Optional[float]:
+    try:
+        used = page.evaluate(
+            "() => (performance.memory ? performance.memory.usedJSHeapSize : null)"
+        )
+    except Error:
+        return None
+    if used is None:
+        return None
+    return float(used) / (1024 * 1024)
+
+
 class BrowserSessionManager:
-    """Quản lý vòng quay profile Chrome khi làm việc với Playwright."""
+    """Quản lý vòng quay profile Chrome khi làm việc với Playwright.
+
+    Mỗi context có thể mở nhiều tab (``pages_per_context``); các tab dùng chung
+    hạn mức của profile, nên khi một tab bị giới hạn tần suất thì cả context sẽ
+    được xoay sang profile kế tiếp.
+
+    Với ``use_storage_state=True``, mỗi "profile" là một file trạng thái đăng nhập
+    (``auth.json`` do ``dangnhap.py`` xuất ra). Tool chỉ khởi chạy một Chromium
+    dùng chung và tạo context nhẹ bằng ``new_context(storage_state=...)`` cho
+    từng tài khoản thay vì mở cả thư mục user-data.
+    """
 
     def __init__(
         self,
@@ -67,33 +189,141 @@ class BrowserSessionManager:
         *,
         channel: str = "chrome",
         headless: bool = False,
+        pages_per_context: int = 1,
+        use_storage_state: bool = False,
+        recycle_rss_mb: Optional[float] = None,
+        recycle_after_chapters: Optional[int] = None,
+        memory_log_path: Optional[str] = None,
     ) -> None:
         if not profile_paths:
             raise ValueError("Cần ít nhất một profile Chrome để chạy tool.")
+        if pages_per_context < 1:
+            raise ValueError("Mỗi profile cần ít nhất một tab.")
         self._playwright = playwright
         self._profile_paths = [os.path.expanduser(path) for path in profile_paths]
         self._channel = channel
         self._headless = headless
+        self._pages_per_context = pages_per_context
+        self._use_storage_state = use_storage_state
+        self._browser = None
         self._index = -1
         self._context = None
+        self._usage: Dict[str, int] = {}
+        self._recycle_rss_mb = recycle_rss_mb
+        self._recycle_after_chapters = recycle_after_chapters
+        self._memory_log_path = memory_log_path
+        self._chapters_since_launch = 0
+        if recycle_rss_mb and psutil is None:
+            print("[!] Cảnh báo: chưa cài psutil nên không đo được RSS của Chrome; chỉ tái khởi động theo số chương.")
+        self.pages: List = []
         self.page = None
 
+    @property
+    def current_profile(self) -> Optional[str]:
+        if self._index < 0:
+            return None
+        return self._profile_paths[self._index]
+
+    @property
+    def pages_per_context(self) -> int:
+        return self._pages_per_context
+
+    def record_usage(self) -> int:
+        """Ghi nhận một chương đã gửi bằng profile hiện tại (dùng chung cho mọi tab)."""
+        profile = self.current_profile
+        if profile is None:
+            return 0
+        self._usage[profile] = self._usage.get(profile, 0) + 1
+        self._chapters_since_launch += 1
+        return self._usage[profile]
+
+    def usage_for(self, profile: Optional[str] = None) -> int:
+        return self._usage.get(profile or self.current_profile or "", 0)
+
     def launch_initial(self, system_prompt: Optional[str]) -> None:
         self._rotate_to(self._next_index(), system_prompt)
 
     def rotate(self, system_prompt: Optional[str]) -> None:
         print("\n[!] Phát hiện giới hạn tần suất. Đang chuyển sang profile Chrome kế tiếp...")
+        if self.current_profile is not None:
+            print(
+                f"    - Profile '{self.current_profile}' đã gửi {self.usage_for()} chương "
+                "trước khi chạm giới hạn."
+            )
         self._rotate_to(self._next_index(), system_prompt)
 
+    def sample_memory(self) -> MemorySample:
+        heaps = [value for value in (sample_js_heap_mb(page) for page in self.pages) if value is not None]
+        sample = MemorySample(
+            timestamp=time.time(),
+            profile=self.current_profile,
+            chapters=self._chapters_since_launch,
+            rss_mb=sample_browser_rss_mb(),
+            js_heap_mb=heaps,
+        )
+        print(f"[mem] {sample.describe()}")
+        if self._memory_log_path:
+            write_memory_sample(self._memory_log_path, sample)
+        return sample
+
+    def should_recycle(self) -> bool:
+        """Đo bộ nhớ và cho biết đã vượt ngưỡng tái khởi động context hay chưa."""
+        if not (self._recycle_rss_mb or self._recycle_after_chapters or self._memory_log_path):
+            return False
+        sample = self.sample_memory()
+        if self._recycle_after_chapters and sample.chapters >= self._recycle_after_chapters:
+            print(f"[!] Đã dịch {sample.chapters} chương trên context hiện tại, cần tái khởi động.")
+            return True
+        if self._recycle_rss_mb and sample.rss_mb is not None and sample.rss_mb >= self._recycle_rss_mb:
+            print(
+                f"[!] RSS của Chrome ({sample.rss_mb:.0f} MB) vượt ngưỡng {self._recycle_rss_mb:.0f} MB, "
+                "cần tái khởi động."
+            )
+            return True
+        return False
+
+    def recycle(self, system_prompt: Optional[str]) -> None:
+        """Mở lại context và các tab của profile hiện tại để giải phóng bộ nhớ Chrome.
+
+        Ở chế độ ``use_storage_state``, trình duyệt dùng chung được giữ lại; chỉ
+        context (cùng các tiến trình renderer của nó) bị đóng rồi tạo mới.
+        """
+        print("[•] Tái khởi động context trình duyệt để giải phóng bộ nhớ...")
+        self._rotate_to(self._index, system_prompt)
+
+    def maybe_recycle(self, system_prompt: Optional[str]) -> bool:
+        """Gọi ở điểm an toàn giữa hai chương (không có tab nào đang chờ AI)."""
+        if not self.should_recycle():
+            return False
+        self.recycle(system_prompt)
+        return True
+
     def close(self) -> None:
+        if self._context is not None and self._use_storage_state and self.current_profile:
+            try:
+                # Lưu lại cookie đã được làm mới để lần sau vẫn đăng nhập được.
+                self._context.storage_state(path=self.current_profile)
+            except Exception as exc:  # noqa: BLE001
+                print(f"[!] Cảnh báo: không lưu lại được trạng thái đăng nhập: {exc}")
         if self._context is not None:
             try:
                 self._context.close()
             except Exception as exc:  # noqa: BLE001
                 print(f"[!] Cảnh báo: lỗi khi đóng context trình duyệt: {exc}")
         self._context = None
+        self.pages = []
         self.page = None
 
+    def shutdown(self) -> None:
+        """Đóng context hiện tại và cả trình duyệt dùng chung (nếu có)."""
+        self.close()
+        if self._browser is not None:
+            try:
+                self._browser.close()
+            except Exception as exc:  # noqa: BLE001
+                print(f"[!] Cảnh báo: lỗi khi đóng trình duyệt: {exc}")
+        self._browser = None
+
     # --------------------------------------------------
 
     def _next_index(self) -> int:
@@ -102,42 +332,87 @@ class BrowserSessionManager:
     def _rotate_to(self, index: int, system_prompt: Optional[str]) -> None:
         self.close()
         self._index = index
-        user_data_dir = self._profile_paths[self._index]
+        self._chapters_since_launch = 0
+        CLICK_STRATEGY_CACHE.profile = self._profile_paths[self._index]
+        profile_path = self._profile_paths[self._index]
+        if self._use_storage_state:
+            self._context = self._new_storage_state_context(profile_path)
+        else:
+            self._context = self._launch_persistent_context(profile_path)
+
+        pages = list(self._context.pages[: self._pages_per_context])
+        while len(pages) < self._pages_per_context:
+            pages.append(self._context.new_page())
+
+        for tab_index, page in enumerate(pages, start=1):
+            if len(pages) > 1:
+                print(f"[•] Chuẩn bị tab {tab_index}/{len(pages)}...")
+            self._open_ai_studio(page, system_prompt)
+        self.pages = pages
+        self.page = pages[0]
+
+    def _launch_persistent_context(self, user_data_dir: str):
         os.makedirs(user_data_dir, exist_ok=True)
         print(f"[•] Đang khởi chạy Chrome profile: {user_data_dir}")
         try:
-            self._context = self._playwright.chromium.launch_persistent_context(
+            return self._playwright.chromium.launch_persistent_context(
                 user_data_dir=user_data_dir,
                 channel=self._channel,
                 headless=self._headless,
-                args=[
-                    "--no-sandbox",
-                    "--disable-extensions",
-                    "--disable-gpu",
-                    "--disable-dev-shm-usage",
-                ],
+                args=BROWSER_ARGS,
             )
         except Exception as exc:  # noqa: BLE001
             raise RuntimeError(
                 f"Không thể khởi chạy Chrome với profile '{user_data_dir}': {exc}"
             ) from exc
 
-        if self._context.pages:
-            self.page = self._context.pages[0]
-        else:
-            self.page = self._context.new_page()
+    def _new_storage_state_context(self, auth_path: str):
+        if not os.path.isfile(auth_path):
+            raise RuntimeError(f"Không tìm thấy file trạng thái đăng nhập '{auth_path}'.")
+        if self._browser is None or not self._browser.is_connected():
+            print("[•] Đang khởi chạy trình duyệt dùng chung cho các tài khoản...")
+            try:
+                self._browser = self._playwright.chromium.launch(
+                    channel=self._channel,
+                    headless=self._headless,
+                    args=BROWSER_ARGS,
+                )
+            except Exception as exc:  # noqa: BLE001
+                raise RuntimeError(f"Không thể khởi chạy trình duyệt: {exc}") from exc
+        print(f"[•] Đang tạo context từ trạng thái đăng nhập: {auth_path}")
+        try:
+            return self._browser.new_context(storage_state=auth_path)
+        except Exception as exc:  # noqa: BLE001
+            raise RuntimeError(
+                f"Không thể tạo context từ trạng thái đăng nhập '{auth_path}': {exc}"
+            ) from exc
 
-        self.page.set_default_timeout(60000)
-        self.page.goto(WEBSITE_URL, wait_until="domcontentloaded")
+    def _open_ai_studio(self, page, system_prompt: Optional[str]) -> None:
+        page.set_default_timeout(60000)
+        page.goto(WEBSITE_URL, wait_until="domcontentloaded")
         wait_between_actions(note="Chờ trang AI Studio tải xong")
         try:
-            self.page.wait_for_selector(TEXT_INPUT_SELECTOR, timeout=60000)
+            page.wait_for_selector(TEXT_INPUT_SELECTOR, timeout=60000)
             print("[✓] Đã truy cập AI Studio và sẵn sàng làm việc.")
         except TimeoutError as exc:
             raise RuntimeError("Không tìm thấy ô chat sau 60 giây.") from exc
 
         print("[*] Đồng bộ System Instructions cho profile hiện tại...")
-        update_system_instructions(self.page, system_prompt)
+        update_system_instructions(page, system_prompt)
+
+
+def write_memory_sample(path: str, sample: MemorySample) -> None:
+    is_new = not os.path.exists(path)
+    try:
+        with open(path, "a", encoding="utf-8") as handle:
+            if is_new:
+                handle.write("timestamp,profile,chapters,rss_mb,js_heap_mb\n")
+            rss = f"{sample.rss_mb:.1f}" if sample.rss_mb is not None else ""
+            heap = f"{sum(sample.js_heap_mb):.1f}" if sample.js_heap_mb else ""
+            stamp = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(sample.timestamp))
+            handle.write(f"{stamp},{sample.profile or ''},{sample.chapters},{rss},{heap}\n")
+    except OSError as exc:
+        print(f"[!] Cảnh báo: không ghi được log bộ nhớ '{path}': {exc}")
 
 
 CHINESE_SEQUENCE_PATTERN = re.compile(
@@ -185,38 +460,116 @@ def wait_between_actions(seconds=ACTION_DELAY_SECONDS, note: Optional[str] = Non
     time.sleep(delay)
 
 
+CLICK_STRATEGIES = ("click", "force", "dispatch")
+CLICK_STRATEGY_LABELS = {
+    "click": "click",
+    "force": "click force",
+    "dispatch": "dispatch click",
+}
+LOCATOR_SELECTOR_PATTERN = re.compile(r"selector=(?P<literal>(['\"]).*\2)>$", re.DOTALL)
+
+
+class ClickStrategyCache:
+    """Nhớ cách click thành công gần nhất theo từng profile và selector.
+
+    Nút nào luôn bị overlay che (chỉ ``dispatch_event`` mới ăn) sẽ được thử
+    bằng đúng cách đó ngay từ đầu thay vì chờ các lần click thất bại.
+    """
+
+    def __init__(self) -> None:
+        self.profile = ""
+        self._preferred: Dict[Tuple[str, str], str] = {}
+        self._stats: Dict[Tuple[str, str, str], List[int]] = {}
+
+    def order(self, selector: str) -> List[str]:
+        preferred = self._preferred.get((self.profile, selector))
+        if preferred is None:
+            return list(CLICK_STRATEGIES)
+        return [preferred] + [strategy for strategy in CLICK_STRATEGIES if strategy != preferred]
+
+    def record(self, selector: str, strategy: str, success: bool) -> None:
+        counts = self._stats.setdefault((self.profile, selector, strategy), [0, 0])
+        counts[0 if success else 1] += 1
+        if success:
+            self._preferred[(self.profile, selector)] = strategy
+
+    def report(self) -> List[str]:
+        """Tỉ lệ thành công của từng cách click, giúp phát hiện selector đã lỗi thời."""
+        lines: List[str] = []
+        for (profile, selector, strategy), (succeeded, failed) in sorted(self._stats.items()):
+            total = succeeded + failed
+            lines.append(
+                f"{os.path.basename(profile) or '-'} | {selector} | {strategy}: "
+                f"{succeeded}/{total} thành công ({succeeded * 100 // total}%)"
+            )
+        return lines
+
+
+CLICK_STRATEGY_CACHE = ClickStrategyCache()
+
+
+def locator_selector(locator, fallback: str) -> str:
+    """Lấy selector từ ``repr`` của Locator (``<Locator frame=... selector='...'>``).
+
+    Dùng ``repr`` chứ không dùng ``str`` vì ``str`` có thể trả về đoạn code
+    locator; selector được giải escape bằng ``ast.literal_eval`` nên dấu nháy
+    bên trong vẫn giữ nguyên.
+    """
+    match = LOCATOR_SELECTOR_PATTERN.search(repr(locator))
+    if match:
+        try:
+            selector = ast.literal_eval(match.group("literal"))
+        except (SyntaxError, ValueError):
+            return fallback
+        if isinstance(selector, str):
+            return selector
+    return fallback
+
+
+def _run_click_strategy(locator, strategy: str) -> None:
+    if strategy == "click":
+        locator.click(timeout=10000)
+    elif strategy == "force":
+        locator.click(timeout=10000, force=True)
+    else:
+        locator.dispatch_event("click")
+
+
 def safe_click(locator, description: str = "nút", max_attempts: int = 3) -> bool:
+    selector = locator_selector(locator, description)
     for attempt in range(1, max_attempts + 1):
+        ready = True
         try:
             locator.wait_for(state="visible", timeout=10000)
             locator.scroll_into_view_if_needed(timeout=5000)
             wait_between_actions(note=f"Chuẩn bị click {description}")
-            locator.click(timeout=10000)
-            wait_between_actions(note=f"Hoàn tất click {description}")
-            return True
         except Exception as exc:  # noqa: BLE001
-            print(f"    - Cảnh báo: Click {description} thất bại (lần {attempt}/{max_attempts}). Lỗi: {exc}")
+            print(f"    - Cảnh báo: {description} chưa sẵn sàng (lần {attempt}/{max_attempts}). Lỗi: {exc}")
             wait_between_actions(note="Tạm nghỉ trước khi thử lại")
+            ready = False
+        for position, strategy in enumerate(CLICK_STRATEGY_CACHE.order(selector)):
+            if strategy == "click" and not ready:
+                continue
+            label = CLICK_STRATEGY_LABELS[strategy]
             try:
-                locator.click(timeout=10000, force=True)
-                wait_between_actions(note=f"Hoàn tất click force {description}")
-                return True
-            except Exception as force_error:  # noqa: BLE001
-                print(f"      -> Thử click force thất bại: {force_error}")
-            try:
-                locator.dispatch_event("click")
-                wait_between_actions(note=f"Hoàn tất dispatch click {description}")
-                return True
-            except Exception as dispatch_error:  # noqa: BLE001
-                print(f"      -> Thử dispatch click thất bại: {dispatch_error}")
-            try:
-                locator.page.keyboard.press("Escape")
-            except Exception:  # noqa: BLE001
-                pass
-            wait_between_actions(note="Giải phóng các hộp thoại che khuất")
-            if attempt == max_attempts:
-                print(f"    - [X] Không thể click {description} sau {max_attempts} lần thử.")
-                return False
+                _run_click_strategy(locator, strategy)
+            except Exception as exc:  # noqa: BLE001
+                CLICK_STRATEGY_CACHE.record(selector, strategy, False)
+                print(f"      -> Thử {label} {description} thất bại (lần {attempt}/{max_attempts}): {exc}")
+                if position == 0 and ready:
+                    wait_between_actions(note="Tạm nghỉ trước khi thử lại")
+                continue
+            CLICK_STRATEGY_CACHE.record(selector, strategy, True)
+            wait_between_actions(note=f"Hoàn tất {label} {description}")
+            return True
+        try:
+            locator.page.keyboard.press("Escape")
+        except Exception:  # noqa: BLE001
+            pass
+        wait_between_actions(note="Giải phóng các hộp thoại che khuất")
+        if attempt == max_attempts:
+            print(f"    - [X] Không thể click {description} sau {max_attempts} lần thử.")
+            return False
     return False
 
 
@@ -276,23 +629,181 @@ def update_system_instructions(page, instructions: Optional[str]) -> None:
         wait_between_actions(note="Thoát khỏi System Instructions sau lỗi")
 
 
+# Một lần evaluate trả về toàn bộ trạng thái cần cho các vòng chờ, thay vì
+# nhiều lượt locator/count/inner_text/is_visible qua CDP cho mỗi lần kiểm tra.
+HAS_TEXT_SELECTOR_RE = re.compile(r"""^(?P<css>.*?):has-text\((?P<quote>["'])(?P<text>.*)(?P=quote)\)$""")
+
+PAGE_STATE_SCRIPT = """
+([turnSelector, contentSelector, chunkSeparator, stopFilters, blockedFilters, withText, checkRateLimit]) => {
+    const isVisible = (el) => !!el && !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+    const anyVisible = (filters) => filters.some(([css, text]) =>
+        Array.from(document.querySelectorAll(css)).some((el) =>
+            isVisible(el)
+            && (!text || (el.innerText || el.textContent || "").toLowerCase().includes(text.toLowerCase()))
+        )
+    );
+    const turns = document.querySelectorAll(turnSelector);
+    const lastTurn = turns.length ? turns[turns.length - 1] : null;
+    const chunks = lastTurn ? Array.from(lastTurn.querySelectorAll(contentSelector)) : [];
+    const text = chunks.map((chunk) => chunk.innerText).join(chunkSeparator);
+    let hash = 0x811c9dc5;
+    for (let i = 0; i < text.length; i++) {
+        hash ^= text.charCodeAt(i);
+        hash = Math.imul(hash, 0x01000193) >>> 0;
+    }
+    const stopVisible = anyVisible(stopFilters);
+    const blocked = anyVisible(blockedFilters);
+    let rateLimited = false;
+    if (checkRateLimit && document.body) {
+        const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
+        while (walker.nextNode()) {
+            const node = walker.currentNode;
+            if (/rate limit/i.test(node.nodeValue) && isVisible(node.parentElement)) {
+                rateLimited = true;
+                break;
+            }
+        }
+    }
+    return {
+        turnCount: turns.length,
+        contentCount: chunks.length,
+        textLength: text.length,
+        textHash: hash,
+        stopVisible,
+        blocked,
+        rateLimited,
+        text: withText ? text : null,
+    };
+}
+"""
+
+
+@dataclass
+class PageState:
+    """Ảnh chụp gọn trạng thái khung chat sau một lần ``probe_page_state``."""
+
+    turn_count: int = 0
+    content_count: int = 0
+    text_length: int = 0
+    text_hash: int = 0
+    stop_visible: bool = False
+    blocked: bool = False
+    rate_limited: bool = False
+    text: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "PageState":
+        return cls(
+            turn_count=int(data.get("turnCount") or 0),
+            content_count=int(data.get("contentCount") or 0),
+            text_length=int(data.get("textLength") or 0),
+            text_hash=int(data.get("textHash") or 0),
+            stop_visible=bool(data.get("stopVisible")),
+            blocked=bool(data.get("blocked")),
+            rate_limited=bool(data.get("rateLimited")),
+            text=data.get("text"),
+        )
+
+
+def selector_text_filters(selector: str) -> List[Tuple[str, str]]:
+    """Tách selector Playwright dạng ``css:has-text("...")`` thành các cặp (css, text).
+
+    ``document.querySelectorAll`` không hiểu ``:has-text``, nên script trong
+    trang lọc theo text (không phân biệt hoa thường, như Playwright) bằng cặp này.
+    """
+    filters: List[Tuple[str, str]] = []
+    for part in selector.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        match = HAS_TEXT_SELECTOR_RE.match(part)
+        if match:
+            filters.append((match.group("css") or "*", match.group("text")))
+        else:
+            filters.append((part, ""))
+    return filters
+
+
+def probe_page_state(
+    page, *, with_text: bool = False, check_rate_limit: bool = False
+) -> Optional[PageState]:
+    """Đọc trạng thái trang bằng một lần evaluate; ``None`` nếu không đọc được.
+
+    ``None`` nghĩa là "chưa biết" (context bị huỷ khi trang điều hướng...), người gọi
+    phải thử lại chứ không được coi là AI đã sinh xong.
+    """
+    try:
+        data = page.evaluate(
+            PAGE_STATE_SCRIPT,
+            [
+                RESPONSE_TURN_SELECTOR,
+                RESPONSE_CONTENT_SELECTOR,
+                RESPONSE_CHUNK_SEPARATOR,
+                selector_text_filters(STOP_BUTTON_SELECTOR),
+                selector_text_filters(CONTENT_BLOCKED_SELECTOR),
+                with_text,
+                check_rate_limit,
+            ],
+        )
+    except Error as exc:
+        print(f"      - Cảnh báo: Không đọc được trạng thái trang: {exc}")
+        return None
+    return PageState.from_dict(data or {})
+
+
+def read_page_state(page, **kwargs) -> PageState:
+    """Như ``probe_page_state`` nhưng thử lại tối đa ``PROBE_RETRIES`` lần.
+
+    Hết lượt thử thì trả về ``PageState()`` rỗng: không có text, không bị chặn, nên
+    bước đọc phản hồi sẽ thất bại thay vì nhận nhầm một câu trả lời.
+    """
+    for attempt in range(PROBE_RETRIES):
+        if attempt:
+            time.sleep(PROBE_INTERVAL)
+        state = probe_page_state(page, **kwargs)
+        if state is not None:
+            return state
+    print(f"      - Cảnh báo: Bỏ cuộc sau {PROBE_RETRIES} lần đọc trạng thái trang thất bại.")
+    return PageState()
+
+
+def wait_for_generation_end(
+    page,
+    timeout: float = GENERATION_TIMEOUT,
+    on_chat_url: Optional[Callable[[str], None]] = None,
+) -> bool:
+    """Chờ nút 'Stop' biến mất; trả về ``False`` nếu quá thời gian.
+
+    ``on_chat_url`` được gọi một lần ngay khi tab có URL chat đã lưu, trong cùng
+    vòng chờ này nên không tốn thêm thời gian chờ riêng.
+    """
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if on_chat_url is not None and is_saved_chat_url(page.url):
+            on_chat_url(page.url)
+            on_chat_url = None
+        state = probe_page_state(page)
+        if state is not None and not state.stop_visible:
+            return True
+        time.sleep(PROBE_INTERVAL)
+    return False
+
+
 def wait_for_and_get_stable_text(page) -> Optional[str]:
     print("    - Bắt đầu quan sát nội dung phản hồi cho đến khi ổn định...")
-    all_turns = page.locator(RESPONSE_TURN_SELECTOR).all()
-    if not all_turns:
+    state = read_page_state(page)
+    if state.turn_count == 0:
         print("      - Lỗi: Không tìm thấy lượt chat nào.")
         return None
-    last_turn = all_turns[-1]
-    content_container = last_turn.locator(RESPONSE_CONTENT_SELECTOR)
-    if content_container.count() == 0:
+    if state.content_count == 0:
         print(f"      - Lỗi: Không tìm thấy 'hộp chứa text' ({RESPONSE_CONTENT_SELECTOR}).")
         return None
-    previous_text = ""
+    previous_key = None
     stable_checks = 0
     start_time = time.time()
     while time.time() - start_time < STABILITY_TIMEOUT:
-        current_text = content_container.inner_text()
-        if current_text == previous_text and current_text != "":
+        current_key = (state.text_length, state.text_hash)
+        if current_key == previous_key and state.text_length > 0:
             stable_checks += 1
             print(
                 f"      - Nội dung ổn định... ({stable_checks}/{STABILITY_CHECKS_REQUIRED})"
@@ -301,54 +812,95 @@ def wait_for_and_get_stable_text(page) -> Optional[str]:
             stable_checks = 0
         if stable_checks >= STABILITY_CHECKS_REQUIRED:
             print("    - [✓] Nội dung đã ổn định. Lấy kết quả cuối cùng.")
-            return current_text
-        previous_text = current_text
+            return read_page_state(page, with_text=True).text
+        previous_key = current_key
         time.sleep(STABILITY_CHECK_INTERVAL)
+        state = read_page_state(page)
     print(
         f"    - [!] Cảnh báo: Hết {STABILITY_TIMEOUT} giây chờ. Lấy nội dung cuối cùng có thể thiếu."
     )
-    return previous_text
+    return read_page_state(page, with_text=True).text
 
 
 def detect_rate_limit(page, response_text: Optional[str]) -> bool:
     lowered_text = response_text.lower() if response_text else ""
     if lowered_text and any(keyword in lowered_text for keyword in RATE_LIMIT_KEYWORDS):
         return True
+    return read_page_state(page, check_rate_limit=True).rate_limited
+
+
+def compute_prompt_hash(prompt_text: str) -> str:
+    return hashlib.sha1(prompt_text.encode("utf-8")).hexdigest()
+
+
+def is_saved_chat_url(url: Optional[str]) -> bool:
+    """AI Studio chỉ gán URL riêng (/prompts/<id>) sau khi cuộc trò chuyện được lưu."""
+    if not url or "/prompts/" not in url:
+        return False
+    chat_id = url.split("/prompts/", 1)[1].split("?", 1)[0].strip("/")
+    return bool(chat_id) and chat_id != "new_chat"
+
+
+def harvest_saved_response(page, chat_url: str) -> Optional[str]:
+    """Mở lại chat đã gửi trước khi tool bị dừng và lấy câu trả lời nếu đã hoàn tất."""
+    print(f"    - Mở lại cuộc trò chuyện đã gửi trước đó: {chat_url}")
     try:
-        locator = page.locator("text=/rate limit/i")
-        if locator.count() and locator.first.is_visible():
-            return True
-    except Exception:  # noqa: BLE001
-        pass
-    return False
+        page.goto(chat_url, wait_until="domcontentloaded", timeout=120000)
+        page.wait_for_selector(TEXT_INPUT_SELECTOR, timeout=60000)
+    except (TimeoutError, Error) as exc:
+        print(f"      - Không mở được cuộc trò chuyện cũ: {exc}")
+        return None
+    wait_between_actions(note="Chờ cuộc trò chuyện cũ tải xong")
+    if read_page_state(page).turn_count < 2:
+        print("      - Cuộc trò chuyện cũ chưa có câu trả lời.")
+        return None
+    if not wait_for_generation_end(page):
+        print("      - Câu trả lời cũ vẫn đang được sinh sau 5 phút. Bỏ qua.")
+        return None
+    if read_page_state(page).blocked:
+        print("      - Câu trả lời cũ bị chặn (Content Blocked).")
+        return None
+    response_text = wait_for_and_get_stable_text(page)
+    if not response_text or detect_rate_limit(page, response_text):
+        return None
+    print("    - [✓] Đã thu hồi câu trả lời từ cuộc trò chuyện cũ.")
+    return response_text.strip()
 
 
-def submit_prompt_and_get_response(page, prompt_text: str) -> Tuple[bool, Optional[str], bool]:
+def send_prompt(page, prompt_text: str) -> bool:
+    """Điền prompt và bấm Gửi, không chờ AI trả lời."""
     try:
         page.wait_for_selector(TEXT_INPUT_SELECTOR, timeout=20000)
     except TimeoutError:
         print("    - Lỗi: Không tìm thấy ô nhập liệu sau 20 giây.")
-        return False, None, False
+        return False
     text_input = page.locator(TEXT_INPUT_SELECTOR)
     if not safe_fill(text_input, prompt_text, "ô chat"):
-        return False, None, False
-    if not safe_click(page.locator(SEND_BUTTON_SELECTOR), "nút Gửi"):
-        return False, None, False
-    print("    - Đang chờ AI phản hồi (chờ nút 'Stop' biến mất)...")
+        return False
+    return safe_click(page.locator(SEND_BUTTON_SELECTOR), "nút Gửi")
+
+
+def is_generating(page) -> bool:
+    # Không đọc được trạng thái thì coi như vẫn đang sinh; lượt poll sau sẽ đọc lại.
+    state = probe_page_state(page)
+    return state is None or state.stop_visible
+
+
+def stop_generation(page) -> None:
+    print(
+        "    - Cảnh báo: Nút 'Stop' vẫn xuất hiện sau 5 phút. Thử nhấn 'Stop' để chắc chắn kết thúc."
+    )
     try:
-        page.locator(STOP_BUTTON_SELECTOR).wait_for(state="hidden", timeout=300000)
-    except TimeoutError:
-        print(
-            "    - Cảnh báo: Nút 'Stop' vẫn xuất hiện sau 5 phút. Thử nhấn 'Stop' để chắc chắn kết thúc."
-        )
-        try:
-            safe_click(page.locator(STOP_BUTTON_SELECTOR), "nút Stop")
-        except Exception:  # noqa: BLE001
-            pass
-        return False, None, False
+        safe_click(page.locator(STOP_BUTTON_SELECTOR), "nút Stop")
+    except Exception:  # noqa: BLE001
+        pass
+
+
+def read_finished_response(page) -> Tuple[bool, Optional[str], bool]:
+    """Đọc phản hồi sau khi nút 'Stop' đã biến mất."""
     print("    - AI đã phản hồi xong.")
     wait_between_actions(note="Chuẩn bị đọc kết quả phản hồi")
-    if page.locator(CONTENT_BLOCKED_SELECTOR).is_visible():
+    if read_page_state(page).blocked:
         print("    - [!] PHÁT HIỆN LỖI: Nội dung bị chặn (Content Blocked).")
         wait_between_actions(note="Ghi nhận trạng thái Content Blocked")
         return False, None, True
@@ -362,6 +914,20 @@ def submit_prompt_and_get_response(page, prompt_text: str) -> Tuple[bool, Option
     return True, full_response_text.strip(), False
 
 
+def submit_prompt_and_get_response(
+    page,
+    prompt_text: str,
+    on_chat_url: Optional[Callable[[str], None]] = None,
+) -> Tuple[bool, Optional[str], bool]:
+    if not send_prompt(page, prompt_text):
+        return False, None, False
+    print("    - Đang chờ AI phản hồi (chờ nút 'Stop' biến mất)...")
+    if not wait_for_generation_end(page, on_chat_url=on_chat_url):
+        stop_generation(page)
+        return False, None, False
+    return read_finished_response(page)
+
+
 def run_initialisation(
     page,
     db_path: str,
@@ -377,8 +943,7 @@ def run_initialisation(
     chapter_texts = []
     for path in chapter_paths:
         try:
-            with open(path, "r", encoding="utf-8") as handle:
-                chapter_texts.append((os.path.basename(path), handle.read()))
+            chapter_texts.append((os.path.basename(path), chapter_store.read_text(path)))
         except Exception as exc:  # noqa: BLE001
             print(f"    -> Lỗi khi đọc '{path}': {exc}")
             return False
@@ -439,17 +1004,282 @@ def run_initialisation(
     return False
 
 
+def _insert_story_updates(
+    conn,
+    glossary_updates: List[Dict[str, str]],
+    relationship_updates: List[Dict[str, str]],
+) -> Tuple[int, int]:
+    glossary_added = insert_glossary_entries(conn, glossary_updates) if glossary_updates else 0
+    relationships_added = (
+        insert_relationship_entries(conn, relationship_updates) if relationship_updates else 0
+    )
+    return glossary_added, relationships_added
+
+
+def queue_story_updates(
+    db_path: str,
+    glossary_updates: List[Dict[str, str]],
+    relationship_updates: List[Dict[str, str]],
+) -> Future:
+    """Đưa glossary/quan hệ mới vào luồng ghi; số dòng thêm được in khi ghi xong."""
+
+    def report(future: Future) -> None:
+        if future.exception() is not None:
+            print(f"    -> Lỗi khi cập nhật database '{db_path}': {future.exception()}")
+            return
+        glossary_added, relationships_added = future.result()
+        print(
+            f"    - Cập nhật database: +{glossary_added} nhân vật, +{relationships_added} quan hệ."
+        )
+
+    future = db_writer.shared_writer().submit(
+        db_path, connect, _insert_story_updates, glossary_updates, relationship_updates
+    )
+    future.add_done_callback(report)
+    return future
+
+
+def build_chapter_prompt(db_path: str, chapter_text: str) -> str:
+    # Không chờ luồng ghi: glossary của chương vừa xong có mặt ngay khi luồng ghi
+    # commit (thường trong vài mili giây), prompt dựng trước đó dùng bản cũ. Với
+    # --tabs > 1, glossary của chương đang dịch dở trên tab khác cũng chỉ có mặt
+    # từ các prompt dựng sau khi chương đó hoàn tất.
+    metadata_section, glossary_section, relationships_section = build_context_sections(
+        store_for(db_path), chapter_text
+    )
+    return build_translation_prompt(
+        metadata_section=metadata_section,
+        glossary_section=glossary_section,
+        relationships_section=relationships_section,
+        source_text=chapter_text,
+    )
+
+
+def remember_submission(
+    db_path: str,
+    filename: str,
+    prompt_hash: str,
+    chat_url: str,
+    profile: Optional[str],
+) -> Future:
+    """Ghi URL chat của lần gửi vào Submissions qua luồng ghi, không chặn trình duyệt."""
+
+    def record(conn) -> None:
+        record_submission(
+            conn,
+            filename,
+            prompt_hash=prompt_hash,
+            chat_url=chat_url,
+            profile=profile,
+        )
+
+    return _queue_submission_write(db_path, record)
+
+
+def forget_submission(db_path: str, filename: str) -> Future:
+    """Xoá lần gửi dang dở của chương khỏi Submissions qua luồng ghi."""
+    return _queue_submission_write(db_path, lambda conn: clear_submission(conn, filename))
+
+
+def _queue_submission_write(db_path: str, write: Callable[[object], None]) -> Future:
+    def report(future: Future) -> None:
+        if future.exception() is not None:
+            print(f"    -> Cảnh báo: không ghi được Submissions vào '{db_path}': {future.exception()}")
+
+    future = db_writer.shared_writer().submit(db_path, connect, write)
+    future.add_done_callback(report)
+    return future
+
+
+def remember_translation(
+    output_path: str,
+    source_text: str,
+    *,
+    profile: Optional[str] = None,
+    elapsed: Optional[float] = None,
+) -> bool:
+    """Ghi thời điểm dịch, hash bản dịch và hash bản gốc của chương vào novel_index.sqlite.
+
+    Việc ghi chạy trên luồng ``db_writer``; trả về True khi đã xếp vào hàng đợi.
+    """
+    if not NOVEL_INDEX_DB or not os.path.exists(NOVEL_INDEX_DB):
+        return False
+    novel_root = os.path.dirname(os.path.dirname(os.path.abspath(output_path)))
+    filename = os.path.basename(output_path)
+    index_db = NOVEL_INDEX_DB
+    try:
+        translation_hash = hashlib.sha1(
+            chapter_store.read_text(output_path).encode("utf-8")
+        ).hexdigest()
+    except Exception as exc:  # noqa: BLE001
+        print(f"    -> Cảnh báo: không ghi được tiến độ dịch vào '{index_db}': {exc}")
+        return False
+
+    def record(conn) -> bool:
+        chapter = novel_db.find_chapter_by_file(conn, novel_root, filename)
+        if chapter is None:
+            return False
+        novel_db.record_translation(
+            conn,
+            chapter["id"],
+            translation_hash=translation_hash,
+            source_hash=novel_db.hash_chapter_text(source_text),
+            profile=profile,
+            elapsed=elapsed,
+            source_body=novel_db.chapter_body(source_text),
+        )
+        return True
+
+    def report(future: Future) -> None:
+        if future.exception() is not None:
+            print(
+                f"    -> Cảnh báo: không ghi được tiến độ dịch vào '{index_db}': "
+                f"{future.exception()}"
+            )
+
+    # Ghi ở luồng db_writer để ổ đĩa chậm/database bị khoá không chặn trình duyệt.
+    db_writer.shared_writer().submit(index_db, novel_db.connect, record).add_done_callback(report)
+    return True
+
+
+def retranslate_partially(
+    page,
+    db_path: str,
+    input_path: str,
+    output_path: str,
+    old_body: str,
+    profile: Optional[str] = None,
+) -> bool:
+    """Chỉ dịch lại các câu bản gốc đã sửa rồi ghép vào bản dịch hiện có.
+
+    Trả về False khi nên dịch lại cả chương (thay đổi quá nhiều, AI trả lời
+    sai định dạng hoặc không ghép được).
+    """
+    chapter_text = chapter_store.read_text(input_path)
+    new_body = novel_db.chapter_body(chapter_text)
+    ratio = changed_ratio(old_body, new_body)
+    if ratio > MAX_PARTIAL_RATIO:
+        print(f"    -> Bản gốc đổi {ratio:.0%}, dịch lại cả chương.")
+        return False
+    translation = chapter_store.read_text(output_path)
+    started_at = time.time()
+    passages = diff_passages(old_body, new_body)
+    if passages:
+        print(f"    - Dịch lại {len(passages)} đoạn đã sửa trong bản gốc ({ratio:.0%} số câu).")
+        metadata_section, glossary_section, relationships_section = build_context_sections(
+            store_for(db_path), "".join(passage.new for passage in passages)
+        )
+        prompt = build_partial_translation_prompt(
+            metadata_section=metadata_section,
+            glossary_section=glossary_section,
+            relationships_section=relationships_section,
+            existing_translation=translation,
+            changes=[(passage.old, passage.new) for passage in passages],
+        )
+        success, response_text, blocked = submit_prompt_and_get_response(page, prompt)
+        if blocked or not success or not response_text:
+            print("    -> Không nhận được phản hồi dịch lại một phần.")
+            return False
+        try:
+            replacements = parse_partial_translation_response(response_text)
+        except ParseError as exc:
+            print(f"    -> {exc}")
+            return False
+        spliced = splice_translation(translation, replacements)
+        if spliced is None:
+            print("    -> Không tìm thấy đúng vị trí đoạn dịch cũ để thay.")
+            return False
+        chapter_store.write_text(output_path, spliced)
+    remember_translation(
+        output_path, chapter_text, profile=profile, elapsed=time.time() - started_at
+    )
+    print(f"    - Đã cập nhật bản dịch: {output_path}")
+    return True
+
+
+def complete_translation(
+    page,
+    db_path: str,
+    filename: str,
+    prompt: str,
+    response_text: str,
+    output_path: str,
+    system_prompt: Optional[str],
+) -> Optional[bool]:
+    """Hậu xử lý một phản hồi dịch và ghi kết quả ra đĩa.
+
+    Trả về ``True`` khi thành công, ``False`` khi lỗi không nên thử lại và
+    ``None`` khi phản hồi không phân tích được (có thể gửi lại prompt).
+    """
+    try:
+        translation_text, glossary_updates, relationship_updates = split_translation_and_updates(
+            response_text
+        )
+    except Exception as exc:  # noqa: BLE001
+        print(f"    -> Lỗi trong khi phân tách phản hồi: {exc}")
+        return None
+
+    # Kiểm tra số ký tự tiếng Trung trong bản dịch
+    chinese_chars = sum(len(seq) for seq in CHINESE_SEQUENCE_PATTERN.findall(translation_text))
+    if chinese_chars > 30:
+        print(f"    -> Phát hiện {chinese_chars} ký tự tiếng Trung (>30), tạo phiên chat mới và dịch lại...")
+        if not reset_chat_session(page, system_prompt):
+            print("    -> Không thể tạo phiên chat mới, bỏ qua retry.")
+        else:
+            # Dịch lại với cùng prompt
+            try:
+                success_retry, response_text_retry, blocked_retry = submit_prompt_and_get_response(page, prompt)
+            except RateLimitError:
+                print("    -> Retry bị dừng do giới hạn tần suất, giữ bản dịch gốc.")
+                raise
+            if blocked_retry:
+                print("    -> Retry bị chặn, giữ bản dịch gốc.")
+            elif success_retry and response_text_retry:
+                try:
+                    translation_text, glossary_updates, relationship_updates = split_translation_and_updates(
+                        response_text_retry
+                    )
+                    print("    -> Đã retry thành công.")
+                except Exception as exc:  # noqa: BLE001
+                    print(f"    -> Lỗi parse retry: {exc}, giữ bản dịch gốc.")
+            else:
+                print("    -> Retry thất bại, giữ bản dịch gốc.")
+
+    if glossary_updates or relationship_updates:
+        queue_story_updates(db_path, glossary_updates, relationship_updates)
+    # Sửa ký tự tiếng Trung nếu có
+    try:
+        translation_text = fix_chinese_in_translation(page, translation_text)
+    except RateLimitError:
+        print("    -> Dừng xử lý bản dịch do giới hạn tần suất trong bước làm sạch tiếng Trung.")
+        raise
+    try:
+        chapter_store.write_text(output_path, translation_text)
+    except Exception as exc:  # noqa: BLE001
+        print(f"    -> Lỗi khi ghi file '{output_path}': {exc}")
+        return False
+    forget_submission(db_path, filename)
+    wait_between_actions(note="Lưu bản dịch xuống đĩa")
+    print(f"    - Đã dịch và lưu thành công: {output_path}")
+    return True
+
+
 def process_translation_file(
     page,
     db_path: str,
     input_path: str,
     output_path: str,
     system_prompt: Optional[str],
+    profile: Optional[str] = None,
 ) -> Tuple[bool, bool]:
     filename = os.path.basename(input_path)
     print(f"\n[*] Bắt đầu xử lý file: {filename}")
-    with open(input_path, "r", encoding="utf-8") as handle:
-        chapter_text = handle.read()
+    chapter_text = chapter_store.read_text(input_path)
+    started_at = time.time()
+
+    def remember_chat(chat_url: str) -> None:
+        remember_submission(db_path, filename, prompt_hash, chat_url, profile)
+
     for attempt in range(1, MAX_RETRIES + 1):
         if attempt > 1:
             print(f"    -> Thử lại lần {attempt}/{MAX_RETRIES} cho file '{filename}'...")
@@ -475,18 +1305,12 @@ def process_translation_file(
                 continue
             wait_between_actions(seconds=5, note="Chờ trang tải lại hoàn tất")
             update_system_instructions(page, system_prompt)
-        with connect(db_path) as conn:
-            metadata_section, glossary_section, relationships_section = build_context_sections(
-                conn, chapter_text
-            )
-        prompt = build_translation_prompt(
-            metadata_section=metadata_section,
-            glossary_section=glossary_section,
-            relationships_section=relationships_section,
-            source_text=chapter_text,
-        )
+        prompt = build_chapter_prompt(db_path, chapter_text)
+        prompt_hash = compute_prompt_hash(prompt)
         try:
-            success, response_text, blocked = submit_prompt_and_get_response(page, prompt)
+            success, response_text, blocked = submit_prompt_and_get_response(
+                page, prompt, on_chat_url=remember_chat
+            )
         except RateLimitError:
             print("    -> Dừng dịch tạm thời vì giới hạn tần suất.")
             raise
@@ -495,76 +1319,120 @@ def process_translation_file(
             return False, True
         if not success or not response_text:
             continue
-        try:
-            translation_text, glossary_updates, relationship_updates = split_translation_and_updates(
-                response_text
-            )
-        except Exception as exc:  # noqa: BLE001
-            print(f"    -> Lỗi trong khi phân tách phản hồi: {exc}")
+        completed = complete_translation(
+            page, db_path, filename, prompt, response_text, output_path, system_prompt
+        )
+        if completed is None:
             if attempt == MAX_RETRIES:
                 return False, False
             continue
-
-        # Kiểm tra số ký tự tiếng Trung trong bản dịch
-        chinese_chars = sum(len(seq) for seq in CHINESE_SEQUENCE_PATTERN.findall(translation_text))
-        if chinese_chars > 30:
-            print(f"    -> Phát hiện {chinese_chars} ký tự tiếng Trung (>30), tạo phiên chat mới và dịch lại...")
-            if not reset_chat_session(page, system_prompt):
-                print("    -> Không thể tạo phiên chat mới, bỏ qua retry.")
-            else:
-                # Dịch lại với cùng prompt
-                try:
-                    success_retry, response_text_retry, blocked_retry = submit_prompt_and_get_response(page, prompt)
-                except RateLimitError:
-                    print("    -> Retry bị dừng do giới hạn tần suất, giữ bản dịch gốc.")
-                    raise
-                if blocked_retry:
-                    print("    -> Retry bị chặn, giữ bản dịch gốc.")
-                elif success_retry and response_text_retry:
-                    try:
-                        translation_text, glossary_updates, relationship_updates = split_translation_and_updates(
-                            response_text_retry
-                        )
-                        print("    -> Đã retry thành công.")
-                    except Exception as exc:  # noqa: BLE001
-                        print(f"    -> Lỗi parse retry: {exc}, giữ bản dịch gốc.")
-                else:
-                    print("    -> Retry thất bại, giữ bản dịch gốc.")
-
-        glossary_added = 0
-        relationships_added = 0
-        if glossary_updates or relationship_updates:
-            with connect(db_path) as conn:
-                if glossary_updates:
-                    glossary_added = insert_glossary_entries(conn, glossary_updates)
-                if relationship_updates:
-                    relationships_added = insert_relationship_entries(
-                        conn, relationship_updates
-                    )
-            print(
-                f"    - Cập nhật database: +{glossary_added} nhân vật, +{relationships_added} quan hệ."
+        if completed:
+            remember_translation(
+                output_path, chapter_text, profile=profile, elapsed=time.time() - started_at
             )
-        # Sửa ký tự tiếng Trung nếu có
-        try:
-            translation_text = fix_chinese_in_translation(page, translation_text)
-        except RateLimitError:
-            print("    -> Dừng xử lý bản dịch do giới hạn tần suất trong bước làm sạch tiếng Trung.")
-            raise
-        try:
-            with open(output_path, "w", encoding="utf-8") as out_handle:
-                out_handle.write(translation_text)
-        except Exception as exc:  # noqa: BLE001
-            print(f"    -> Lỗi khi ghi file '{output_path}': {exc}")
-            return False, False
-        wait_between_actions(note="Lưu bản dịch xuống đĩa")
-        print(f"    - Đã dịch và lưu thành công: {output_path}")
-        return True, False
+        return completed, False
     print(
         f"[X] LỖI NẶNG: Đã thử {MAX_RETRIES} lần nhưng vẫn thất bại với file '{filename}'."
     )
     return False, False
 
 
+def harvest_pending_submission(
+    page,
+    db_path: str,
+    filename: str,
+    prompt_hash: str,
+    system_prompt: Optional[str],
+) -> Optional[str]:
+    """Thu hồi câu trả lời của lần gửi dang dở (nếu có) của một chương."""
+    pending = fetch_pending_submission(store_for(db_path).conn, filename)
+    if pending is None:
+        return None
+    if pending["prompt_hash"] != prompt_hash:
+        print("    - Lần gửi dang dở không còn khớp với prompt hiện tại. Gửi lại từ đầu.")
+        forget_submission(db_path, filename)
+        return None
+    response_text = harvest_saved_response(page, pending["chat_url"])
+    if response_text:
+        return response_text
+    forget_submission(db_path, filename)
+    print("    - Không có câu trả lời để thu hồi. Mở chat mới và gửi lại prompt...")
+    reopen_new_chat(page, system_prompt)
+    return None
+
+
+def harvest_pending_submissions(
+    session_manager: "BrowserSessionManager",
+    paths: "NovelPaths",
+    system_prompt: Optional[str],
+) -> bool:
+    """Thu hồi mọi lần gửi dang dở của bộ truyện ngay khi bắt đầu dịch.
+
+    Chat cũ được mở lại trước khi gửi chương nào khác: chương đã có câu trả lời
+    được hoàn tất luôn, chương còn lại bị xoá khỏi Submissions để gửi lại như
+    bình thường. Trả về False nếu không tạo được chat mới và bộ truyện nên tạm dừng.
+    """
+    if not os.path.exists(paths.db_path):
+        return True
+    # Thu hồi dựa trên Submissions đã commit, kể cả các lần ghi còn trong hàng đợi.
+    db_writer.shared_writer().wait(paths.db_path)
+    pending = list_pending_submissions(store_for(paths.db_path).conn)
+    if not pending:
+        return True
+    print(f"[*] '{paths.name}': thu hồi {len(pending)} lần gửi dang dở từ lần chạy trước.")
+    for row in pending:
+        filename = row["chapter"]
+        input_path = os.path.join(paths.input_folder, filename)
+        output_path = os.path.join(paths.output_folder, filename)
+        if chapter_store.text_exists(output_path) or not chapter_store.text_exists(input_path):
+            forget_submission(paths.db_path, filename)
+            continue
+        print(f"\n[*] Thu hồi chương '{filename}'.")
+        chapter_text = chapter_store.read_text(input_path)
+        started_at = time.time()
+        session_manager.record_usage()
+        while True:
+            page = session_manager.page
+            try:
+                prompt = build_chapter_prompt(paths.db_path, chapter_text)
+                response_text = harvest_pending_submission(
+                    page, paths.db_path, filename, compute_prompt_hash(prompt), system_prompt
+                )
+                completed = response_text and complete_translation(
+                    page, paths.db_path, filename, prompt, response_text, output_path, system_prompt
+                )
+            except RateLimitError:
+                session_manager.rotate(system_prompt)
+                continue
+            break
+        if completed:
+            remember_translation(
+                output_path,
+                chapter_text,
+                profile=session_manager.current_profile,
+                elapsed=time.time() - started_at,
+            )
+        elif response_text:
+            forget_submission(paths.db_path, filename)
+    if not reset_chat_session(session_manager.page, system_prompt):
+        print(f"[X] '{paths.name}': lỗi khi tạo chat mới sau khi thu hồi. Tạm dừng bộ truyện.")
+        return False
+    return True
+
+
+def reopen_new_chat(page, system_prompt: Optional[str]) -> bool:
+    """Tải lại tab ở trang chat mới để lần gửi sau bắt đầu từ trạng thái sạch."""
+    try:
+        page.goto(WEBSITE_URL, wait_until="domcontentloaded", timeout=120000)
+        page.wait_for_selector(TEXT_INPUT_SELECTOR, timeout=60000)
+    except (TimeoutError, Error) as exc:
+        print(f"    -> Cảnh báo: Không mở lại được chat mới ({exc}).")
+        return False
+    wait_between_actions(note="Chờ chat mới sẵn sàng")
+    update_system_instructions(page, system_prompt)
+    return True
+
+
 def reset_chat_session(page, system_prompt: Optional[str]) -> bool:
     print("    -> Đang tạo cuộc trò chuyện mới...")
     for attempt in range(1, 4):
@@ -715,11 +1583,57 @@ def parse_arguments() -> argparse.Namespace:
             "Nếu không truyền, tool dùng ~/chrome-for-automation1..5."
         ),
     )
+    parser.add_argument(
+        "--auth-states",
+        help=(
+            "Danh sách file trạng thái đăng nhập (auth.json) hoặc thư mục chứa chúng, "
+            "phân tách bởi dấu phẩy. Khi có tuỳ chọn này, tool dùng một trình duyệt "
+            "chung và tạo context nhẹ cho mỗi tài khoản thay cho --profiles."
+        ),
+    )
     parser.add_argument(
         "--headless",
         action="store_true",
         help="Chạy Chrome ở chế độ headless (ít được khuyến nghị).",
     )
+    parser.add_argument(
+        "--recycle-rss-mb",
+        type=float,
+        help="Tái khởi động context khi tổng RSS của Chrome vượt ngưỡng này (MB, cần psutil).",
+    )
+    parser.add_argument(
+        "--recycle-after-chapters",
+        type=int,
+        help="Tái khởi động context sau khi dịch đủ số chương này.",
+    )
+    parser.add_argument(
+        "--memory-log",
+        help="File CSV ghi lại bộ nhớ Chrome sau mỗi chương.",
+    )
+    parser.add_argument(
+        "--index-db",
+        default=novel_db.DEFAULT_DB_FILE,
+        help=(
+            "Database của crawler để ghi tiến độ dịch từng chương "
+            f"(mặc định: {novel_db.DEFAULT_DB_FILE}; bỏ qua nếu file không tồn tại)."
+        ),
+    )
+    parser.add_argument(
+        "--tabs",
+        type=int,
+        default=1,
+        help="Số tab dịch song song trong mỗi profile Chrome (mặc định: 1).",
+    )
+    parser.add_argument(
+        "--retranslate-changed",
+        type=int,
+        default=0,
+        metavar="N",
+        help=(
+            "Dịch lại tối đa N chương có bản gốc bị trang nguồn sửa sau khi đã dịch, "
+            "trước khi dịch chương mới (mặc định: 0 = tắt)."
+        ),
+    )
     return parser.parse_args()
 
 
@@ -737,6 +1651,29 @@ def resolve_profile_paths(args: argparse.Namespace) -> List[str]:
     return unique_profiles
 
 
+def resolve_auth_state_paths(args: argparse.Namespace) -> List[str]:
+    paths: List[str] = []
+    for raw_path in (args.auth_states or "").split(","):
+        path = os.path.expanduser(raw_path.strip())
+        if not path:
+            continue
+        if os.path.isdir(path):
+            paths.extend(
+                os.path.join(path, name)
+                for name in sorted(os.listdir(path))
+                if name.endswith(".json")
+            )
+        else:
+            paths.append(path)
+    unique_paths: List[str] = []
+    seen = set()
+    for path in paths:
+        if path not in seen:
+            unique_paths.append(path)
+            seen.add(path)
+    return unique_paths
+
+
 def iter_novel_directories(root_folder: str) -> List[str]:
     if not os.path.isdir(root_folder):
         return []
@@ -748,114 +1685,423 @@ def iter_novel_directories(root_folder: str) -> List[str]:
     return entries
 
 
-def process_novel(
+@dataclass
+class TabJob:
+    """Một chương đang được dịch trên một tab."""
+
+    filename: str
+    attempt: int
+    prompt: str
+    prompt_hash: str
+    started_at: float
+    chapter_text: str = ""
+    chat_url: Optional[str] = None
+
+
+def start_tab_job(
+    page,
+    db_path: str,
+    input_folder: str,
+    filename: str,
+    attempt: int,
+) -> Optional[TabJob]:
+    """Gửi prompt của một chương lên tab mà không chờ phản hồi."""
+    print(f"\n[*] Bắt đầu xử lý file: {filename} (lần {attempt}/{MAX_RETRIES})")
+    chapter_text = chapter_store.read_text(os.path.join(input_folder, filename))
+    prompt = build_chapter_prompt(db_path, chapter_text)
+    job = TabJob(
+        filename=filename,
+        attempt=attempt,
+        prompt=prompt,
+        prompt_hash=compute_prompt_hash(prompt),
+        started_at=time.time(),
+        chapter_text=chapter_text,
+    )
+    if not send_prompt(page, prompt):
+        return None
+    job.started_at = time.time()
+    return job
+
+
+def poll_tab_job(page, job: TabJob) -> Optional[Tuple[bool, Optional[str], bool]]:
+    """Trả về kết quả nếu tab đã trả lời xong, ``None`` nếu AI vẫn đang sinh."""
+    elapsed = time.time() - job.started_at
+    if elapsed < TAB_POLL_GRACE_SECONDS:
+        return None
+    if is_generating(page):
+        if elapsed < GENERATION_TIMEOUT:
+            return None
+        stop_generation(page)
+        return False, None, False
+    return read_finished_response(page)
+
+
+def translate_in_tabs(
     session_manager: BrowserSessionManager,
-    novel_root: str,
+    db_path: str,
+    input_folder: str,
+    output_folder: str,
+    filenames: Sequence[str],
     system_prompt: Optional[str],
+    novel_name: str,
 ) -> None:
-    novel_name = os.path.basename(os.path.abspath(novel_root))
-    input_folder = os.path.join(novel_root, "goc")
-    output_folder = os.path.join(novel_root, "dich")
-    db_path = os.path.join(novel_root, DB_FILENAME)
+    """Dịch nhiều chương song song, mỗi tab một chương và một cuộc trò chuyện riêng.
+
+    Trong lúc một tab chờ AI sinh bản dịch, tab khác được dùng để gửi prompt
+    của chương kế tiếp. Các tab dùng chung profile nên khi gặp giới hạn tần
+    suất, mọi chương đang chạy được đưa lại vào hàng đợi trước khi xoay profile.
+    """
+    pending = deque((filename, 1) for filename in filenames)
+    jobs: Dict[int, TabJob] = {}
+    # Tab vừa gửi hỏng hoặc nhận phản hồi lỗi: phải mở lại chat mới trước khi nhận chương khác.
+    dirty_tabs: Set[int] = set()
+    draining = False
+
+    def retry_later(filename: str, attempt: int) -> None:
+        if attempt >= MAX_RETRIES:
+            print(
+                f"[X] LỖI NẶNG: Đã thử {MAX_RETRIES} lần nhưng vẫn thất bại với file '{filename}'."
+            )
+            return
+        pending.append((filename, attempt + 1))
+
+    while pending or jobs:
+        try:
+            if draining and not jobs:
+                session_manager.recycle(system_prompt)
+                dirty_tabs.clear()
+                draining = False
+            for tab_index, page in enumerate(session_manager.pages):
+                if draining or tab_index in jobs or not pending:
+                    continue
+                filename, attempt = pending.popleft()
+                if tab_index in dirty_tabs:
+                    print(f"    -> Tab {tab_index + 1}: mở lại chat mới trước khi gửi '{filename}'.")
+                    if not reopen_new_chat(page, system_prompt):
+                        retry_later(filename, attempt)
+                        continue
+                    dirty_tabs.discard(tab_index)
+                job = start_tab_job(page, db_path, input_folder, filename, attempt)
+                if job is None:
+                    dirty_tabs.add(tab_index)
+                    retry_later(filename, attempt)
+                    continue
+                session_manager.record_usage()
+                jobs[tab_index] = job
+
+            for tab_index, job in list(jobs.items()):
+                page = session_manager.pages[tab_index]
+                if job.chat_url is None and is_saved_chat_url(page.url):
+                    job.chat_url = page.url
+                    remember_submission(
+                        db_path,
+                        job.filename,
+                        job.prompt_hash,
+                        job.chat_url,
+                        session_manager.current_profile,
+                    )
+                result = poll_tab_job(page, job)
+                if result is None:
+                    continue
+                print(f"\n[*] Tab {tab_index + 1}: nhận phản hồi cho '{job.filename}'.")
+                success, response_text, blocked = result
+                failed = False
+                if blocked:
+                    print("    -> Nội dung bị chính sách an toàn chặn. Không thể tiếp tục với chương này.")
+                elif not success or not response_text:
+                    failed = True
+                    retry_later(job.filename, job.attempt)
+                else:
+                    output_path = os.path.join(output_folder, job.filename)
+                    completed = complete_translation(
+                        page,
+                        db_path,
+                        job.filename,
+                        job.prompt,
+                        response_text,
+                        output_path,
+                        system_prompt,
+                    )
+                    if completed is None:
+                        failed = True
+                        retry_later(job.filename, job.attempt)
+                    elif completed:
+                        remember_translation(
+                            output_path,
+                            job.chapter_text,
+                            profile=session_manager.current_profile,
+                            elapsed=time.time() - job.started_at,
+                        )
+                del jobs[tab_index]
+                if failed:
+                    dirty_tabs.add(tab_index)
+                elif not reset_chat_session(page, system_prompt):
+                    print(f"[X] '{novel_name}': lỗi khi tạo chat mới trên tab {tab_index + 1}. Tạm dừng bộ truyện.")
+                    return
+                if not draining and pending and session_manager.should_recycle():
+                    # Ngừng giao chương mới cho tới khi mọi tab xong việc rồi mới tái khởi động.
+                    draining = True
+        except RateLimitError:
+            # Giữ nguyên thứ tự các chương đang chạy khi đưa lại lên đầu hàng đợi.
+            for job in sorted(jobs.values(), key=lambda job: job.filename, reverse=True):
+                pending.appendleft((job.filename, job.attempt))
+            jobs.clear()
+            dirty_tabs.clear()
+            draining = False
+            session_manager.rotate(system_prompt)
+            continue
+        if jobs:
+            time.sleep(STABILITY_CHECK_INTERVAL)
+
+
+@dataclass
+class NovelPaths:
+    name: str
+    input_folder: str
+    output_folder: str
+    db_path: str
+
+
+def novel_paths(novel_root: str) -> NovelPaths:
+    return NovelPaths(
+        name=os.path.basename(os.path.abspath(novel_root)),
+        input_folder=os.path.join(novel_root, "goc"),
+        output_folder=os.path.join(novel_root, "dich"),
+        db_path=os.path.join(novel_root, DB_FILENAME),
+    )
 
-    if not os.path.isdir(input_folder):
-        print(f"[-] Bỏ qua '{novel_name}': không tìm thấy thư mục 'goc'.")
-        return
 
-    os.makedirs(output_folder, exist_ok=True)
-    removed_glossary, removed_relationships = cleanup_database(db_path)
+def list_chapter_files(folder: str) -> List[str]:
+    return chapter_store.list_texts(folder)
+
+
+def prepare_novel(
+    session_manager: BrowserSessionManager,
+    paths: NovelPaths,
+    chapter_files: Sequence[str],
+    system_prompt: Optional[str],
+) -> bool:
+    """Dọn database và khởi tạo glossary (nếu chưa có) trước khi dịch một bộ truyện."""
+    os.makedirs(paths.output_folder, exist_ok=True)
+    removed_glossary, removed_relationships = cleanup_database(paths.db_path)
     if removed_glossary or removed_relationships:
         print(
-            f"[!] '{novel_name}': dọn database - xoá {removed_glossary} nhân vật placeholder, "
+            f"[!] '{paths.name}': dọn database - xoá {removed_glossary} nhân vật placeholder, "
             f"{removed_relationships} quan hệ placeholder."
         )
 
-    chapter_files = [
-        name
-        for name in sorted(os.listdir(input_folder))
-        if name.endswith(".txt")
+    if not chapter_files or os.path.exists(paths.db_path):
+        return True
+
+    initial_paths = [
+        os.path.join(paths.input_folder, name)
+        for name in chapter_files[:INITIAL_CHAPTER_COUNT]
     ]
-    if not chapter_files:
-        print(f"[-] '{novel_name}': không tìm thấy chương .txt trong thư mục 'goc'.")
-        return
+    while True:
+        try:
+            initialised = run_initialisation(
+                session_manager.page, paths.db_path, initial_paths, system_prompt
+            )
+        except RateLimitError:
+            session_manager.rotate(system_prompt)
+            continue
+        if not initialised:
+            print(f"[X] '{paths.name}': khởi tạo database thất bại. Bỏ qua bộ truyện.")
+            return False
+        wait_between_actions(seconds=5, note="Chuẩn bị dịch sau khi khởi tạo")
+        if not reset_chat_session(session_manager.page, system_prompt):
+            print(f"[X] '{paths.name}': không thể tạo chat mới sau khởi tạo. Dừng bộ truyện này.")
+            return False
+        wait_between_actions(seconds=4, note="Sẵn sàng dịch chương đầu tiên")
+        return True
 
-    translated_files = {
-        name for name in os.listdir(output_folder) if name.endswith(".txt")
-    }
 
-    page = session_manager.page
+def translate_chapter(
+    session_manager: BrowserSessionManager,
+    paths: NovelPaths,
+    filename: str,
+    system_prompt: Optional[str],
+) -> Tuple[bool, bool]:
+    """Dịch một chương trên tab chính rồi mở chat mới.
+
+    Trả về ``(success, can_continue)``; ``can_continue`` là False khi không tạo
+    được chat mới và bộ truyện nên tạm dừng.
+    """
+    input_path = os.path.join(paths.input_folder, filename)
+    output_path = os.path.join(paths.output_folder, filename)
+
+    session_manager.record_usage()
+    while True:
+        try:
+            success, blocked = process_translation_file(
+                session_manager.page,
+                paths.db_path,
+                input_path,
+                output_path,
+                system_prompt,
+                profile=session_manager.current_profile,
+            )
+        except RateLimitError:
+            session_manager.rotate(system_prompt)
+            continue
+        break
+
+    if success:
+        wait_between_actions(seconds=10, note="Nghỉ trước khi sang chương tiếp theo")
+    elif blocked:
+        wait_between_actions(seconds=5, note="Tạm nghỉ sau khi dính Content Blocked")
+    else:
+        wait_between_actions(seconds=5, note="Chuẩn bị thử chương tiếp theo")
+
+    print("\n" + "-" * 56)
+    print(f"Tạo cuộc trò chuyện mới sau chương '{filename}' của '{paths.name}'.")
+    print("-" * 56 + "\n")
+
+    if not reset_chat_session(session_manager.page, system_prompt):
+        print(f"[X] '{paths.name}': lỗi khi tạo chat mới. Tạm dừng bộ truyện.")
+        return success, False
+    wait_between_actions(seconds=4, note="Đợi chat mới ổn định")
+    session_manager.maybe_recycle(system_prompt)
+    return success, True
 
-    if chapter_files and not os.path.exists(db_path):
-        initial_paths = [
-            os.path.join(input_folder, name)
-            for name in chapter_files[:3]
+
+def retranslate_changed_chapters(
+    session_manager: BrowserSessionManager,
+    paths: NovelPaths,
+    system_prompt: Optional[str],
+) -> bool:
+    """Cập nhật bản dịch của các chương có bản gốc đổi sau lần dịch trước.
+
+    Thông tin lấy từ novel_index.sqlite của crawler. Chỉ chạy khi bật
+    ``--retranslate-changed N`` và dừng sau N chương mỗi lần chạy (tính chung
+    mọi bộ truyện), để việc dịch lại không tiêu hết quota trước chương mới.
+    Chương không còn lưu bản gốc đã dịch thì bỏ qua. Trả về False nếu bộ truyện
+    nên tạm dừng (không tạo được chat mới).
+    """
+    global RETRANSLATE_BUDGET
+    if RETRANSLATE_BUDGET <= 0 or not NOVEL_INDEX_DB or not os.path.exists(NOVEL_INDEX_DB):
+        return True
+    db_writer.shared_writer().wait(NOVEL_INDEX_DB)
+    with novel_db.connect(NOVEL_INDEX_DB) as conn:
+        novel = novel_db.fetch_novel_by_slug(conn, paths.name)
+        if novel is None:
+            return True
+        stale = [
+            (os.path.basename(row["file_path"]), novel_db.fetch_translated_source(conn, row["id"]))
+            for row in novel_db.fetch_stale_translations(conn, novel["id"])
         ]
+
+    for filename, old_body in stale:
+        input_path = os.path.join(paths.input_folder, filename)
+        output_path = os.path.join(paths.output_folder, filename)
+        if not (chapter_store.text_exists(input_path) and chapter_store.text_exists(output_path)):
+            continue
+        if old_body is None:
+            print(f"[-] '{paths.name}': bỏ qua '{filename}' vì không còn lưu bản gốc đã dịch.")
+            continue
+        if RETRANSLATE_BUDGET <= 0:
+            print(f"[!] '{paths.name}': đã hết lượt --retranslate-changed, các chương đổi còn lại để lần sau.")
+            return True
+        RETRANSLATE_BUDGET -= 1
+        print(f"\n[*] '{paths.name}': bản gốc '{filename}' đã thay đổi kể từ lần dịch trước.")
+        session_manager.record_usage()
         while True:
             try:
-                initialised = run_initialisation(page, db_path, initial_paths, system_prompt)
+                updated = retranslate_partially(
+                    session_manager.page,
+                    paths.db_path,
+                    input_path,
+                    output_path,
+                    old_body,
+                    profile=session_manager.current_profile,
+                )
             except RateLimitError:
                 session_manager.rotate(system_prompt)
-                page = session_manager.page
                 continue
-            if initialised:
-                wait_between_actions(seconds=5, note="Chuẩn bị dịch sau khi khởi tạo")
-                if not reset_chat_session(page, system_prompt):
-                    print(f"[X] '{novel_name}': không thể tạo chat mới sau khởi tạo. Dừng bộ truyện này.")
-                    return
-                wait_between_actions(seconds=4, note="Sẵn sàng dịch chương đầu tiên")
-            else:
-                print(f"[X] '{novel_name}': khởi tạo database thất bại. Bỏ qua bộ truyện.")
-                return
             break
+        if not reset_chat_session(session_manager.page, system_prompt):
+            print(f"[X] '{paths.name}': lỗi khi tạo chat mới. Tạm dừng bộ truyện.")
+            return False
+        if updated:
+            continue
+        _, can_continue = translate_chapter(session_manager, paths, filename, system_prompt)
+        if not can_continue:
+            return False
+    return True
+
+
+def process_novel(
+    session_manager: BrowserSessionManager,
+    novel_root: str,
+    system_prompt: Optional[str],
+) -> None:
+    paths = novel_paths(novel_root)
+    novel_name = paths.name
+
+    if not os.path.isdir(paths.input_folder):
+        print(f"[-] Bỏ qua '{novel_name}': không tìm thấy thư mục 'goc'.")
+        return
+
+    chapter_files = list_chapter_files(paths.input_folder)
+    if not chapter_files:
+        os.makedirs(paths.output_folder, exist_ok=True)
+        cleanup_database(paths.db_path)
+        print(f"[-] '{novel_name}': không tìm thấy chương .txt trong thư mục 'goc'.")
+        return
+
+    if not prepare_novel(session_manager, paths, chapter_files, system_prompt):
+        return
+
+    if not harvest_pending_submissions(session_manager, paths, system_prompt):
+        return
+
+    if not retranslate_changed_chapters(session_manager, paths, system_prompt):
+        return
+
+    translated_files = set(list_chapter_files(paths.output_folder))
 
     print("\n" + "=" * 64)
     print(f"[☆] BẮT ĐẦU DỊCH BỘ TRUYỆN: {novel_name}")
     print("=" * 64)
 
+    if session_manager.pages_per_context > 1:
+        for filename in chapter_files:
+            if filename in translated_files:
+                print(f"[-] '{novel_name}': bỏ qua '{filename}' vì đã có bản dịch.")
+        translate_in_tabs(
+            session_manager,
+            paths.db_path,
+            paths.input_folder,
+            paths.output_folder,
+            [name for name in chapter_files if name not in translated_files],
+            system_prompt,
+            novel_name,
+        )
+        print(f"\n[✓] Hoàn tất xử lý bộ truyện '{novel_name}'.")
+        return
+
     for filename in chapter_files:
         if filename in translated_files:
             print(f"[-] '{novel_name}': bỏ qua '{filename}' vì đã có bản dịch.")
             continue
-
-        input_path = os.path.join(input_folder, filename)
-        output_path = os.path.join(output_folder, filename)
-
-        while True:
-            try:
-                success, blocked = process_translation_file(
-                    page, db_path, input_path, output_path, system_prompt
-                )
-            except RateLimitError:
-                session_manager.rotate(system_prompt)
-                page = session_manager.page
-                continue
-            break
-
+        success, can_continue = translate_chapter(session_manager, paths, filename, system_prompt)
         if success:
             translated_files.add(filename)
-            wait_between_actions(seconds=10, note="Nghỉ trước khi sang chương tiếp theo")
-        else:
-            if blocked:
-                wait_between_actions(seconds=5, note="Tạm nghỉ sau khi dính Content Blocked")
-            else:
-                wait_between_actions(seconds=5, note="Chuẩn bị thử chương tiếp theo")
-
-        print("\n" + "-" * 56)
-        print(f"Tạo cuộc trò chuyện mới sau chương '{filename}' của '{novel_name}'.")
-        print("-" * 56 + "\n")
-
-        if not reset_chat_session(page, system_prompt):
-            print(f"[X] '{novel_name}': lỗi khi tạo chat mới. Tạm dừng bộ truyện.")
+        if not can_continue:
             break
-        wait_between_actions(seconds=4, note="Đợi chat mới ổn định")
 
     print(f"\n[✓] Hoàn tất xử lý bộ truyện '{novel_name}'.")
 
 
 def main():
+    global NOVEL_INDEX_DB, RETRANSLATE_BUDGET
+
     args = parse_arguments()
+    NOVEL_INDEX_DB = args.index_db
+    RETRANSLATE_BUDGET = max(0, args.retranslate_changed)
     root_folder = os.path.abspath(args.root)
-    profile_paths = resolve_profile_paths(args)
+    auth_state_paths = resolve_auth_state_paths(args)
+    profile_paths = auth_state_paths or resolve_profile_paths(args)
     system_prompt = load_system_prompt()
 
     if not os.path.isdir(root_folder):
@@ -876,23 +2122,37 @@ def main():
                 playwright,
                 profile_paths,
                 headless=args.headless,
+                pages_per_context=max(1, args.tabs),
+                use_storage_state=bool(auth_state_paths),
+                recycle_rss_mb=args.recycle_rss_mb,
+                recycle_after_chapters=args.recycle_after_chapters,
+                memory_log_path=args.memory_log,
             )
             session_manager.launch_initial(system_prompt)
 
             for novel_root in novel_directories:
                 process_novel(session_manager, novel_root, system_prompt)
+                close_story_stores()
 
     except RateLimitError:
         print("[X] Tool kết thúc do gặp giới hạn tần suất mà không thể xoay profile.")
     except Error as exc:
         print(f"[X] Lỗi Playwright: {exc}")
     finally:
+        db_writer.close_shared_writer()
+        close_story_stores()
         if session_manager is not None:
             try:
-                session_manager.close()
+                session_manager.shutdown()
             except Exception:
                 pass
 
+    click_report = CLICK_STRATEGY_CACHE.report()
+    if click_report:
+        print("\n[•] Thống kê các cách click theo selector:")
+        for line in click_report:
+            print(f"    - {line}")
+
     print("\n================ HOÀN TẤT ==================")
     print("Bạn có thể đóng terminal này." )
 
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Đo tốc độ phân tích (trang/giây) của từng adapter trên HTML mẫu trong tests/fixtures/.
+
+Ví dụ:
+    python benchmarks/bench_adapters.py --repeat 200
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from site_adapters import ADAPTERS  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, "tests", "fixtures")
+
+
+def rate(func, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return repeat / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark adapter theo HTML mẫu.")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    for adapter in ADAPTERS:
+        folder = os.path.join(FIXTURES, adapter.name)
+        expected_path = os.path.join(folder, "expected.json")
+        if not os.path.exists(expected_path):
+            print(f"{adapter.name:<12} (không có HTML mẫu)")
+            continue
+        with open(expected_path, "r", encoding="utf-8") as handle:
+            expected = json.load(handle)
+        with open(os.path.join(folder, "index.html"), "rb") as handle:
+            index_html = handle.read()
+        with open(os.path.join(folder, "chapter.html"), "rb") as handle:
+            chapter_html = handle.read()
+
+        index_rate = rate(
+            lambda: adapter.parse_index(BeautifulSoup(index_html, "lxml"), expected["index_url"]),
+            args.repeat,
+        )
+        chapter_rate = rate(
+            lambda: adapter.parse_chapter(chapter_html, None, expected["chapter_url"]),
+            args.repeat,
+        )
+        print(
+            f"{adapter.name:<12} mục lục {index_rate:8.1f} trang/giây | "
+            f"chương {chapter_rate:8.1f} trang/giây"
+        )
+
+
+if __name__ == "__main__":
+    main()
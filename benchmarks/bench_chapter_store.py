@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""So sánh một lượt liệt kê + đọc toàn bộ chương: file .txt rời và chapters.sqlite đóng gói.
+
+Ví dụ:
+    python benchmarks/bench_chapter_store.py --chapters 1500
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chapter_store  # noqa: E402
+
+
+def read_all(folder: str) -> int:
+    total = 0
+    for name in chapter_store.list_texts(folder):
+        total += len(chapter_store.read_text(os.path.join(folder, name)))
+    return total
+
+
+def disk_usage(folder: str) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(folder):
+        for name in filenames:
+            total += os.stat(os.path.join(dirpath, name)).st_blocks * 512
+    return total
+
+
+def timed(func, *args) -> float:
+    started = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark chapter_store.")
+    parser.add_argument("--chapters", type=int, default=1500)
+    parser.add_argument("--chars", type=int, default=6000)
+    args = parser.parse_args()
+
+    body = ("他走了。她笑了！" * (args.chars // 8 + 1))[: args.chars]
+    with tempfile.TemporaryDirectory() as root:
+        for packed in (False, True):
+            novel_root = os.path.join(root, "packed" if packed else "files")
+            goc = os.path.join(novel_root, "goc")
+            os.makedirs(goc)
+            for index in range(1, args.chapters + 1):
+                with open(os.path.join(goc, f"chuong_{index:04d}.txt"), "w", encoding="utf-8") as handle:
+                    handle.write(body)
+            if packed:
+                chapter_store.pack_novel(novel_root, remove_files=True)
+            elapsed = timed(read_all, goc)
+            label = "chapters.sqlite" if packed else "file .txt rời"
+            print(
+                f"{label:<16} {args.chapters} chương: {elapsed * 1000:8.1f} ms, "
+                f"chiếm {disk_usage(novel_root) / 1024 / 1024:6.1f} MB"
+            )
+        chapter_store.close_stores()
+
+
+if __name__ == "__main__":
+    main()
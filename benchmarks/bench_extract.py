@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""So sánh tốc độ tách chương: BeautifulSoup(html.parser) cũ và lượt parse lxml mới.
+
+Ví dụ:
+    python benchmarks/bench_extract.py --pages saved_pages/ --repeat 3
+
+Không truyền ``--pages`` thì dùng một trang chương tổng hợp cỡ ~6000 ký tự.
+"""
+
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+from typing import List, Tuple
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cralw  # noqa: E402
+
+
+def legacy_extract(content: bytes) -> Tuple[str, str]:
+    """Bản sao logic extract_chapter trước khi chuyển sang lxml, dùng làm mốc."""
+    soup = BeautifulSoup(content, "html.parser")
+    title = ""
+    for sel in ["h1", ".chapter-title", ".bookname", "title"]:
+        tag = soup.select_one(sel)
+        if tag:
+            title = tag.get_text(strip=True)
+            break
+    node = None
+    for selector in [".readcotent", ".content", "#content", ".chapter-content"]:
+        node = soup.select_one(selector)
+        if node:
+            break
+    if not node:
+        return title, ""
+    for tag in node.find_all(["script", "style", "noscript", "iframe"]):
+        tag.decompose()
+    return title, re.sub(r"\s+", " ", node.get_text(" ", strip=True)).strip()
+
+
+def synthetic_page() -> bytes:
+    paragraphs = "".join(f"<p>第{i}段，少年握紧了手中的长剑，望向远处的群山。</p>" for i in range(200))
+    nav = "".join(f"<li><a href='/book/1/{i}.html'>第{i}章</a></li>" for i in range(300))
+    return (
+        "<html><head><meta charset='utf-8'><title>第一章</title>"
+        "<script>var ads = 1;</script></head><body>"
+        f"<ul class='nav'>{nav}</ul><h1>第一章 少年</h1>"
+        f"<div class='readcotent'>{paragraphs}<script>ad()</script></div>"
+        "</body></html>"
+    ).encode("utf-8")
+
+
+def load_pages(folder: str) -> List[bytes]:
+    pages = []
+    for path in sorted(glob.glob(os.path.join(folder, "**", "*.html"), recursive=True)):
+        with open(path, "rb") as handle:
+            pages.append(handle.read())
+    return pages
+
+
+def measure(label: str, func, pages: List[bytes], repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            func(page)
+    elapsed = time.perf_counter() - started
+    total = len(pages) * repeat
+    print(f"{label:<14} {total} trang trong {elapsed:.3f}s ({total / elapsed:.1f} trang/giây)")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark tách nội dung chương.")
+    parser.add_argument("--pages", help="Thư mục chứa các file .html đã lưu.")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages) if args.pages else [synthetic_page()] * 50
+    if not pages:
+        print("[!] Không tìm thấy file .html nào.")
+        return
+
+    legacy = measure("BeautifulSoup", legacy_extract, pages, args.repeat)
+    current = measure("lxml", cralw.parse_chapter_html, pages, args.repeat)
+    print(f"-> Nhanh hơn {legacy / current:.1f} lần")
+
+
+if __name__ == "__main__":
+    main()
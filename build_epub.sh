@@ -54,7 +54,7 @@ fi
 
 # Kiểm tra có file .txt không
 TXT_COUNT=$(find "$FOLDER" -name "*.txt" | wc -l)
-if [ "$TXT_COUNT" -eq 0 ]; then
+if [ "$TXT_COUNT" -eq 0 ] && [ ! -f "$FOLDER/../chapters.sqlite" ]; then
     echo -e "${RED}❌ Không tìm thấy file .txt nào trong thư mục: $FOLDER${NC}"
     exit 1
 fi
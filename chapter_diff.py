@@ -0,0 +1,93 @@
+"""So sánh bản gốc cũ/mới của một chương để chỉ dịch lại phần thay đổi.
+
+Crawler lưu nội dung chương thành một dòng liền (khoảng trắng đã bị gộp),
+nên đơn vị so sánh là câu, tách theo dấu kết thúc câu tiếng Trung. Các đoạn
+thay đổi được gửi đi dịch cùng bản dịch hiện có; AI trả về câu dịch cũ cần
+thay và câu dịch mới, rồi :func:`splice_translation` ghép vào bản dịch.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import List, Optional, Sequence, Tuple
+
+SEGMENT_RE = re.compile(r".+?(?:[。！？!?…]+[”」』’\"]*|\n|$)", re.DOTALL)
+
+# Thay đổi quá tỉ lệ này thì dịch lại cả chương sẽ rẻ và an toàn hơn.
+MAX_PARTIAL_RATIO = 0.5
+
+
+@dataclass
+class ChangedPassage:
+    """Một vùng câu khác nhau giữa hai bản gốc (đã kèm câu ngữ cảnh nếu chỉ là chèn thêm)."""
+
+    old: str
+    new: str
+
+
+def split_segments(body: str) -> List[str]:
+    return [segment.strip() for segment in SEGMENT_RE.findall(body) if segment.strip()]
+
+
+def _hunks(old: Sequence[str], new: Sequence[str]) -> List[Tuple[int, int, int, int]]:
+    hunks: List[Tuple[int, int, int, int]] = []
+    matcher = SequenceMatcher(None, old, new, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        if i1 == i2:
+            # Chèn thuần tuý: mượn một câu không đổi làm mốc để AI tìm được chỗ chèn.
+            if i1 > 0:
+                i1, j1 = i1 - 1, j1 - 1
+            elif i2 < len(old):
+                i2, j2 = i2 + 1, j2 + 1
+        if hunks and i1 <= hunks[-1][1]:
+            prev = hunks.pop()
+            i1, j1 = prev[0], prev[2]
+        hunks.append((i1, i2, j1, j2))
+    return hunks
+
+
+def changed_ratio(old_body: str, new_body: str) -> float:
+    """Tỉ lệ câu bị thay đổi (0 là giống hệt, 1 là khác hoàn toàn)."""
+    old, new = split_segments(old_body), split_segments(new_body)
+    if not old and not new:
+        return 0.0
+    return 1.0 - SequenceMatcher(None, old, new, autojunk=False).ratio()
+
+
+def diff_passages(old_body: str, new_body: str) -> List[ChangedPassage]:
+    old, new = split_segments(old_body), split_segments(new_body)
+    return [
+        ChangedPassage(old="".join(old[i1:i2]), new="".join(new[j1:j2]))
+        for i1, i2, j1, j2 in _hunks(old, new)
+    ]
+
+
+def splice_translation(
+    translation: str,
+    replacements: Sequence[Tuple[str, str]],
+) -> Optional[str]:
+    """Thay từng đoạn dịch cũ bằng đoạn dịch mới.
+
+    Trả về None nếu có đoạn cũ không tìm thấy hoặc xuất hiện nhiều lần; khi đó
+    nên dịch lại cả chương thay vì đoán vị trí.
+    """
+    for old, new in replacements:
+        old = old.strip()
+        if not old or translation.count(old) != 1:
+            return None
+        translation = translation.replace(old, new.strip(), 1)
+    return translation
+
+
+__all__ = [
+    "ChangedPassage",
+    "MAX_PARTIAL_RATIO",
+    "changed_ratio",
+    "diff_passages",
+    "split_segments",
+    "splice_translation",
+]
@@ -0,0 +1,320 @@
+"""Lưu chương gốc/bản dịch của một bộ truyện trong một file SQLite nén thay cho hàng nghìn file .txt.
+
+Bộ truyện nào có ``<novel_root>/chapters.sqlite`` thì mọi thao tác đọc/ghi qua
+các hàm ở đây (:func:`read_text`, :func:`write_text`, :func:`list_texts`...)
+được chuyển vào file đó; bộ truyện chưa đóng gói vẫn dùng file thường. Đường
+dẫn vẫn giữ dạng ``<novel_root>/goc/<file>.txt`` nên database và code gọi
+không cần biết chương nằm ở đâu.
+
+Dùng từ dòng lệnh:
+    python chapter_store.py pack truyen/<slug> [--remove-files]
+    python chapter_store.py export truyen/<slug>
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sqlite3
+import threading
+from datetime import UTC, datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+import db_migrations
+from page_cache import compress, decompress, default_codec
+
+PACKED_DB_NAME = "chapters.sqlite"
+SECTIONS = ("goc", "dich")
+TEXT_SUFFIX = ".txt"
+
+MIGRATIONS: Tuple[db_migrations.Migration, ...] = (
+    (
+        """
+        CREATE TABLE IF NOT EXISTS texts (
+            section TEXT NOT NULL,
+            name TEXT NOT NULL,
+            codec TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            data BLOB NOT NULL,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (section, name)
+        ) WITHOUT ROWID
+        """,
+    ),
+)
+
+
+class PackedChapterStore:
+    """Một file SQLite cho mỗi bộ truyện; nội dung nén bằng zstd (hoặc gzip nếu thiếu zstandard).
+
+    Dùng chung được giữa các thread; mỗi lần ghi được commit ngay.
+    """
+
+    def __init__(self, path: str, *, codec: Optional[str] = None) -> None:
+        self.path = path
+        self.codec = codec or default_codec()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute("PRAGMA busy_timeout = 30000")
+        db_migrations.migrate(self._conn, MIGRATIONS)
+
+    def read(self, section: str, name: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT codec, data FROM texts WHERE section = ? AND name = ?", (section, name)
+            ).fetchone()
+        if row is None:
+            return None
+        return decompress(row[1], row[0]).decode("utf-8")
+
+    def write(self, section: str, name: str, text: str) -> None:
+        raw = text.encode("utf-8")
+        data = compress(raw, self.codec)
+        updated_at = datetime.now(UTC).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO texts (section, name, codec, size, data, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (section, name, self.codec, len(raw), data, updated_at),
+            )
+            self._conn.commit()
+
+    def sizes(self, section: str) -> Dict[str, int]:
+        """Kích thước (byte, chưa nén) của mỗi chương trong ``section``."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, size FROM texts WHERE section = ? ORDER BY name", (section,)
+            ).fetchall()
+        return {name: size for name, size in rows}
+
+    def size(self, section: str, name: str) -> Optional[int]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size FROM texts WHERE section = ? AND name = ?", (section, name)
+            ).fetchone()
+        return row[0] if row else None
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_STORES: Dict[str, PackedChapterStore] = {}
+# Bộ truyện đã biết là chưa đóng gói, để mỗi lần đọc/ghi chương không phải stat lại chapters.sqlite.
+_UNPACKED: Set[str] = set()
+_STORES_LOCK = threading.Lock()
+
+
+def chapter_filename(chapter_index: int) -> str:
+    """Tên file của chương thứ ``chapter_index`` trong ``goc/`` và ``dich/``."""
+    return f"chuong_{chapter_index:03d}{TEXT_SUFFIX}"
+
+
+def packed_path(novel_root: str) -> str:
+    return os.path.join(novel_root, PACKED_DB_NAME)
+
+
+def packed_store_for(novel_root: str, *, create: bool = False) -> Optional[PackedChapterStore]:
+    """Store đóng gói của bộ truyện, None nếu bộ truyện vẫn dùng file thường.
+
+    Với ``create=True``, store được tạo và các file chương sẵn có được nhập vào.
+    Kết quả "chưa đóng gói" được nhớ tới khi :func:`pack_novel` (hoặc
+    ``create=True``) hay :func:`close_stores` chạy trong cùng tiến trình.
+    """
+    novel_root = os.path.abspath(novel_root)
+    store = _STORES.get(novel_root)
+    if store is not None:
+        return store
+    path = packed_path(novel_root)
+    if not create:
+        if novel_root in _UNPACKED:
+            return None
+        if not os.path.exists(path):
+            with _STORES_LOCK:
+                _UNPACKED.add(novel_root)
+            return None
+    with _STORES_LOCK:
+        _UNPACKED.discard(novel_root)
+        store = _STORES.get(novel_root)
+        if store is None:
+            is_new = not os.path.exists(path)
+            os.makedirs(novel_root, exist_ok=True)
+            store = PackedChapterStore(path)
+            if is_new:
+                _import_files(store, novel_root)
+            _STORES[novel_root] = store
+    return store
+
+
+def close_stores() -> None:
+    with _STORES_LOCK:
+        for store in _STORES.values():
+            store.close()
+        _STORES.clear()
+        _UNPACKED.clear()
+
+
+def _locate(path: str) -> Tuple[Optional[PackedChapterStore], str, str]:
+    folder, name = os.path.split(os.path.abspath(path))
+    novel_root, section = os.path.split(folder)
+    if section not in SECTIONS:
+        return None, section, name
+    return packed_store_for(novel_root), section, name
+
+
+def read_text(path: str) -> str:
+    store, section, name = _locate(path)
+    if store is None:
+        with open(path, "r", encoding="utf-8") as handle:
+            return handle.read()
+    text = store.read(section, name)
+    if text is None:
+        raise FileNotFoundError(path)
+    return text
+
+
+def write_text(path: str, text: str) -> None:
+    store, section, name = _locate(path)
+    if store is None:
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write(text)
+        return
+    store.write(section, name, text)
+
+
+def text_size(path: str) -> int:
+    """Kích thước nội dung chương (byte), 0 nếu chưa có."""
+    store, section, name = _locate(path)
+    if store is None:
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+    return store.size(section, name) or 0
+
+
+def text_exists(path: str) -> bool:
+    store, section, name = _locate(path)
+    if store is None:
+        return os.path.exists(path)
+    return store.size(section, name) is not None
+
+
+def text_sizes(folder: str) -> Optional[Dict[str, int]]:
+    """Kích thước các chương trong ``folder`` theo đường dẫn đầy đủ, None nếu thư mục không đóng gói."""
+    novel_root, section = os.path.split(os.path.abspath(folder))
+    store = packed_store_for(novel_root) if section in SECTIONS else None
+    if store is None:
+        return None
+    return {os.path.join(folder, name): size for name, size in store.sizes(section).items()}
+
+
+def list_texts(folder: str) -> List[str]:
+    """Tên các file chương ``.txt`` trong ``folder`` (đã sắp xếp)."""
+    sizes = text_sizes(folder)
+    if sizes is not None:
+        return sorted(os.path.basename(path) for path in sizes if path.endswith(TEXT_SUFFIX))
+    if not os.path.isdir(folder):
+        return []
+    return [name for name in sorted(os.listdir(folder)) if name.endswith(TEXT_SUFFIX)]
+
+
+def _import_files(store: PackedChapterStore, novel_root: str) -> int:
+    count = 0
+    for section in SECTIONS:
+        folder = os.path.join(novel_root, section)
+        if not os.path.isdir(folder):
+            continue
+        for name in sorted(os.listdir(folder)):
+            if not name.endswith(TEXT_SUFFIX):
+                continue
+            with open(os.path.join(folder, name), "r", encoding="utf-8") as handle:
+                store.write(section, name, handle.read())
+            count += 1
+    return count
+
+
+def pack_novel(novel_root: str, *, remove_files: bool = False) -> int:
+    """Đóng gói các file chương của một bộ truyện; trả về số chương trong store."""
+    store = packed_store_for(novel_root, create=True)
+    assert store is not None
+    if remove_files:
+        for section in SECTIONS:
+            folder = os.path.join(novel_root, section)
+            packed = store.sizes(section)
+            for name in packed:
+                path = os.path.join(folder, name)
+                if os.path.exists(path):
+                    os.remove(path)
+    return sum(len(store.sizes(section)) for section in SECTIONS)
+
+
+def export_novel(novel_root: str, *, remove_store: bool = False) -> int:
+    """Ghi toàn bộ chương trong store ra lại file thường trong ``goc/`` và ``dich/``."""
+    store = packed_store_for(novel_root)
+    if store is None:
+        return 0
+    count = 0
+    for section in SECTIONS:
+        folder = os.path.join(novel_root, section)
+        os.makedirs(folder, exist_ok=True)
+        for name in store.sizes(section):
+            text = store.read(section, name)
+            with open(os.path.join(folder, name), "w", encoding="utf-8") as handle:
+                handle.write(text or "")
+            count += 1
+    if remove_store:
+        with _STORES_LOCK:
+            _STORES.pop(os.path.abspath(novel_root), None)
+            _UNPACKED.discard(os.path.abspath(novel_root))
+        store.close()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(store.path + suffix):
+                os.remove(store.path + suffix)
+    return count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Đóng gói hoặc xuất lại chương của một bộ truyện.")
+    parser.add_argument("action", choices=("pack", "export"))
+    parser.add_argument("novel_roots", nargs="+", help="Thư mục bộ truyện, ví dụ truyen/<slug>")
+    parser.add_argument(
+        "--remove-files",
+        action="store_true",
+        help="pack: xoá file .txt sau khi đóng gói; export: xoá chapters.sqlite sau khi xuất.",
+    )
+    args = parser.parse_args()
+
+    for novel_root in args.novel_roots:
+        if args.action == "pack":
+            count = pack_novel(novel_root, remove_files=args.remove_files)
+            print(f"[✓] {novel_root}: đã đóng gói {count} chương vào {PACKED_DB_NAME}.")
+        else:
+            count = export_novel(novel_root, remove_store=args.remove_files)
+            print(f"[✓] {novel_root}: đã xuất {count} chương ra file thường.")
+    close_stores()
+
+
+__all__ = [
+    "PACKED_DB_NAME",
+    "PackedChapterStore",
+    "chapter_filename",
+    "close_stores",
+    "export_novel",
+    "list_texts",
+    "pack_novel",
+    "packed_store_for",
+    "read_text",
+    "text_exists",
+    "text_size",
+    "text_sizes",
+    "write_text",
+]
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,6 @@
 from typing import Dict, Iterable, List, Sequence, Tuple
 
-from story_db import (
-    fetch_glossary,
-    fetch_metadata,
-    fetch_relationships,
-    list_glossary_entries,
-)
+from story_db import StorySnapshot, StoryStore, load_snapshot
 
 
 def _is_meaningful(value: str) -> bool:
@@ -66,14 +61,20 @@ def _deduplicate_preserve_order(items: Iterable[int]) -> List[int]:
     return ordered
 
 
-def detect_relevant_characters(conn, chapter_text: str) -> List[int]:
+def _snapshot(source) -> StorySnapshot:
+    # StoryStore giữ sẵn bản sao trong bộ nhớ; kết nối thường thì đọc mới mỗi lần.
+    if isinstance(source, StoryStore):
+        return source.snapshot()
+    return load_snapshot(source)
+
+
+def _match_glossary(glossary_rows: Sequence, chapter_text: str) -> List[int]:
     normalized_text = chapter_text or ""
     if not normalized_text.strip():
         return []
-    rows = list_glossary_entries(conn)
     matches: List[int] = []
     lowercase_text = normalized_text.lower()
-    for row in rows:
+    for row in glossary_rows:
         original = (row["original_name"] or "").strip()
         vietnamese = (row["vietnamese_name"] or "").strip()
         if original and _is_meaningful(original) and original in normalized_text:
@@ -84,26 +85,32 @@ def detect_relevant_characters(conn, chapter_text: str) -> List[int]:
     return _deduplicate_preserve_order(matches)
 
 
-def build_context_sections(conn, chapter_text: str) -> Tuple[str, str, str]:
-    metadata = fetch_metadata(conn)
-    relevant_ids = detect_relevant_characters(conn, chapter_text)
+def detect_relevant_characters(source, chapter_text: str) -> List[int]:
+    if not (chapter_text or "").strip():
+        return []
+    return _match_glossary(_snapshot(source).glossary, chapter_text)
+
+
+def build_context_sections(source, chapter_text: str) -> Tuple[str, str, str]:
+    """``source`` là kết nối story_db hoặc một :class:`StoryStore` (dùng bản cache)."""
+    snapshot = _snapshot(source)
+    relevant_ids = set(_match_glossary(snapshot.glossary, chapter_text))
     if relevant_ids:
-        glossary_rows = fetch_glossary(conn, ids=relevant_ids)
-        vn_names = [
+        glossary_rows = [row for row in snapshot.glossary if row["id"] in relevant_ids]
+        vn_name_set = {
             row["vietnamese_name"]
             for row in glossary_rows
             if row["vietnamese_name"] and _is_meaningful(row["vietnamese_name"])
-        ]
-        vn_name_set = {name for name in vn_names if name}
+        }
         relationships_rows = [
             row
-            for row in fetch_relationships(conn, involved_vn_names=vn_names)
+            for row in snapshot.relationships
             if row["char1_vn_name"] in vn_name_set and row["char2_vn_name"] in vn_name_set
         ]
     else:
-        glossary_rows = fetch_glossary(conn)
-        relationships_rows = fetch_relationships(conn)
-    metadata_section = _format_metadata(metadata)
+        glossary_rows = snapshot.glossary
+        relationships_rows = snapshot.relationships
+    metadata_section = _format_metadata(snapshot.metadata)
     glossary_section = _format_glossary_rows(glossary_rows)
     relationships_section = _format_relationship_rows(relationships_rows)
     return metadata_section, glossary_section, relationships_section
@@ -2,26 +2,56 @@
 # -*- coding: utf-8 -*-
 
 import argparse
-import hashlib
-from datetime import UTC, datetime
+from datetime import UTC, datetime, timedelta
 import sqlite3
 import os
 import random
 import re
 import subprocess
 import sys
+import threading
 import time
 import logging
-from dataclasses import dataclass
-from typing import Dict, Iterable, List, Optional, Sequence, Tuple
-from urllib.parse import urljoin
+import itertools
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait as wait_futures,
+)
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 import requests
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 
+import chapter_store
 import novel_db
-
-BASE = "https://uukanshu.cc"
+import scheduler
+from page_cache import PageCache, load_page
+from site_adapters import (
+    DEFAULT_ADAPTER,
+    BookData,
+    ChapterLink,
+    PAGE_SUFFIX_RE,
+    ChapterPage,
+    adapter_for,
+    normalise_encoding,
+    sniff_meta_charset,
+)
+from crawl_throttle import (
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MIN_GAP,
+    AimdThrottle,
+    HostThrottle,
+    host_of,
+    parse_retry_after,
+)
+
+BASE = DEFAULT_ADAPTER.base_url
 
 UA_POOL = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
@@ -30,50 +60,125 @@ UA_POOL = [
     "Mozilla/5.0 (Linux; Android 14; Pixel 7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Mobile Safari/537.36",
 ]
 
-CONTENT_SELECTORS = [
-    "#content",
-    "#content1",
-    "#BookText",
-    "#BookContent",
-    "#booktxt",
-    "#chaptercontent",
-    ".bookcontent",
-    ".read-content",
-    ".readcotent",
-    ".content-body",
-    "article",
-]
-
 CHINESE_RE = re.compile(r"[\u4e00-\u9fff]")
 
-INDEX_LINK_SELECTOR = ".chapterlist a[href$='.html'], #list-chapterAll a[href$='.html']"
-
 MIN_TEXT_LENGTH = 400
 
+META_TAG_RE = re.compile(r"<meta\b[^>]*>", re.IGNORECASE)
+META_ATTR_RE = re.compile(r"""([\w:-]+)\s*=\s*(?:"([^"]*)"|'([^']*)')""")
+
+DEFAULT_WORKERS = 4
+
+DEFAULT_NOVEL_WORKERS = 2
+
+# --watch ngủ ít nhất chừng này giữa hai vòng, kể cả khi có truyện đã quá hạn.
+MIN_WATCH_SLEEP = 60.0
+
+MAX_CHAPTER_PAGES = 50
+
+CachedPageRef = Tuple[str, str, str, Optional[str]]
+
+DownloadResult = Tuple[str, str, str]
+
 logging.basicConfig(level=logging.WARNING, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
 
 @dataclass
-class ChapterLink:
-    index: int
-    title: str
+class IndexPage:
+    url: str
+    html: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+
+@dataclass
+class CrawlOptions:
+    """Cấu hình engine tải chương dùng chung cho mọi truyện trong một lần chạy."""
+
+    workers: int = 1
+    novel_workers: int = 1
+    # Số chương tối đa đang tải mà chưa được ghi vào database (mặc định 2 * workers).
+    # Với --pipeline, giới hạn này giữ crawler không tải vượt quá xa luồng dịch.
+    max_in_flight: int = 0
+    commit_every: int = novel_db.DEFAULT_COMMIT_EVERY
+    commit_interval: float = novel_db.DEFAULT_COMMIT_INTERVAL
+    throttle: HostThrottle = field(
+        default_factory=lambda: HostThrottle(max_concurrency=1, min_gap=0.8)
+    )
+    verify_files: bool = False
+    # Lưu chương vào chapters.sqlite của bộ truyện thay cho file .txt rời.
+    packed: bool = False
+    page_cache: Optional[PageCache] = None
+    # Gọi (novel_root, file_path) ngay sau khi một chương được ghi vào database.
+    on_chapter_recorded: Optional[Callable[[str, str], None]] = None
+    # Gọi (novel_root) khi đã quét xong một bộ truyện.
+    on_novel_synced: Optional[Callable[[str], None]] = None
+
+
+@dataclass
+class ReextractJob:
+    chapter_id: int
     url: str
+    cache_root: str
+    digest: str
+    codec: str
+    encoding: Optional[str]
+    file_path: str
+    fallback_title: str
+    min_length: int
+    extra_pages: List[CachedPageRef] = field(default_factory=list)
 
 
 @dataclass
-class BookData:
-    title: str
-    author: Optional[str]
-    description: Optional[str]
-    cover_url: Optional[str]
-    status: Optional[str]
-    latest_chapter_name: Optional[str]
-    latest_chapter_url: Optional[str]
-    chapters: List[ChapterLink]
-
-
-def make_session() -> requests.Session:
+class ReextractResult:
+    chapter_id: int
+    file_path: str
+    title: Optional[str] = None
+    content_hash: Optional[str] = None
+    file_size: int = 0
+    error: Optional[str] = None
+
+
+class EncodingCache:
+    """Chọn encoding cho response: header, rồi ``<meta charset>``, rồi kết quả đã dò cho host.
+
+    Chỉ khi cả ba đều không có mới chạy ``apparent_encoding`` (dò trên toàn bộ
+    nội dung) và ghi nhớ kết quả cho host đó.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._by_host: Dict[str, str] = {}
+
+    def resolve(self, response: requests.Response) -> str:
+        content_type = response.headers.get("Content-Type", "")
+        if "charset=" in content_type.lower():
+            declared = normalise_encoding(response.encoding)
+            if declared:
+                return declared
+        sniffed = sniff_meta_charset(response.content)
+        if sniffed:
+            return sniffed
+        host = host_of(response.url or "")
+        with self._lock:
+            cached = self._by_host.get(host)
+        if cached:
+            return cached
+        detected = normalise_encoding(response.apparent_encoding) or "utf-8"
+        with self._lock:
+            self._by_host[host] = detected
+        return detected
+
+
+ENCODING_CACHE = EncodingCache()
+
+
+def make_session(pool_size: int = 10) -> requests.Session:
+    """Tạo session dùng chung cho mọi thread; pool kết nối keep-alive đủ lớn cho số luồng tải."""
     session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
     session.headers.update(
         {
             "User-Agent": random.choice(UA_POOL),
@@ -87,21 +192,110 @@ def make_session() -> requests.Session:
     return session
 
 
-def get_soup(session: requests.Session, url: str, tries: int = 3) -> BeautifulSoup:
+def throttled_get(
+    session: requests.Session,
+    url: str,
+    *,
+    timeout: float,
+    throttle: Optional[HostThrottle] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> requests.Response:
+    if throttle is None:
+        return session.get(url, timeout=timeout, headers=headers)
+    with throttle.slot(url):
+        started = time.monotonic()
+        try:
+            response = session.get(url, timeout=timeout, headers=headers)
+        except requests.RequestException:
+            throttle.record(url, ok=False, elapsed=time.monotonic() - started)
+            raise
+    throttle.record(
+        url,
+        ok=response.status_code < 400,
+        elapsed=time.monotonic() - started,
+        status=response.status_code,
+        retry_after=parse_retry_after(response.headers.get("Retry-After")),
+    )
+    return response
+
+
+def fetch_html(
+    session: requests.Session,
+    url: str,
+    tries: int = 3,
+    throttle: Optional[HostThrottle] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> requests.Response:
+    """Tải một trang HTML. Với request có điều kiện, response 304 được trả về nguyên trạng."""
     last_response = None
     for attempt in range(tries):
-        response = session.get(url, timeout=30)
+        response = throttled_get(session, url, timeout=30, throttle=throttle, headers=headers)
         last_response = response
+        if response.status_code == 304 and headers:
+            return response
         if response.status_code == 200 and "text/html" in response.headers.get("Content-Type", ""):
-            response.encoding = response.apparent_encoding or "utf-8"
-            return BeautifulSoup(response.text, "lxml")
-        sleep_for = 1.0 + attempt * 1.2 + random.random()
-        time.sleep(sleep_for)
+            response.encoding = ENCODING_CACHE.resolve(response)
+            return response
+        if attempt < tries - 1:
+            # Throttle chỉ giãn nhịp giữa các request; lần thử lại vẫn cần nghỉ riêng.
+            sleep_for = 1.0 + attempt * 1.2 + random.random()
+            time.sleep(sleep_for)
     raise RuntimeError(
         f"Fetch fail {url} (status={getattr(last_response, 'status_code', None)})"
     )
 
 
+def get_soup(
+    session: requests.Session,
+    url: str,
+    tries: int = 3,
+    throttle: Optional[HostThrottle] = None,
+) -> BeautifulSoup:
+    return BeautifulSoup(fetch_html(session, url, tries, throttle).text, "lxml")
+
+
+def fetch_index_page(
+    session: requests.Session,
+    url: str,
+    *,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    throttle: Optional[HostThrottle] = None,
+    page_cache: Optional[PageCache] = None,
+) -> Optional[IndexPage]:
+    """Tải trang mục lục, gửi If-None-Match/If-Modified-Since nếu có. Trả về None khi server báo 304."""
+    headers: Dict[str, str] = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    response = fetch_html(session, url, throttle=throttle, headers=headers or None)
+    if response.status_code == 304:
+        return None
+    if page_cache is not None:
+        page_cache.store(url, response.content, response.encoding)
+    return IndexPage(
+        url=url,
+        html=response.text,
+        etag=response.headers.get("ETag"),
+        last_modified=response.headers.get("Last-Modified"),
+    )
+
+
+def sniff_meta_property(html: str, name: str) -> Optional[str]:
+    """Đọc nhanh một thẻ <meta property=...> trong phần <head> mà không dựng cây HTML."""
+    head_end = html.find("</head>")
+    head = html if head_end < 0 else html[:head_end]
+    for tag in META_TAG_RE.finditer(head):
+        attrs = {
+            key.lower(): double or single
+            for key, double, single in META_ATTR_RE.findall(tag.group(0))
+        }
+        if attrs.get("property") == name and attrs.get("content"):
+            return attrs["content"].strip()
+    return None
+
+
 def clean_text(text: str) -> str:
     lines = [re.sub(r"\s+", " ", line).strip() for line in text.splitlines()]
     kept: List[str] = []
@@ -140,46 +334,90 @@ def clean_text(text: str) -> str:
     return cleaned + ("\n" if cleaned else "")
 
 
-def extract_chapter(url, session, max_retries=3):
+def parse_chapter_html(
+    content: bytes,
+    encoding: Optional[str] = None,
+    url: Optional[str] = None,
+) -> Tuple[str, Optional[str]]:
+    """Tách tiêu đề và nội dung chương bằng adapter của nguồn tương ứng.
+
+    Trả về ``(title, body)``; ``body`` là None khi không tìm thấy khối nội dung.
+    """
+    page = adapter_for(url).parse_chapter(content, encoding, url or "")
+    return page.title, page.body
+
+
+def fetch_chapter_page(
+    session: requests.Session,
+    url: str,
+    *,
+    throttle: Optional[HostThrottle] = None,
+    page_cache: Optional[PageCache] = None,
+) -> ChapterPage:
+    response = throttled_get(session, url, timeout=10, throttle=throttle)
+    response.raise_for_status()
+    encoding = ENCODING_CACHE.resolve(response)
+    if page_cache is not None:
+        page_cache.store(url, response.content, encoding)
+    return adapter_for(url).parse_chapter(response.content, encoding, url)
+
+
+def assemble_chapter_pages(
+    url: str,
+    first: ChapterPage,
+    load: Callable[[str], ChapterPage],
+    workers: int = 1,
+) -> str:
+    """Ghép nội dung một chương bị chia trang (``_2.html``, ``_3.html``...) theo đúng thứ tự.
+
+    Các trang tiếp theo được ``load`` song song; trang nào lại lộ thêm link mới
+    thì tải tiếp ở lượt sau.
+    """
+    pages: Dict[str, ChapterPage] = {url: first}
+    pending = list(first.extra_pages)
+    while pending:
+        if len(pages) + len(pending) > MAX_CHAPTER_PAGES:
+            raise RuntimeError(f"Chương {url} có quá nhiều trang (> {MAX_CHAPTER_PAGES}).")
+        if workers > 1 and len(pending) > 1:
+            with ThreadPoolExecutor(max_workers=min(workers, len(pending))) as executor:
+                loaded = list(executor.map(load, pending))
+        else:
+            loaded = [load(page_url) for page_url in pending]
+        pages.update(zip(pending, loaded))
+        discovered: List[str] = []
+        for page in loaded:
+            for page_url in page.extra_pages:
+                if page_url not in pages and page_url not in discovered:
+                    discovered.append(page_url)
+        pending = discovered
+
+    adapter = adapter_for(url)
+    bodies: List[str] = []
+    for page_url in sorted(pages, key=adapter.page_number):
+        body = pages[page_url].body
+        if body is None:
+            raise RuntimeError(f"Không tìm thấy nội dung ở trang {page_url}")
+        if body:
+            bodies.append(body)
+    return " ".join(bodies)
+
+
+def extract_chapter(url, session, max_retries=3, throttle=None, page_cache=None):
     for attempt in range(max_retries):
         try:
-            response = session.get(url, timeout=10)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extract title
-            title_selectors = ['h1', '.chapter-title', '.bookname', 'title']
-            title = ""
-            for sel in title_selectors:
-                tag = soup.select_one(sel)
-                if tag:
-                    title = tag.get_text(strip=True)
-                    break
-            if not title:
-                title = "Chương không tiêu đề"
-            
-            # Try multiple selectors for content
-            selectors = ['.readcotent', '.content', '#content', '.chapter-content']
-            node = None
-            for selector in selectors:
-                node = soup.select_one(selector)
-                if node:
-                    break
-            
-            if not node:
+            first = fetch_chapter_page(session, url, throttle=throttle, page_cache=page_cache)
+            if first.body is None:
                 logger.warning(f"No content node found for {url}")
                 return "", ""
-            
-            # Decompose unwanted tags
-            for tag in node.find_all(['script', 'style', 'noscript', 'iframe']):
-                tag.decompose()
-            
-            # Extract text directly
-            raw = node.get_text(" ", strip=True)
-            
-            # Clean up extra spaces
-            cleaned = re.sub(r'\s+', ' ', raw).strip()
-            return title, cleaned
+            cleaned = assemble_chapter_pages(
+                url,
+                first,
+                lambda page_url: fetch_chapter_page(
+                    session, page_url, throttle=throttle, page_cache=page_cache
+                ),
+                workers=len(first.extra_pages),
+            )
+            return first.title, cleaned
         except Exception as e:
             logger.warning(f"Attempt {attempt + 1} failed for {url}: {e}")
             if attempt < max_retries - 1:
@@ -206,76 +444,19 @@ def slugify_title(value: str, fallback: str) -> str:
 
 
 def _absolute_index_url(url: str) -> str:
-    if url.endswith("/"):
-        return url
-    match = re.search(r"(https?://[^/]+/book/\d+)/", url)
-    if match:
-        return match.group(1) + "/"
-    return url
-
-
-def parse_book_metadata(soup: BeautifulSoup) -> Dict[str, Optional[str]]:
-    def meta_property(name: str) -> Optional[str]:
-        tag = soup.find("meta", {"property": name})
-        if tag and tag.get("content"):
-            return tag.get("content").strip()
-        return None
+    return adapter_for(url).normalise_index_url(url)
 
-    book_title = meta_property("og:novel:book_name")
-    if not book_title:
-        h1 = soup.select_one("h1, .booktitle, .book-info h1")
-        if h1:
-            book_title = h1.get_text(strip=True)
-        else:
-            book_title = "uukanshu_book"
-
-    return {
-        "title": book_title,
-        "author": meta_property("og:novel:author"),
-        "description": meta_property("og:description") or meta_property("description"),
-        "cover_url": meta_property("og:image"),
-        "status": meta_property("og:novel:status"),
-        "latest_name": meta_property("og:novel:latest_chapter_name"),
-        "latest_url": meta_property("og:novel:latest_chapter_url"),
-    }
-
-
-def scrape_book(session: requests.Session, index_url: str) -> BookData:
-    soup = get_soup(session, index_url)
-    meta = parse_book_metadata(soup)
-    links = []
-    for anchor in soup.select(INDEX_LINK_SELECTOR):
-        href = anchor.get("href")
-        if not href:
-            continue
-        full_url = urljoin(index_url, href)
-        if "/book/" not in full_url or not full_url.endswith(".html"):
-            continue
-        title = anchor.get_text(strip=True) or ""
-        links.append((title, full_url))
 
-    seen: Dict[str, ChapterLink] = {}
-    ordered: List[ChapterLink] = []
-    for idx, (title, link_url) in enumerate(links, start=1):
-        if link_url in seen:
-            continue
-        chapter_link = ChapterLink(index=idx, title=title or f"Chương {idx}", url=link_url)
-        seen[link_url] = chapter_link
-        ordered.append(chapter_link)
+def scrape_book(
+    session: requests.Session,
+    index_url: str,
+    throttle: Optional[HostThrottle] = None,
+) -> BookData:
+    return parse_book_page(get_soup(session, index_url, throttle=throttle), index_url)
 
-    if not ordered:
-        raise RuntimeError("Không tìm thấy link chương. Có thể cấu trúc trang đã thay đổi.")
 
-    return BookData(
-        title=meta["title"],
-        author=meta["author"],
-        description=meta["description"],
-        cover_url=meta["cover_url"],
-        status=meta["status"],
-        latest_chapter_name=meta["latest_name"],
-        latest_chapter_url=meta["latest_url"],
-        chapters=ordered,
-    )
+def parse_book_page(soup: BeautifulSoup, index_url: str) -> BookData:
+    return adapter_for(index_url).parse_index(soup, index_url)
 
 
 def ensure_directories(root_folder: str, slug: str) -> Tuple[str, str, str]:
@@ -301,14 +482,11 @@ def resolve_unique_slug(conn: sqlite3.Connection, base_slug: str, index_url: str
 
 
 def make_chapter_filename(chapter_index: int) -> str:
-    return f"chuong_{chapter_index:03d}.txt"
+    return chapter_store.chapter_filename(chapter_index)
 
 
 def write_chapter_file(path: str, title: str, body: str) -> None:
-    with open(path, "w", encoding="utf-8") as handle:
-        handle.write(title.strip() or "(Không tiêu đề)\n")
-        handle.write("-" * 80 + "\n\n")
-        handle.write(body)
+    chapter_store.write_text(path, (title.strip() or "(Không tiêu đề)\n") + "-" * 80 + "\n\n" + body)
 
 
 def write_index_file(path: str, chapters: Sequence[ChapterLink]) -> None:
@@ -329,10 +507,17 @@ def load_input_urls(path: str) -> List[str]:
     return urls
 
 
-def summarise_new_chapters(downloaded: Dict[str, int]) -> str:
+def summarise_new_chapters(
+    downloaded: Dict[str, int],
+    durations: Optional[Dict[str, float]] = None,
+) -> str:
     if not downloaded:
         return "Không có chương mới."
-    pairs = [f"{slug}: +{count}" for slug, count in sorted(downloaded.items())]
+    durations = durations or {}
+    pairs = [
+        f"{slug}: +{count}" + (f" ({durations[slug]:.1f}s)" if slug in durations else "")
+        for slug, count in sorted(downloaded.items())
+    ]
     return ", ".join(pairs)
 
 
@@ -341,53 +526,381 @@ def download_chapter(
     chapter: ChapterLink,
     goc_folder: str,
     min_length: int,
-) -> Tuple[str, str, str]:
-    title, body = extract_chapter(chapter.url, session)
+    throttle: Optional[HostThrottle] = None,
+    page_cache: Optional[PageCache] = None,
+) -> DownloadResult:
+    title, body = extract_chapter(chapter.url, session, throttle=throttle, page_cache=page_cache)
     final_title = title or chapter.title
     if len(body.strip()) < min_length:
+        if throttle is not None:
+            throttle.record_rejected(chapter.url)
         raise RuntimeError(
             f"Chương '{final_title}' ({chapter.url}) có nội dung quá ngắn ({len(body.strip())} ký tự)."
         )
     filename = make_chapter_filename(chapter.index)
     output_path = os.path.join(goc_folder, filename)
     write_chapter_file(output_path, final_title, body)
-    content_hash = hashlib.sha1(body.encode("utf-8")).hexdigest()
+    content_hash = novel_db.hash_chapter_body(body)
     return output_path, content_hash, final_title
 
 
+def download_chapter_with_retries(
+    session: requests.Session,
+    chapter: ChapterLink,
+    goc_folder: str,
+    min_length: int,
+    throttle: Optional[HostThrottle] = None,
+    attempts: int = 3,
+    page_cache: Optional[PageCache] = None,
+) -> DownloadResult:
+    last_error: Optional[Exception] = None
+    for attempt in range(1, attempts + 1):
+        try:
+            return download_chapter(
+                session, chapter, goc_folder, min_length, throttle, page_cache=page_cache
+            )
+        except Exception as exc:  # noqa: BLE001
+            last_error = exc
+            print(
+                f"    -> Lỗi khi tải chương {chapter.index} ({chapter.url}): {exc}."
+            )
+            if attempt < attempts:
+                time.sleep(1.5 * attempt)
+    assert last_error is not None
+    raise last_error
+
+
+def download_chapters(
+    session: requests.Session,
+    chapters: Iterable[ChapterLink],
+    goc_folder: str,
+    min_length: int,
+    options: CrawlOptions,
+) -> Iterator[Tuple[ChapterLink, Optional[DownloadResult], Optional[Exception]]]:
+    """Tải song song các chương, trả kết quả theo thứ tự hoàn thành.
+
+    Chỉ phần tải và ghi file chạy trong thread pool; việc ghi database do
+    luồng gọi hàm này đảm nhận để SQLite chỉ có một writer. Chương mới chỉ
+    được đưa vào pool khi số chương đang tải chưa được xử lý nhỏ hơn
+    ``options.max_in_flight``, nên luồng gọi chậm lại (ví dụ pipeline dịch
+    đầy hàng đợi) thì việc tải cũng dừng theo.
+    """
+    workers = max(1, options.workers)
+    window = max(workers, options.max_in_flight or 2 * workers)
+    remaining = iter(chapters)
+    in_flight: Dict[Future, ChapterLink] = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+
+        def refill() -> None:
+            for chapter in itertools.islice(remaining, max(0, window - len(in_flight))):
+                future = executor.submit(
+                    download_chapter_with_retries,
+                    session,
+                    chapter,
+                    goc_folder,
+                    min_length,
+                    options.throttle,
+                    page_cache=options.page_cache,
+                )
+                in_flight[future] = chapter
+
+        refill()
+        while in_flight:
+            done, _ = wait_futures(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                chapter = in_flight.pop(future)
+                error = future.exception()
+                if error is None:
+                    yield chapter, future.result(), None
+                else:
+                    yield chapter, None, error
+                refill()
+
+
+def scan_file_sizes(folders: Iterable[str], workers: int = DEFAULT_WORKERS) -> Dict[str, int]:
+    """Liệt kê kích thước file trong các thư mục bằng ``os.scandir`` song song.
+
+    Thư mục của bộ truyện đã đóng gói (xem :mod:`chapter_store`) được đọc từ store.
+    """
+
+    def scan(folder: str) -> Dict[str, int]:
+        packed = chapter_store.text_sizes(folder)
+        if packed is not None:
+            return packed
+        sizes: Dict[str, int] = {}
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        sizes[os.path.join(folder, entry.name)] = entry.stat().st_size
+        except FileNotFoundError:
+            pass
+        return sizes
+
+    unique = sorted({os.path.normpath(folder) for folder in folders if folder})
+    found: Dict[str, int] = {}
+    if not unique:
+        return found
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(unique)))) as executor:
+        for sizes in executor.map(scan, unique):
+            found.update(sizes)
+    return found
+
+
+def _stored_file_ok(row: sqlite3.Row, disk_sizes: Optional[Dict[str, int]]) -> bool:
+    file_path = row["file_path"]
+    if not file_path:
+        return False
+    if disk_sizes is not None:
+        return disk_sizes.get(os.path.normpath(file_path), 0) > 0
+    if row["file_size"] is not None:
+        return int(row["file_size"]) > 0
+    # Bản ghi cũ chưa có file_size: đành kiểm tra trực tiếp trên đĩa.
+    return chapter_store.text_size(file_path) > 0
+
+
 def determine_new_chapters(
     existing_map: Dict[int, sqlite3.Row],
     chapters: Sequence[ChapterLink],
+    disk_sizes: Optional[Dict[str, int]] = None,
 ) -> Iterable[ChapterLink]:
-    existing_urls = {
-        row["source_url"]
-        for row in existing_map.values()
-        if isinstance(row, sqlite3.Row) and row["source_url"]
-    }
+    """Chọn các chương cần tải dựa trên database.
+
+    Mặc định tin vào ``file_size`` đã ghi trong bảng ``chapters``; truyền
+    ``disk_sizes`` (kết quả của :func:`scan_file_sizes`) để đối chiếu với đĩa.
+    """
+    url_ok: Dict[str, bool] = {}
+    index_ok: Dict[int, bool] = {}
+    for chapter_index, row in existing_map.items():
+        ok = _stored_file_ok(row, disk_sizes)
+        index_ok[chapter_index] = ok
+        source_url = row["source_url"]
+        if source_url:
+            url_ok[source_url] = url_ok.get(source_url, True) and ok
+
     for chapter in chapters:
         existing_entry = existing_map.get(chapter.index)
-        if existing_entry:
-            stored_url = existing_entry["source_url"]
-            file_path = existing_entry["file_path"]
-            if (
-                stored_url == chapter.url
-                and file_path
-                and os.path.exists(file_path)
-                and os.path.getsize(file_path) > 0
-            ):
-                continue
-        if chapter.url in existing_urls:
-            match_rows = [row for row in existing_map.values() if row["source_url"] == chapter.url]
-            if match_rows and all(
-                row["file_path"]
-                and os.path.exists(row["file_path"])
-                and os.path.getsize(row["file_path"]) > 0
-                for row in match_rows
-            ):
-                continue
+        if existing_entry and existing_entry["source_url"] == chapter.url and index_ok[chapter.index]:
+            continue
+        if url_ok.get(chapter.url):
+            continue
         yield chapter
 
 
+def flush_page_cache(conn, page_cache: Optional[PageCache]) -> None:
+    """Ghi các trang vừa lưu vào page cache xuống bảng ``pages`` (chỉ gọi từ luồng chính)."""
+    if page_cache is None:
+        return
+    novel_db.record_pages(
+        conn,
+        ((page.url, page.digest, page.codec, page.encoding) for page in page_cache.take_pending()),
+    )
+
+
+def reextract_chapter(job: ReextractJob) -> ReextractResult:
+    """Tách lại một chương từ HTML đã lưu và ghi đè file trong goc/. Chạy trong process pool."""
+    try:
+        adapter = adapter_for(job.url)
+        content = load_page(job.cache_root, job.digest, job.codec)
+        first = adapter.parse_chapter(content, job.encoding, job.url)
+        title, body = first.title, first.body
+        if body is not None and first.extra_pages:
+            cached = {url: (digest, codec, encoding) for url, digest, codec, encoding in job.extra_pages}
+
+            def load(page_url: str) -> ChapterPage:
+                if page_url not in cached:
+                    raise RuntimeError(f"Trang {page_url} chưa có trong page cache")
+                digest, codec, encoding = cached[page_url]
+                return adapter.parse_chapter(
+                    load_page(job.cache_root, digest, codec), encoding, page_url
+                )
+
+            body = assemble_chapter_pages(job.url, first, load)
+        if body is None or len(body.strip()) < job.min_length:
+            length = len(body.strip()) if body else 0
+            return ReextractResult(
+                job.chapter_id, job.file_path, error=f"nội dung quá ngắn ({length} ký tự)"
+            )
+        final_title = title or job.fallback_title
+        os.makedirs(os.path.dirname(job.file_path) or ".", exist_ok=True)
+        write_chapter_file(job.file_path, final_title, body)
+        return ReextractResult(
+            job.chapter_id,
+            job.file_path,
+            title=final_title,
+            content_hash=novel_db.hash_chapter_body(body),
+            file_size=chapter_store.text_size(job.file_path),
+        )
+    except Exception as exc:  # noqa: BLE001
+        return ReextractResult(job.chapter_id, job.file_path, error=str(exc))
+
+
+def reextract_from_cache(
+    conn,
+    page_cache: PageCache,
+    *,
+    min_length: int,
+    workers: int = DEFAULT_WORKERS,
+) -> Tuple[int, int]:
+    """Tạo lại mọi file goc/*.txt từ page cache, không gửi request nào. Trả về (thành công, lỗi)."""
+    follow_ups: Dict[str, List[CachedPageRef]] = {}
+    for row in novel_db.fetch_pages(conn, "%\\_%.html"):
+        match = PAGE_SUFFIX_RE.match(row["url"])
+        if match and match.group("page"):
+            follow_ups.setdefault(match.group("stem"), []).append(
+                (row["url"], row["digest"], row["codec"], row["encoding"])
+            )
+
+    def extra_pages_for(url: str) -> List[CachedPageRef]:
+        match = PAGE_SUFFIX_RE.match(url)
+        return follow_ups.get(match.group("stem"), []) if match else []
+
+    jobs = [
+        ReextractJob(
+            chapter_id=int(row["id"]),
+            url=row["source_url"],
+            cache_root=page_cache.root,
+            digest=row["digest"],
+            codec=row["codec"],
+            encoding=row["encoding"],
+            file_path=row["file_path"],
+            fallback_title=row["title"] or f"Chương {row['chapter_index']}",
+            min_length=min_length,
+            extra_pages=extra_pages_for(row["source_url"]),
+        )
+        for row in novel_db.fetch_cached_chapters(conn)
+    ]
+    rewritten = failed = 0
+    if not jobs:
+        return rewritten, failed
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as executor:
+        for result in executor.map(reextract_chapter, jobs, chunksize=16):
+            if result.error:
+                failed += 1
+                print(f"[!] Không tách lại được {result.file_path}: {result.error}")
+                continue
+            novel_db.update_chapter_content(
+                conn,
+                result.chapter_id,
+                title=result.title or "",
+                content_hash=result.content_hash or "",
+                file_size=result.file_size,
+            )
+            rewritten += 1
+    return rewritten, failed
+
+
+def prune_page_cache(conn, page_cache: PageCache) -> Tuple[int, int, int]:
+    """Dọn page cache, chỉ giữ những trang ``--reextract`` cần tới.
+
+    Ánh xạ của trang mục lục và chương không còn trong database bị xoá khỏi bảng
+    ``pages``; sau đó mọi file không còn ánh xạ nào trỏ tới (kể cả bản cũ của
+    trang đã tải lại) bị xoá khỏi đĩa. Trả về (số ánh xạ, số file, số byte đã xoá).
+    """
+    chapter_urls = {row["source_url"] for row in novel_db.fetch_cached_chapters(conn)}
+    chapter_stems = set()
+    for url in chapter_urls:
+        match = PAGE_SUFFIX_RE.match(url)
+        if match:
+            chapter_stems.add(match.group("stem"))
+
+    unused: List[str] = []
+    for row in novel_db.fetch_pages(conn):
+        if row["url"] in chapter_urls:
+            continue
+        match = PAGE_SUFFIX_RE.match(row["url"])
+        if match and match.group("page") and match.group("stem") in chapter_stems:
+            continue
+        unused.append(row["url"])
+    removed_rows = novel_db.delete_pages(conn, unused)
+    conn.commit()
+
+    keep = {(row["digest"], row["codec"]) for row in novel_db.fetch_pages(conn)}
+    removed_files, freed = page_cache.prune(keep)
+    return removed_rows, removed_files, freed
+
+
+def utc_timestamp() -> str:
+    return datetime.now(UTC).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+
+def record_novel_check(conn, novel_id: int, *, had_new: bool, status: Optional[str] = None) -> None:
+    """Cập nhật lịch kiểm tra tiếp theo của truyện sau một lần quét."""
+    row = conn.execute("SELECT * FROM novels WHERE id = ?", (novel_id,)).fetchone()
+    if row is None:
+        return
+    schedule = scheduler.next_schedule(
+        now=scheduler.utc_now(),
+        had_new=had_new,
+        status=status or row["status"],
+        update_interval=row["update_interval"],
+        check_interval=row["check_interval"],
+        last_update_at=scheduler.parse_timestamp(row["last_update_at"]),
+    )
+    novel_db.update_novel_schedule(
+        conn,
+        novel_id,
+        status=status,
+        update_interval=schedule.update_interval,
+        check_interval=schedule.check_interval,
+        last_update_at=(
+            scheduler.format_timestamp(schedule.last_update_at)
+            if schedule.last_update_at
+            else None
+        ),
+        next_check_at=scheduler.format_timestamp(schedule.next_check_at),
+    )
+
+
+def record_failed_check(conn, novel_id: int) -> None:
+    """Lùi lịch kiểm tra của truyện vừa lỗi để --watch không gọi lại site ngay lập tức."""
+    try:
+        record_novel_check(conn, novel_id, had_new=False)
+        conn.commit()
+    except Exception as exc:  # noqa: BLE001
+        print(f"[!] Không ghi được lịch kiểm tra sau lỗi: {exc}")
+
+
+def fetch_changed_index(
+    session: requests.Session,
+    conn,
+    novel: sqlite3.Row,
+    *,
+    throttle: Optional[HostThrottle] = None,
+    page_cache: Optional[PageCache] = None,
+) -> Optional[IndexPage]:
+    """Kiểm tra nhanh mục lục của truyện đã đăng ký.
+
+    Trả về None khi chắc chắn không có chương mới: server trả 304 cho request
+    có điều kiện, hoặc ``og:novel:latest_chapter_url`` trùng với lần quét trước.
+    Lối tắt chỉ áp dụng khi mọi chương của lần quét trước đã được tải đủ.
+    """
+    latest_index = int(novel["latest_index"] or 0)
+    complete = latest_index > 0 and novel_db.count_chapters(conn, novel["id"]) >= latest_index
+    page = fetch_index_page(
+        session,
+        novel["index_url"],
+        etag=novel["index_etag"] if complete else None,
+        last_modified=novel["index_last_modified"] if complete else None,
+        throttle=throttle,
+        page_cache=page_cache,
+    )
+    if page is not None:
+        latest_url = sniff_meta_property(page.html, "og:novel:latest_chapter_url")
+        if not (complete and latest_url and latest_url == novel["latest_chapter_url"]):
+            return page
+    novel_db.update_novel_scan(
+        conn,
+        novel["id"],
+        last_scan_at=utc_timestamp(),
+        index_etag=page.etag if page else None,
+        index_last_modified=page.last_modified if page else None,
+    )
+    record_novel_check(conn, novel["id"], had_new=False)
+    flush_page_cache(conn, page_cache)
+    return None
+
+
 def sync_single_novel(
     session: requests.Session,
     conn,
@@ -395,69 +908,104 @@ def sync_single_novel(
     index_url: str,
     root_folder: str,
     min_length: int,
+    options: Optional[CrawlOptions] = None,
+    index_page: Optional[IndexPage] = None,
 ) -> Tuple[str, int]:
+    options = options or CrawlOptions()
     resolved_index = _absolute_index_url(index_url)
-    book = scrape_book(session, resolved_index)
+    if index_page is None:
+        index_page = fetch_index_page(
+            session, resolved_index, throttle=options.throttle, page_cache=options.page_cache
+        )
+        assert index_page is not None
+    book = parse_book_page(BeautifulSoup(index_page.html, "lxml"), resolved_index)
     base_slug = slugify_title(book.title, fallback="truyen")
-    slug = resolve_unique_slug(conn, base_slug, resolved_index)
-    novel_root, goc_folder, _ = ensure_directories(root_folder, slug)
-
-    novel_id = novel_db.upsert_novel(
-        conn,
-        title=book.title,
-        slug=slug,
-        index_url=resolved_index,
-        root_path=novel_root,
-        author=book.author,
-        description=book.description,
-        cover_url=book.cover_url,
-    )
+    with novel_db.immediate(conn):
+        slug = resolve_unique_slug(conn, base_slug, resolved_index)
+        novel_root, goc_folder, _ = ensure_directories(root_folder, slug)
+        if options.packed:
+            chapter_store.packed_store_for(novel_root, create=True)
+
+        previous = novel_db.fetch_novel_by_url(conn, resolved_index)
+        previous_latest = int(previous["latest_index"] or 0) if previous else 0
+        novel_id = novel_db.upsert_novel(
+            conn,
+            title=book.title,
+            slug=slug,
+            index_url=resolved_index,
+            root_path=novel_root,
+            author=book.author,
+            description=book.description,
+            cover_url=book.cover_url,
+        )
 
     existing_map = novel_db.fetch_chapter_map(conn, novel_id)
     downloaded = 0
     errors: List[str] = []
 
-    for chapter in determine_new_chapters(existing_map, book.chapters):
-        attempt_success = False
-        for attempt in range(1, 4):
-            try:
-                path, content_hash, final_title = download_chapter(
-                    session, chapter, goc_folder, min_length
-                )
-                novel_db.record_chapter(
-                    conn,
-                    novel_id=novel_id,
-                    chapter_index=chapter.index,
-                    title=final_title,
-                    source_url=chapter.url,
-                    file_path=path,
-                    content_hash=content_hash,
-                )
-                downloaded += 1
-                attempt_success = True
-                print(f"[+] {book.title} - tải chương {chapter.index}: {chapter.title}")
-                time.sleep(0.8 + random.random() * 0.8)
-                break
-            except Exception as exc:  # noqa: BLE001
-                print(
-                    f"    -> Lỗi khi tải chương {chapter.index} ({chapter.url}): {exc}."
-                )
-                time.sleep(1.5 * attempt)
-        if not attempt_success:
+    disk_sizes: Optional[Dict[str, int]] = None
+    if options.verify_files:
+        folders = [goc_folder] + [
+            os.path.dirname(row["file_path"]) for row in existing_map.values() if row["file_path"]
+        ]
+        disk_sizes = scan_file_sizes(folders, workers=options.workers)
+        novel_db.update_chapter_file_sizes(
+            conn,
+            (
+                (row["id"], disk_sizes.get(os.path.normpath(row["file_path"] or "")))
+                for row in existing_map.values()
+            ),
+        )
+
+    pending = list(determine_new_chapters(existing_map, book.chapters, disk_sizes))
+    batcher = novel_db.CommitBatcher(
+        conn, every=options.commit_every, interval=options.commit_interval
+    )
+    for chapter, result, error in download_chapters(
+        session, pending, goc_folder, min_length, options
+    ):
+        if result is None:
             errors.append(chapter.url)
+            continue
+        path, content_hash, final_title = result
+        novel_db.record_chapter(
+            conn,
+            novel_id=novel_id,
+            chapter_index=chapter.index,
+            title=final_title,
+            source_url=chapter.url,
+            file_path=path,
+            content_hash=content_hash,
+            file_size=chapter_store.text_size(path),
+        )
+        flush_page_cache(conn, options.page_cache)
+        downloaded += 1
+        if options.on_chapter_recorded is not None:
+            batcher.flush()
+            options.on_chapter_recorded(novel_root, path)
+        else:
+            batcher.tick()
+        print(f"[+] {book.title} - tải chương {chapter.index}: {chapter.title}")
 
     write_index_file(os.path.join(goc_folder, "index.tsv"), book.chapters)
 
-    last_scan_at = datetime.now(UTC).replace(microsecond=0).isoformat().replace("+00:00", "Z")
-
     novel_db.update_novel_scan(
         conn,
         novel_id,
-        last_scan_at=last_scan_at,
+        last_scan_at=utc_timestamp(),
         latest_index=len(book.chapters),
         latest_chapter_title=book.latest_chapter_name,
         latest_chapter_url=book.latest_chapter_url,
+        index_etag=index_page.etag,
+        index_last_modified=index_page.last_modified,
     )
+    record_novel_check(
+        conn, novel_id, had_new=len(book.chapters) > previous_latest, status=book.status
+    )
+    flush_page_cache(conn, options.page_cache)
+    batcher.flush()
+    if options.on_novel_synced is not None:
+        options.on_novel_synced(novel_root)
 
     if errors:
         print(f"[!] Hoàn thành với lỗi, các chương không tải được: {len(errors)}")
@@ -465,6 +1013,61 @@ def sync_single_novel(
     return slug, downloaded
 
 
+@contextmanager
+def worker_connection(conn, db_path: Optional[str]) -> Iterator[sqlite3.Connection]:
+    """Kết nối cho một worker đồng bộ truyện.
+
+    Khi chạy nhiều truyện song song (``db_path`` khác rỗng), mỗi worker mở kết
+    nối WAL riêng để transaction (và các lần commit theo lô) của truyện này
+    không lẫn với truyện khác; tranh khoá ghi được xử lý bằng ``busy_timeout``.
+    """
+    if not db_path:
+        yield conn
+        return
+    with novel_db.connect(db_path) as own_conn:
+        yield own_conn
+
+
+def _worker_db_path(conn, workers: int) -> Optional[str]:
+    # Đọc ở luồng chính: kết nối sqlite3 không dùng được từ thread khác.
+    return novel_db.database_path(conn) if workers > 1 else None
+
+
+def run_novel_jobs(
+    items: Sequence,
+    sync: Callable[[object], Optional[Tuple[str, int]]],
+    workers: int,
+    durations: Optional[Dict[str, float]] = None,
+) -> Dict[str, int]:
+    """Đồng bộ nhiều truyện song song; một truyện chậm hay lỗi không giữ chân các truyện khác.
+
+    ``sync`` trả về ``(slug, số chương mới)`` hoặc None khi bỏ qua/lỗi. Thời gian
+    xử lý mỗi truyện được ghi vào ``durations`` nếu có truyền vào.
+    """
+    results: Dict[str, int] = {}
+
+    def timed(item) -> Tuple[Optional[Tuple[str, int]], float]:
+        started = time.monotonic()
+        outcome = sync(item)
+        return outcome, time.monotonic() - started
+
+    with ExitStack() as stack:
+        if workers <= 1:
+            # Một worker thì chạy ngay trên luồng gọi: kết nối sqlite3 không dùng được ở thread khác.
+            outcomes: Iterable = map(timed, items)
+        else:
+            executor = stack.enter_context(ThreadPoolExecutor(max_workers=workers))
+            outcomes = executor.map(timed, items)
+        for outcome, elapsed in outcomes:
+            if outcome is None:
+                continue
+            slug, count = outcome
+            results[slug] = results.get(slug, 0) + count
+            if durations is not None:
+                durations[slug] = durations.get(slug, 0.0) + elapsed
+    return results
+
+
 def sync_from_input(
     session: requests.Session,
     conn,
@@ -472,21 +1075,28 @@ def sync_from_input(
     urls: Sequence[str],
     root_folder: str,
     min_length: int,
+    options: Optional[CrawlOptions] = None,
+    durations: Optional[Dict[str, float]] = None,
 ) -> Dict[str, int]:
-    results: Dict[str, int] = {}
-    for url in urls:
+    options = options or CrawlOptions()
+    db_path = _worker_db_path(conn, options.novel_workers)
+
+    def sync(url: str) -> Optional[Tuple[str, int]]:
         try:
-            slug, count = sync_single_novel(
-                session,
-                conn,
-                index_url=url,
-                root_folder=root_folder,
-                min_length=min_length,
-            )
-            results[slug] = results.get(slug, 0) + count
+            with worker_connection(conn, db_path) as novel_conn:
+                return sync_single_novel(
+                    session,
+                    novel_conn,
+                    index_url=url,
+                    root_folder=root_folder,
+                    min_length=min_length,
+                    options=options,
+                )
         except Exception as exc:  # noqa: BLE001
             print(f"[X] Không thể đồng bộ '{url}': {exc}")
-    return results
+            return None
+
+    return run_novel_jobs(urls, sync, options.novel_workers, durations)
 
 
 def sync_registered_novels(
@@ -495,22 +1105,85 @@ def sync_registered_novels(
     *,
     root_folder: str,
     min_length: int,
+    options: Optional[CrawlOptions] = None,
+    due_only: bool = False,
+    durations: Optional[Dict[str, float]] = None,
 ) -> Dict[str, int]:
-    results: Dict[str, int] = {}
-    for novel in novel_db.fetch_novels(conn):
-        url = novel["index_url"]
-        try:
-            slug, count = sync_single_novel(
+    options = options or CrawlOptions()
+    if due_only:
+        novels = novel_db.fetch_due_novels(conn, scheduler.format_timestamp(scheduler.utc_now()))
+    else:
+        novels = novel_db.fetch_novels(conn)
+    db_path = _worker_db_path(conn, options.novel_workers)
+
+    def sync_novel(novel_conn, novel: sqlite3.Row) -> Optional[Tuple[str, int]]:
+        index_page = None
+        if not options.verify_files:
+            index_page = fetch_changed_index(
                 session,
-                conn,
-                index_url=url,
-                root_folder=root_folder,
-                min_length=min_length,
+                novel_conn,
+                novel,
+                throttle=options.throttle,
+                page_cache=options.page_cache,
             )
-            results[slug] = results.get(slug, 0) + count
+            if index_page is None:
+                print(f"[=] {novel['title']}: mục lục không đổi, bỏ qua.")
+                return None
+        return sync_single_novel(
+            session,
+            novel_conn,
+            index_url=novel["index_url"],
+            root_folder=root_folder,
+            min_length=min_length,
+            options=options,
+            index_page=index_page,
+        )
+
+    def sync(novel: sqlite3.Row) -> Optional[Tuple[str, int]]:
+        try:
+            with worker_connection(conn, db_path) as novel_conn:
+                try:
+                    return sync_novel(novel_conn, novel)
+                except Exception:
+                    record_failed_check(novel_conn, novel["id"])
+                    raise
         except Exception as exc:  # noqa: BLE001
             print(f"[X] Không thể cập nhật '{novel['title']}': {exc}")
-    return results
+            return None
+
+    return run_novel_jobs(novels, sync, options.novel_workers, durations)
+
+
+def watch_registered_novels(
+    session: requests.Session,
+    conn,
+    *,
+    root_folder: str,
+    min_length: int,
+    options: Optional[CrawlOptions] = None,
+) -> None:
+    """Chạy liên tục: ngủ tới lịch kiểm tra gần nhất rồi quét các truyện đã tới hạn."""
+    while True:
+        conn.commit()
+        due = scheduler.parse_timestamp(novel_db.next_check_due(conn))
+        now = scheduler.utc_now()
+        wait = (due - now).total_seconds() if due else scheduler.DEFAULT_CHECK_INTERVAL
+        wait = max(wait, MIN_WATCH_SLEEP)
+        wake_at = now + timedelta(seconds=wait)
+        print(
+            f"[•] Lần kiểm tra tiếp theo lúc {scheduler.format_timestamp(wake_at)} "
+            f"(sau {wait / 60:.0f} phút)."
+        )
+        time.sleep(wait)
+        results = sync_registered_novels(
+            session,
+            conn,
+            root_folder=root_folder,
+            min_length=min_length,
+            options=options,
+            due_only=True,
+        )
+        print("    ->", summarise_new_chapters(results))
 
 
 def run_auto_tool(root_folder: str) -> bool:
@@ -559,11 +1232,125 @@ def parse_arguments() -> argparse.Namespace:
         action="store_true",
         help="Chỉ xử lý các URL trong file input, không quét lại các truyện đã lưu trong DB",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Số luồng tải chương song song (mặc định: {DEFAULT_WORKERS}).",
+    )
+    parser.add_argument(
+        "--novel-workers",
+        type=int,
+        default=DEFAULT_NOVEL_WORKERS,
+        help=f"Số truyện được đồng bộ song song (mặc định: {DEFAULT_NOVEL_WORKERS}).",
+    )
+    parser.add_argument(
+        "--commit-every",
+        type=int,
+        default=novel_db.DEFAULT_COMMIT_EVERY,
+        help=f"Commit database sau mỗi N chương (mặc định: {novel_db.DEFAULT_COMMIT_EVERY}).",
+    )
+    parser.add_argument(
+        "--commit-interval",
+        type=float,
+        default=novel_db.DEFAULT_COMMIT_INTERVAL,
+        help=(
+            "Commit database khi đã quá số giây này kể từ lần commit trước "
+            f"(mặc định: {novel_db.DEFAULT_COMMIT_INTERVAL})."
+        ),
+    )
+    parser.add_argument(
+        "--per-host",
+        type=int,
+        default=DEFAULT_MAX_CONCURRENCY,
+        help=f"Số kết nối đồng thời tối đa tới mỗi host (mặc định: {DEFAULT_MAX_CONCURRENCY}).",
+    )
+    parser.add_argument(
+        "--min-gap",
+        type=float,
+        default=DEFAULT_MIN_GAP,
+        help=f"Khoảng cách tối thiểu (giây) giữa hai request tới cùng host (mặc định: {DEFAULT_MIN_GAP}).",
+    )
+    parser.add_argument(
+        "--fixed-rate",
+        action="store_true",
+        help="Tắt bộ điều tốc AIMD, giữ cố định --per-host và --min-gap.",
+    )
+    parser.add_argument(
+        "--due-only",
+        action="store_true",
+        help="Chỉ quét lại các truyện đã tới lịch kiểm tra (lịch tự điều chỉnh theo tần suất ra chương).",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Chạy liên tục, ngủ tới khi có truyện tới lịch kiểm tra tiếp theo.",
+    )
+    parser.add_argument(
+        "--verify-files",
+        action="store_true",
+        help="Quét lại thư mục goc/ trên đĩa thay vì tin vào kích thước file đã lưu trong DB.",
+    )
+    parser.add_argument(
+        "--packed",
+        action="store_true",
+        help=(
+            "Lưu chương của mỗi bộ truyện trong một file chapters.sqlite nén thay cho các file .txt "
+            "(file sẵn có được nhập vào; xuất lại bằng 'python chapter_store.py export')."
+        ),
+    )
+    parser.add_argument(
+        "--page-cache",
+        help="Thư mục lưu HTML thô đã nén (mặc định: page_cache/ cạnh file database).",
+    )
+    parser.add_argument(
+        "--no-page-cache",
+        action="store_true",
+        help="Không lưu HTML thô của các trang đã tải.",
+    )
+    parser.add_argument(
+        "--reextract",
+        action="store_true",
+        help="Tách lại toàn bộ goc/*.txt từ page cache (không tải lại) rồi thoát.",
+    )
+    parser.add_argument(
+        "--prune-page-cache",
+        action="store_true",
+        help=(
+            "Xoá khỏi page cache các trang --reextract không dùng (mục lục, bản cũ của trang đã tải lại) "
+            "rồi thoát. Chạy khi crawler đã dừng."
+        ),
+    )
     parser.add_argument(
         "--run-auto",
         action="store_true",
         help="Tự động gọi auto.py sau khi phát hiện chương mới.",
     )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Dịch ngay trong lúc crawl: mỗi chương vừa tải xong được đưa vào hàng đợi dịch.",
+    )
+    parser.add_argument(
+        "--pipeline-queue",
+        type=int,
+        default=8,
+        help="Số chương tối đa chờ dịch trước khi crawler phải tạm dừng (mặc định: 8).",
+    )
+    parser.add_argument(
+        "--profiles",
+        help="--pipeline: danh sách profile Chrome cho luồng dịch (như --profiles của auto.py).",
+    )
+    parser.add_argument(
+        "--auth-states",
+        help="--pipeline: file/thư mục trạng thái đăng nhập cho luồng dịch (như --auth-states của auto.py).",
+    )
+    parser.add_argument(
+        "--tabs",
+        type=int,
+        default=1,
+        help="--pipeline: số tab dịch song song trong mỗi profile (mặc định: 1).",
+    )
     return parser.parse_args()
 
 
@@ -573,10 +1360,71 @@ def main() -> None:
     os.makedirs(root_folder, exist_ok=True)
     novel_db.ensure_database(args.db)
 
-    session = make_session()
+    page_cache = None
+    if not args.no_page_cache:
+        cache_root = args.page_cache or os.path.join(
+            os.path.dirname(os.path.abspath(args.db)), "page_cache"
+        )
+        page_cache = PageCache(cache_root)
+
+    if args.reextract:
+        if page_cache is None:
+            print("[X] --reextract cần page cache, hãy bỏ --no-page-cache.")
+            return
+        with novel_db.connect(args.db) as conn:
+            rewritten, failed = reextract_from_cache(
+                conn, page_cache, min_length=args.min_length, workers=os.cpu_count() or 1
+            )
+        print(f"[✓] Đã tách lại {rewritten} chương từ page cache ({failed} lỗi).")
+        return
+
+    if args.prune_page_cache:
+        if page_cache is None:
+            print("[X] --prune-page-cache cần page cache, hãy bỏ --no-page-cache.")
+            return
+        with novel_db.connect(args.db) as conn:
+            removed_rows, removed_files, freed = prune_page_cache(conn, page_cache)
+        print(
+            f"[✓] Đã dọn page cache: bỏ {removed_rows} ánh xạ, xoá {removed_files} file "
+            f"({freed / (1024 * 1024):.1f} MB)."
+        )
+        return
+
+    novel_workers = max(1, args.novel_workers)
+    session = make_session(pool_size=max(10, novel_workers * max(1, args.workers)))
+    throttle_class = HostThrottle if args.fixed_rate else AimdThrottle
+    options = CrawlOptions(
+        workers=max(1, args.workers),
+        novel_workers=novel_workers,
+        throttle=throttle_class(max_concurrency=max(1, args.per_host), min_gap=args.min_gap),
+        verify_files=args.verify_files,
+        packed=args.packed,
+        page_cache=page_cache,
+        commit_every=args.commit_every,
+        commit_interval=args.commit_interval,
+    )
+
+    pipeline = None
+    if args.pipeline:
+        import auto
+        from pipeline import TranslationPipeline
+
+        pipeline = TranslationPipeline(
+            auto.resolve_profile_paths(args),
+            auth_state_paths=auto.resolve_auth_state_paths(args),
+            tabs=args.tabs,
+            queue_size=args.pipeline_queue,
+            index_db=args.db,
+        ).start()
+        options.on_chapter_recorded = pipeline.submit
+        options.on_novel_synced = pipeline.finish_novel
+        # Chương đã tải nhưng chưa vào được hàng đợi dịch không vượt quá số này.
+        options.max_in_flight = options.workers + args.pipeline_queue
+        print("[•] Bật chế độ pipeline: chương mới sẽ được dịch ngay khi tải xong.")
 
     with novel_db.connect(args.db) as conn:
         total_downloaded: Dict[str, int] = {}
+        durations: Dict[str, float] = {}
 
         if args.input:
             input_urls = load_input_urls(args.input)
@@ -590,6 +1438,8 @@ def main() -> None:
                     urls=input_urls,
                     root_folder=root_folder,
                     min_length=args.min_length,
+                    options=options,
+                    durations=durations,
                 )
                 for key, value in downloaded_from_input.items():
                     total_downloaded[key] = total_downloaded.get(key, 0) + value
@@ -601,15 +1451,44 @@ def main() -> None:
                 conn,
                 root_folder=root_folder,
                 min_length=args.min_length,
+                options=options,
+                due_only=args.due_only or args.watch,
+                durations=durations,
             )
             for key, value in downloaded_registered.items():
                 total_downloaded[key] = total_downloaded.get(key, 0) + value
 
         print("[✓] Hoàn tất đồng bộ." )
-        print("    ->", summarise_new_chapters(total_downloaded))
+        print("    ->", summarise_new_chapters(total_downloaded, durations))
+        for line in options.throttle.describe():
+            print("    -> Tốc độ", line)
+
+        if args.watch:
+            try:
+                watch_registered_novels(
+                    session,
+                    conn,
+                    root_folder=root_folder,
+                    min_length=args.min_length,
+                    options=options,
+                )
+            except KeyboardInterrupt:
+                print("\n[•] Dừng chế độ theo dõi.")
 
         new_chapter_total = sum(total_downloaded.values())
-        if new_chapter_total > 0 and args.run_auto:
+        if pipeline is not None:
+            novel_roots = [
+                os.path.join(root_folder, name)
+                for name in sorted(os.listdir(root_folder))
+                if os.path.isdir(os.path.join(root_folder, name, "goc"))
+            ]
+            backlog = pipeline.submit_backlog(novel_roots)
+            if backlog:
+                print(f"[•] Đưa thêm {backlog} chương chưa dịch vào hàng đợi.")
+            print("[•] Đang chờ luồng dịch hoàn tất...")
+            pipeline.close()
+            print(f"[✓] Pipeline dịch xong {pipeline.translated} chương, lỗi {pipeline.failed}.")
+        elif new_chapter_total > 0 and args.run_auto:
             run_auto_tool(root_folder)
 
 
@@ -0,0 +1,206 @@
+"""Giới hạn tốc độ gửi request theo từng host cho crawler."""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import urlsplit
+
+DEFAULT_MAX_CONCURRENCY = 3
+DEFAULT_MIN_GAP = 0.4
+DEFAULT_MAX_DELAY = 30.0
+DEFAULT_SLOW_RESPONSE = 5.0
+THROTTLE_STATUSES = frozenset({429, 503})
+
+
+def host_of(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Đọc header Retry-After (số giây hoặc HTTP-date), trả về số giây cần chờ."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+@dataclass
+class HostState:
+    concurrency: float
+    delay: float
+    in_flight: int = 0
+    next_allowed: float = 0.0
+    paused_until: float = 0.0
+    successes: int = 0
+    failures: int = 0
+    throttled: int = 0
+
+
+class HostThrottle:
+    """Giới hạn số kết nối đồng thời và khoảng cách tối thiểu giữa hai request tới cùng host.
+
+    Khoảng cách thực tế được rải ngẫu nhiên trong ``[delay, delay * (1 + jitter)]``
+    để không gửi request theo nhịp đều đặn. Khi server trả 429/503 kèm
+    ``Retry-After``, mọi request tới host đó được tạm dừng tới hết thời gian chờ.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        min_gap: float = DEFAULT_MIN_GAP,
+        jitter: float = 1.0,
+    ) -> None:
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency phải >= 1")
+        self.max_concurrency = max_concurrency
+        self.min_gap = max(0.0, min_gap)
+        self.jitter = max(0.0, jitter)
+        self._condition = threading.Condition()
+        self._hosts: Dict[str, HostState] = {}
+
+    def _initial_state(self) -> HostState:
+        return HostState(concurrency=float(self.max_concurrency), delay=self.min_gap)
+
+    def _state(self, host: str) -> HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._initial_state()
+            self._hosts[host] = state
+        return state
+
+    @contextmanager
+    def slot(self, url: str) -> Iterator[None]:
+        host = host_of(url)
+        with self._condition:
+            while True:
+                state = self._state(host)
+                now = time.monotonic()
+                if state.paused_until > now:
+                    self._condition.wait(state.paused_until - now)
+                    continue
+                if state.in_flight < max(1, int(state.concurrency)):
+                    break
+                self._condition.wait()
+            state.in_flight += 1
+            start = max(now, state.next_allowed)
+            state.next_allowed = start + state.delay * (1 + random.random() * self.jitter)
+        try:
+            if start > now:
+                time.sleep(start - now)
+            yield
+        finally:
+            with self._condition:
+                state.in_flight -= 1
+                self._condition.notify_all()
+
+    def record(
+        self,
+        url: str,
+        *,
+        ok: bool,
+        elapsed: float,
+        status: Optional[int] = None,
+        retry_after: Optional[float] = None,
+    ) -> None:
+        """Ghi nhận kết quả một request để điều chỉnh tốc độ cho host tương ứng."""
+        throttled = status in THROTTLE_STATUSES
+        with self._condition:
+            state = self._state(host_of(url))
+            if ok:
+                state.successes += 1
+            else:
+                state.failures += 1
+            if throttled:
+                state.throttled += 1
+                if retry_after:
+                    state.paused_until = max(state.paused_until, time.monotonic() + retry_after)
+            self._adjust(state, ok=ok and not throttled, elapsed=elapsed)
+            self._condition.notify_all()
+
+    def record_rejected(self, url: str) -> None:
+        """Đổi một response đã ghi nhận là thành công thành lỗi vì nội dung không dùng được.
+
+        Server trả 200 nhưng thân trang quá ngắn (trang chặn, trang lỗi) vẫn là
+        dấu hiệu cần giảm tốc như một request lỗi.
+        """
+        with self._condition:
+            state = self._state(host_of(url))
+            if state.successes:
+                state.successes -= 1
+            state.failures += 1
+            self._adjust(state, ok=False, elapsed=0.0)
+            self._condition.notify_all()
+
+    def _adjust(self, state: HostState, *, ok: bool, elapsed: float) -> None:
+        """Lớp cơ sở giữ tốc độ cố định."""
+
+    def describe(self) -> List[str]:
+        with self._condition:
+            return [
+                f"{host}: {int(state.concurrency)} kết nối, nghỉ {state.delay:.2f}s "
+                f"(ok {state.successes}, lỗi {state.failures}, bị chặn {state.throttled})"
+                for host, state in sorted(self._hosts.items())
+            ]
+
+
+class AimdThrottle(HostThrottle):
+    """Điều chỉnh tốc độ theo kiểu AIMD cho từng host.
+
+    Mỗi phản hồi nhanh và thành công nới thêm một chút (cộng dồn) số kết nối
+    đồng thời và giảm thời gian nghỉ; lỗi, phản hồi chậm hay bị chặn (429/503)
+    thì giảm một nửa số kết nối và nhân đôi thời gian nghỉ.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        min_gap: float = DEFAULT_MIN_GAP,
+        jitter: float = 1.0,
+        *,
+        max_delay: float = DEFAULT_MAX_DELAY,
+        slow_response: float = DEFAULT_SLOW_RESPONSE,
+        decrease_factor: float = 0.5,
+        delay_step: float = 0.05,
+    ) -> None:
+        super().__init__(max_concurrency, min_gap, jitter)
+        self.max_delay = max(max_delay, self.min_gap)
+        self.slow_response = slow_response
+        self.decrease_factor = decrease_factor
+        self.delay_step = delay_step
+
+    def _initial_state(self) -> HostState:
+        return HostState(concurrency=1.0, delay=max(self.min_gap, 1.0))
+
+    def _adjust(self, state: HostState, *, ok: bool, elapsed: float) -> None:
+        if ok and elapsed < self.slow_response:
+            state.concurrency = min(
+                float(self.max_concurrency), state.concurrency + 1.0 / max(state.concurrency, 1.0)
+            )
+            state.delay = max(self.min_gap, state.delay - self.delay_step)
+            return
+        state.concurrency = max(1.0, state.concurrency * self.decrease_factor)
+        state.delay = min(self.max_delay, max(state.delay, self.min_gap, 0.1) / self.decrease_factor)
+
+
+__all__ = [
+    "AimdThrottle",
+    "DEFAULT_MAX_CONCURRENCY",
+    "DEFAULT_MIN_GAP",
+    "HostThrottle",
+    "host_of",
+    "parse_retry_after",
+]
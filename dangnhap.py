@@ -1,10 +1,13 @@
 # File: luu_trang_thai_dang_nhap.py
+# Cách dùng: python dangnhap.py [duong_dan_auth.json]
+# Mỗi tài khoản nên lưu ra một file riêng để auto.py dùng qua --auth-states.
 from playwright.sync_api import sync_playwright
+import sys
 import time
 
 # URL trang đăng nhập hoặc trang chính đều được
 WEBSITE_URL = "https://aistudio.google.com/prompts/new_chat"
-AUTH_FILE = "auth.json"
+AUTH_FILE = sys.argv[1] if len(sys.argv) > 1 else "auth.json"
 
 with sync_playwright() as p:
     browser = p.chromium.launch(headless=False, slow_mo=50)
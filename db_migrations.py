@@ -0,0 +1,68 @@
+"""Nâng cấp schema SQLite theo ``PRAGMA user_version``.
+
+Mỗi store khai báo một danh sách migration; migration thứ ``i`` (đếm từ 0)
+đưa database từ phiên bản ``i`` lên ``i + 1``. Một migration là dãy câu SQL
+hoặc hàm nhận kết nối. Database đã ở phiên bản mới nhất chỉ tốn đúng một lần
+đọc pragma khi mở.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from typing import Callable, Sequence, Union
+
+MigrationStep = Union[str, Callable[[sqlite3.Connection], None]]
+Migration = Sequence[MigrationStep]
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return int(conn.execute("PRAGMA user_version").fetchone()[0])
+
+
+def add_missing_columns(
+    conn: sqlite3.Connection,
+    table: str,
+    columns: Sequence[tuple],
+) -> None:
+    """Thêm các cột ``(tên, kiểu)`` chưa có; dùng cho database tạo trước khi có migration."""
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    for column, column_type in columns:
+        if column not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+
+def migrate(conn: sqlite3.Connection, migrations: Sequence[Migration]) -> int:
+    """Chạy các migration còn thiếu, mỗi migration trong một transaction riêng.
+
+    Trả về phiên bản schema sau khi chạy. Database mới hơn code hiện tại được
+    giữ nguyên.
+    """
+    version = schema_version(conn)
+    target = len(migrations)
+    if version >= target:
+        return version
+    if conn.in_transaction:
+        conn.commit()
+    for index in range(version, target):
+        conn.execute("BEGIN")
+        try:
+            for step in migrations[index]:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(f"PRAGMA user_version = {index + 1}")
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+    return target
+
+
+__all__ = [
+    "Migration",
+    "MigrationStep",
+    "add_missing_columns",
+    "migrate",
+    "schema_version",
+]
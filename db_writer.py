@@ -0,0 +1,190 @@
+"""Ghi SQLite trên một luồng riêng để vòng lặp trình duyệt không phải chờ đĩa.
+
+Luồng điều khiển Playwright chỉ đưa việc ghi vào hàng đợi và nhận lại một
+``Future``; luồng ghi gom các việc đang chờ thành transaction ngắn (mỗi
+database một transaction, mỗi việc một SAVEPOINT để việc lỗi không kéo theo
+việc khác) rồi trả kết quả của hàm ghi qua future sau khi đã commit. Khi đóng,
+hàng đợi được ghi hết trước khi luồng dừng.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from typing import Any, Callable, ContextManager, Dict, List, Optional, Set, Tuple
+
+Opener = Callable[[str], ContextManager[sqlite3.Connection]]
+
+DEFAULT_MAX_BATCH = 64
+
+
+@dataclass
+class WriteJob:
+    path: str
+    opener: Opener
+    func: Callable[..., Any]
+    args: Tuple[Any, ...]
+    future: Future = field(default_factory=Future)
+
+
+_STOP = object()
+
+
+class DatabaseWriter:
+    """Một luồng ghi dùng chung cho nhiều file SQLite.
+
+    ``opener`` là context manager mở kết nối (ví dụ ``story_db.connect`` hoặc
+    ``novel_db.connect``); kết nối được mở một lần cho mỗi file và giữ tới khi
+    :meth:`close`.
+    """
+
+    def __init__(self, *, max_batch: int = DEFAULT_MAX_BATCH) -> None:
+        self.max_batch = max(1, max_batch)
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Set[Future]] = {}
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, path: str, opener: Opener, func: Callable[..., Any], *args: Any) -> Future:
+        """Xếp ``func(conn, *args)`` vào hàng đợi ghi của ``path``."""
+        job = WriteJob(path=path, opener=opener, func=func, args=args)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("DatabaseWriter đã đóng.")
+            self._pending.setdefault(path, set()).add(job.future)
+            self._queue.put(job)
+        job.future.add_done_callback(lambda future: self._forget(path, future))
+        return job.future
+
+    def wait(self, path: Optional[str] = None) -> None:
+        """Chờ các việc đã gửi (của ``path``, hoặc tất cả) được ghi xong."""
+        with self._lock:
+            if path is None:
+                futures = [future for group in self._pending.values() for future in group]
+            else:
+                futures = list(self._pending.get(path, ()))
+        if futures:
+            concurrent.futures.wait(futures)
+
+    def close(self) -> None:
+        """Ghi nốt hàng đợi rồi dừng luồng ghi và đóng các kết nối."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join()
+
+    def _forget(self, path: str, future: Future) -> None:
+        with self._lock:
+            group = self._pending.get(path)
+            if group is not None:
+                group.discard(future)
+                if not group:
+                    del self._pending[path]
+
+    def _run(self) -> None:
+        connections: Dict[str, sqlite3.Connection] = {}
+        with ExitStack() as stack:
+            while True:
+                batch = [self._queue.get()]
+                while batch[-1] is not _STOP and len(batch) < self.max_batch:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = batch[-1] is _STOP
+                jobs: List[WriteJob] = [job for job in batch if job is not _STOP]
+                for group in _group_by_path(jobs):
+                    self._write(stack, connections, group)
+                if stop:
+                    return
+
+    def _write(
+        self,
+        stack: ExitStack,
+        connections: Dict[str, sqlite3.Connection],
+        jobs: List[WriteJob],
+    ) -> None:
+        path = jobs[0].path
+        try:
+            conn = connections.get(path)
+            if conn is None:
+                conn = stack.enter_context(jobs[0].opener(path))
+                connections[path] = conn
+            if conn.in_transaction:
+                conn.commit()
+            conn.execute("BEGIN IMMEDIATE")
+        except Exception as exc:  # noqa: BLE001
+            for job in jobs:
+                job.future.set_exception(exc)
+            return
+
+        outcomes: List[Tuple[WriteJob, Any, Optional[BaseException]]] = []
+        try:
+            for job in jobs:
+                conn.execute("SAVEPOINT write_job")
+                try:
+                    result = job.func(conn, *job.args)
+                except Exception as exc:  # noqa: BLE001
+                    conn.execute("ROLLBACK TO write_job")
+                    outcomes.append((job, None, exc))
+                else:
+                    outcomes.append((job, result, None))
+                conn.execute("RELEASE write_job")
+            conn.commit()
+        except Exception as exc:  # noqa: BLE001
+            if conn.in_transaction:
+                conn.rollback()
+            for job in jobs:
+                job.future.set_exception(exc)
+            return
+        for job, result, error in outcomes:
+            if error is None:
+                job.future.set_result(result)
+            else:
+                job.future.set_exception(error)
+
+
+def _group_by_path(jobs: List[WriteJob]) -> List[List[WriteJob]]:
+    groups: Dict[str, List[WriteJob]] = {}
+    for job in jobs:
+        groups.setdefault(job.path, []).append(job)
+    return list(groups.values())
+
+
+_SHARED: Optional[DatabaseWriter] = None
+_SHARED_LOCK = threading.Lock()
+
+
+def shared_writer() -> DatabaseWriter:
+    """Luồng ghi dùng chung của tiến trình, tạo khi cần lần đầu."""
+    global _SHARED
+    with _SHARED_LOCK:
+        if _SHARED is None:
+            _SHARED = DatabaseWriter()
+        return _SHARED
+
+
+def close_shared_writer() -> None:
+    global _SHARED
+    with _SHARED_LOCK:
+        writer, _SHARED = _SHARED, None
+    if writer is not None:
+        writer.close()
+
+
+__all__ = [
+    "DEFAULT_MAX_BATCH",
+    "DatabaseWriter",
+    "WriteJob",
+    "close_shared_writer",
+    "shared_writer",
+]
@@ -13,6 +13,8 @@ from datetime import datetime
 from pathlib import Path
 import argparse
 
+import chapter_store
+
 class EpubBuilder:
     def __init__(self, input_folder, output_file=None, title="Truyện", author="Tác giả"):
         self.input_folder = Path(input_folder)
@@ -26,8 +28,8 @@ class EpubBuilder:
         """Quét các file chương và chỉ lấy những file có nội dung"""
         print("Đang quét các file chương...")
         
-        # Tìm tất cả file .txt trong folder
-        txt_files = list(self.input_folder.glob("*.txt"))
+        # Tìm tất cả file .txt trong folder (hoặc trong chapters.sqlite nếu truyện đã đóng gói)
+        txt_files = [self.input_folder / name for name in chapter_store.list_texts(str(self.input_folder))]
         
         # Sắp xếp theo số thứ tự chương
         def extract_chapter_number(filename):
@@ -39,19 +41,19 @@ class EpubBuilder:
         # Kiểm tra file nào có nội dung
         valid_chapters = []
         for file_path in txt_files:
-            if file_path.stat().st_size > 0:  # File không trống
+            file_size = chapter_store.text_size(str(file_path))
+            if file_size > 0:  # File không trống
                 try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read().strip()
-                        if content:  # Có nội dung thực sự
-                            valid_chapters.append({
-                                'file': file_path,
-                                'title': self.extract_chapter_title(content),
-                                'content': content
-                            })
-                            print(f"✓ {file_path.name} - Có nội dung ({file_path.stat().st_size} bytes)")
-                        else:
-                            print(f"✗ {file_path.name} - File trống")
+                    content = chapter_store.read_text(str(file_path)).strip()
+                    if content:  # Có nội dung thực sự
+                        valid_chapters.append({
+                            'file': file_path,
+                            'title': self.extract_chapter_title(content),
+                            'content': content
+                        })
+                        print(f"✓ {file_path.name} - Có nội dung ({file_size} bytes)")
+                    else:
+                        print(f"✗ {file_path.name} - File trống")
                 except Exception as e:
                     print(f"✗ {file_path.name} - Lỗi đọc file: {e}")
             else:
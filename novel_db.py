@@ -2,14 +2,33 @@
 
 from __future__ import annotations
 
+import hashlib
 import os
 import sqlite3
+import time
 from contextlib import contextmanager
 from datetime import UTC, datetime
 from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
+import db_migrations
+from page_cache import compress, decompress, default_codec
+
 DEFAULT_DB_FILE = "novel_index.sqlite"
 
+BUSY_TIMEOUT_MS = 30000
+
+DEFAULT_COMMIT_EVERY = 50
+DEFAULT_COMMIT_INTERVAL = 5.0
+
+# Chạy ở mọi lần mở kết nối: các PRAGMA này không được lưu trong file database
+# (trừ journal_mode=WAL, đặt lại cũng không tốn gì).
+CONNECTION_PRAGMAS = (
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}",
+)
+
 
 NOVEL_COLUMNS = (
     "id",
@@ -24,6 +43,13 @@ NOVEL_COLUMNS = (
     "latest_index",
     "latest_chapter_title",
     "latest_chapter_url",
+    "index_etag",
+    "index_last_modified",
+    "status",
+    "update_interval",
+    "check_interval",
+    "last_update_at",
+    "next_check_at",
     "created_at",
     "updated_at",
 )
@@ -38,13 +64,19 @@ CHAPTER_COLUMNS = (
     "file_path",
     "downloaded_at",
     "content_hash",
+    "file_size",
+    "translated_at",
+    "translation_hash",
+    "translated_source_hash",
+    "translation_profile",
+    "translation_seconds",
 )
 
+# Dòng ngăn cách tiêu đề và nội dung trong file chương của crawler.
+CHAPTER_BODY_SEPARATOR = "-" * 80 + "\n\n"
+
 
 SCHEMA_STATEMENTS = (
-    """
-    PRAGMA foreign_keys = ON;
-    """,
     """
     CREATE TABLE IF NOT EXISTS novels (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -59,6 +91,13 @@ SCHEMA_STATEMENTS = (
         latest_index INTEGER DEFAULT 0,
         latest_chapter_title TEXT,
         latest_chapter_url TEXT,
+        index_etag TEXT,
+        index_last_modified TEXT,
+        status TEXT,
+        update_interval REAL,
+        check_interval REAL,
+        last_update_at TEXT,
+        next_check_at TEXT,
         created_at TEXT NOT NULL,
         updated_at TEXT NOT NULL
     );
@@ -73,6 +112,7 @@ SCHEMA_STATEMENTS = (
         file_path TEXT NOT NULL,
         downloaded_at TEXT NOT NULL,
         content_hash TEXT,
+        file_size INTEGER,
         UNIQUE(novel_id, chapter_index),
         UNIQUE(novel_id, source_url),
         FOREIGN KEY(novel_id) REFERENCES novels(id) ON DELETE CASCADE
@@ -81,6 +121,15 @@ SCHEMA_STATEMENTS = (
     """
     CREATE INDEX IF NOT EXISTS idx_chapters_novel_id ON chapters(novel_id);
     """,
+    """
+    CREATE TABLE IF NOT EXISTS pages (
+        url TEXT PRIMARY KEY,
+        digest TEXT NOT NULL,
+        codec TEXT NOT NULL,
+        encoding TEXT,
+        fetched_at TEXT NOT NULL
+    );
+    """,
 )
 
 
@@ -90,15 +139,149 @@ def _ensure_parent(path: str) -> None:
         os.makedirs(parent, exist_ok=True)
 
 
+# Cột được thêm trước khi có migration; database cũ (user_version = 0) có thể thiếu.
+ADDED_COLUMNS = {
+    "novels": (
+        ("index_etag", "TEXT"),
+        ("index_last_modified", "TEXT"),
+        ("status", "TEXT"),
+        ("update_interval", "REAL"),
+        ("check_interval", "REAL"),
+        ("last_update_at", "TEXT"),
+        ("next_check_at", "TEXT"),
+    ),
+    "chapters": (("file_size", "INTEGER"),),
+}
+
+
+def _ensure_columns(conn: sqlite3.Connection) -> None:
+    for table, columns in ADDED_COLUMNS.items():
+        db_migrations.add_missing_columns(conn, table, columns)
+
+
+def _compress_translated_sources(conn: sqlite3.Connection) -> None:
+    codec = default_codec()
+    conn.executemany(
+        "INSERT INTO translated_sources_packed (chapter_id, body_hash, codec, data) VALUES (?, ?, ?, ?)",
+        [
+            (chapter_id, hash_chapter_body(body), codec, compress(body.encode("utf-8"), codec))
+            for chapter_id, body in conn.execute("SELECT chapter_id, body FROM translated_sources")
+        ],
+    )
+
+
+# Chỉ thêm migration mới vào cuối, không sửa migration đã phát hành.
+MIGRATIONS: Tuple[db_migrations.Migration, ...] = (
+    (*SCHEMA_STATEMENTS, _ensure_columns),
+    (
+        "CREATE INDEX IF NOT EXISTS idx_novels_next_check_at ON novels(next_check_at)",
+        "CREATE INDEX IF NOT EXISTS idx_chapters_source_url ON chapters(source_url)",
+    ),
+    (
+        "ALTER TABLE chapters ADD COLUMN translated_at TEXT",
+        "ALTER TABLE chapters ADD COLUMN translation_hash TEXT",
+        "ALTER TABLE chapters ADD COLUMN translated_source_hash TEXT",
+        "ALTER TABLE chapters ADD COLUMN translation_profile TEXT",
+        "ALTER TABLE chapters ADD COLUMN translation_seconds REAL",
+    ),
+    (
+        """
+        CREATE TABLE IF NOT EXISTS translated_sources (
+            chapter_id INTEGER PRIMARY KEY,
+            body TEXT NOT NULL,
+            FOREIGN KEY(chapter_id) REFERENCES chapters(id) ON DELETE CASCADE
+        )
+        """,
+    ),
+    (
+        """
+        CREATE TABLE translated_sources_packed (
+            chapter_id INTEGER PRIMARY KEY,
+            body_hash TEXT NOT NULL,
+            codec TEXT NOT NULL,
+            data BLOB NOT NULL,
+            FOREIGN KEY(chapter_id) REFERENCES chapters(id) ON DELETE CASCADE
+        )
+        """,
+        _compress_translated_sources,
+        "DROP TABLE translated_sources",
+        "ALTER TABLE translated_sources_packed RENAME TO translated_sources",
+    ),
+)
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+@contextmanager
+def immediate(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """Chạy một nhóm lệnh đọc-rồi-ghi trong transaction ``BEGIN IMMEDIATE`` riêng.
+
+    Giữ khoá ghi ngay từ đầu nên các worker (mỗi worker một kết nối) không
+    chen vào giữa, ví dụ khi chọn slug chưa dùng rồi mới chèn truyện.
+    """
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+def database_path(conn: sqlite3.Connection) -> str:
+    """Đường dẫn file của database chính ("" với database trong bộ nhớ)."""
+    for row in conn.execute("PRAGMA database_list"):
+        if row[1] == "main":
+            return row[2] or ""
+    return ""
+
+
 def _connect(path: str) -> sqlite3.Connection:
     _ensure_parent(path)
     conn = sqlite3.connect(path)
     conn.row_factory = sqlite3.Row
-    for statement in SCHEMA_STATEMENTS:
-        conn.execute(statement)
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    db_migrations.migrate(conn, MIGRATIONS)
     return conn
 
 
+class CommitBatcher:
+    """Commit sau mỗi ``every`` lần ghi hoặc khi đã quá ``interval`` giây kể từ lần commit trước.
+
+    Giữ transaction ngắn để lỡ dừng giữa chừng chỉ mất vài chương cuối, đồng
+    thời không phải fsync sau từng dòng.
+    """
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        *,
+        every: int = DEFAULT_COMMIT_EVERY,
+        interval: float = DEFAULT_COMMIT_INTERVAL,
+    ) -> None:
+        self.conn = conn
+        self.every = max(1, every)
+        self.interval = interval
+        self.pending = 0
+        self._last_commit = time.monotonic()
+
+    def tick(self, count: int = 1) -> bool:
+        """Ghi nhận ``count`` lần ghi; trả về True nếu vừa commit."""
+        self.pending += count
+        if self.pending >= self.every or time.monotonic() - self._last_commit >= self.interval:
+            self.flush()
+            return True
+        return False
+
+    def flush(self) -> None:
+        self.conn.commit()
+        self.pending = 0
+        self._last_commit = time.monotonic()
+
+
 @contextmanager
 def connect(path: str = DEFAULT_DB_FILE) -> Iterator[sqlite3.Connection]:
     conn = _connect(path)
@@ -191,6 +374,8 @@ def update_novel_scan(
     latest_index: Optional[int] = None,
     latest_chapter_title: Optional[str] = None,
     latest_chapter_url: Optional[str] = None,
+    index_etag: Optional[str] = None,
+    index_last_modified: Optional[str] = None,
 ) -> None:
     """Cập nhật thông tin lần quét gần nhất và chương mới nhất."""
 
@@ -212,11 +397,68 @@ def update_novel_scan(
     if latest_chapter_url is not None:
         fields["latest_chapter_url"] = latest_chapter_url
         assignments.append("latest_chapter_url = :latest_chapter_url")
+    if index_etag is not None:
+        fields["index_etag"] = index_etag
+        assignments.append("index_etag = :index_etag")
+    if index_last_modified is not None:
+        fields["index_last_modified"] = index_last_modified
+        assignments.append("index_last_modified = :index_last_modified")
 
     sql = "UPDATE novels SET " + ", ".join(assignments) + " WHERE id = :id"
     conn.execute(sql, fields)
 
 
+def update_novel_schedule(
+    conn: sqlite3.Connection,
+    novel_id: int,
+    *,
+    status: Optional[str],
+    update_interval: Optional[float],
+    check_interval: float,
+    last_update_at: Optional[str],
+    next_check_at: str,
+) -> None:
+    """Lưu lịch kiểm tra cập nhật của truyện (xem scheduler.py)."""
+
+    conn.execute(
+        """
+        UPDATE novels
+        SET status = COALESCE(:status, status),
+            update_interval = :update_interval,
+            check_interval = :check_interval,
+            last_update_at = :last_update_at,
+            next_check_at = :next_check_at
+        WHERE id = :id
+        """,
+        {
+            "id": novel_id,
+            "status": status,
+            "update_interval": update_interval,
+            "check_interval": check_interval,
+            "last_update_at": last_update_at,
+            "next_check_at": next_check_at,
+        },
+    )
+
+
+def fetch_due_novels(conn: sqlite3.Connection, now: str) -> List[sqlite3.Row]:
+    """Các truyện đã tới hạn kiểm tra (hoặc chưa từng có lịch)."""
+
+    return conn.execute(
+        """
+        SELECT * FROM novels
+        WHERE next_check_at IS NULL OR next_check_at <= ?
+        ORDER BY title COLLATE NOCASE
+        """,
+        (now,),
+    ).fetchall()
+
+
+def next_check_due(conn: sqlite3.Connection) -> Optional[str]:
+    row = conn.execute("SELECT MIN(next_check_at) AS due FROM novels").fetchone()
+    return row["due"] if row else None
+
+
 def record_chapter(
     conn: sqlite3.Connection,
     *,
@@ -226,22 +468,24 @@ def record_chapter(
     source_url: str,
     file_path: str,
     content_hash: Optional[str],
+    file_size: Optional[int] = None,
 ) -> None:
     conn.execute(
         """
         INSERT INTO chapters (
             novel_id, chapter_index, title, source_url,
-            file_path, downloaded_at, content_hash
+            file_path, downloaded_at, content_hash, file_size
         ) VALUES (
             :novel_id, :chapter_index, :title, :source_url,
-            :file_path, :downloaded_at, :content_hash
+            :file_path, :downloaded_at, :content_hash, :file_size
         )
         ON CONFLICT(novel_id, chapter_index) DO UPDATE SET
             title = excluded.title,
             source_url = excluded.source_url,
             file_path = excluded.file_path,
             downloaded_at = excluded.downloaded_at,
-            content_hash = excluded.content_hash
+            content_hash = excluded.content_hash,
+            file_size = excluded.file_size
         """,
         {
             "novel_id": novel_id,
@@ -251,10 +495,98 @@ def record_chapter(
             "file_path": file_path,
             "downloaded_at": _now_iso(),
             "content_hash": content_hash,
+            "file_size": file_size,
         },
     )
 
 
+def update_chapter_file_sizes(
+    conn: sqlite3.Connection,
+    sizes: Iterable[Tuple[int, Optional[int]]],
+) -> None:
+    """Cập nhật cột file_size theo cặp (id chương, kích thước)."""
+
+    conn.executemany(
+        "UPDATE chapters SET file_size = ? WHERE id = ?",
+        [(size, int(chapter_id)) for chapter_id, size in sizes],
+    )
+
+
+def record_pages(
+    conn: sqlite3.Connection,
+    pages: Iterable[Tuple[str, str, str, Optional[str]]],
+) -> None:
+    """Ghi ánh xạ URL -> trang HTML đã lưu trong page cache (url, digest, codec, encoding)."""
+
+    now = _now_iso()
+    conn.executemany(
+        """
+        INSERT INTO pages (url, digest, codec, encoding, fetched_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(url) DO UPDATE SET
+            digest = excluded.digest,
+            codec = excluded.codec,
+            encoding = excluded.encoding,
+            fetched_at = excluded.fetched_at
+        """,
+        [(url, digest, codec, encoding, now) for url, digest, codec, encoding in pages],
+    )
+
+
+def fetch_pages(conn: sqlite3.Connection, url_like: Optional[str] = None) -> List[sqlite3.Row]:
+    """Các trang trong page cache, có thể lọc theo mẫu LIKE (``\\`` là ký tự escape)."""
+
+    if url_like is None:
+        return conn.execute("SELECT * FROM pages").fetchall()
+    return conn.execute(
+        "SELECT * FROM pages WHERE url LIKE ? ESCAPE '\\'", (url_like,)
+    ).fetchall()
+
+
+def delete_pages(conn: sqlite3.Connection, urls: Iterable[str]) -> int:
+    """Xoá ánh xạ URL -> trang của các URL cho trước; trả về số dòng đã xoá."""
+
+    cursor = conn.executemany("DELETE FROM pages WHERE url = ?", [(url,) for url in urls])
+    return max(cursor.rowcount, 0)
+
+
+def fetch_cached_chapters(
+    conn: sqlite3.Connection,
+    novel_id: Optional[int] = None,
+) -> List[sqlite3.Row]:
+    """Các chương có trang HTML gốc trong page cache, kèm digest/codec/encoding."""
+
+    sql = """
+        SELECT chapters.*, pages.digest, pages.codec, pages.encoding
+        FROM chapters
+        JOIN pages ON pages.url = chapters.source_url
+    """
+    params: Tuple[object, ...] = ()
+    if novel_id is not None:
+        sql += " WHERE chapters.novel_id = ?"
+        params = (novel_id,)
+    sql += " ORDER BY chapters.novel_id, chapters.chapter_index"
+    return conn.execute(sql, params).fetchall()
+
+
+def update_chapter_content(
+    conn: sqlite3.Connection,
+    chapter_id: int,
+    *,
+    title: str,
+    content_hash: str,
+    file_size: int,
+) -> None:
+    conn.execute(
+        """
+        UPDATE chapters
+        SET title = ?, content_hash = ?, file_size = ?
+        WHERE id = ?
+        """,
+        (title, content_hash, int(file_size), int(chapter_id)),
+    )
+
+
 def fetch_novels(conn: sqlite3.Connection) -> List[sqlite3.Row]:
     return conn.execute("SELECT * FROM novels ORDER BY title COLLATE NOCASE").fetchall()
 
@@ -265,6 +597,10 @@ def fetch_novel_by_url(conn: sqlite3.Connection, index_url: str) -> Optional[sql
     ).fetchone()
 
 
+def fetch_novel_by_slug(conn: sqlite3.Connection, slug: str) -> Optional[sqlite3.Row]:
+    return conn.execute("SELECT * FROM novels WHERE slug = ?", (slug,)).fetchone()
+
+
 def fetch_chapter_map(conn: sqlite3.Connection, novel_id: int) -> Dict[int, sqlite3.Row]:
     rows = conn.execute(
         "SELECT * FROM chapters WHERE novel_id = ? ORDER BY chapter_index",
@@ -281,6 +617,157 @@ def latest_chapter_index(conn: sqlite3.Connection, novel_id: int) -> int:
     return int(row["max_idx"] or 0)
 
 
+def count_chapters(conn: sqlite3.Connection, novel_id: int) -> int:
+    row = conn.execute(
+        "SELECT COUNT(*) AS total FROM chapters WHERE novel_id = ?",
+        (novel_id,),
+    ).fetchone()
+    return int(row["total"] or 0)
+
+
+def hash_chapter_body(body: str) -> str:
+    """Hash nội dung chương, giống giá trị ``content_hash`` crawler lưu."""
+    return hashlib.sha1(body.encode("utf-8")).hexdigest()
+
+
+def chapter_body(text: str) -> str:
+    """Phần nội dung của một file chương (bỏ dòng tiêu đề và dòng ngăn cách)."""
+    _, separator, body = text.partition(CHAPTER_BODY_SEPARATOR)
+    return body if separator else text
+
+
+def hash_chapter_text(text: str) -> str:
+    return hash_chapter_body(chapter_body(text))
+
+
+def find_chapter_by_file(
+    conn: sqlite3.Connection,
+    novel_root: str,
+    filename: str,
+) -> Optional[sqlite3.Row]:
+    """Tìm chương theo thư mục truyện và tên file trong ``goc/``.
+
+    Thư mục truyện luôn mang tên slug, nên không phụ thuộc ``root_path`` được
+    lưu dạng tương đối hay tuyệt đối.
+    """
+    slug = os.path.basename(os.path.normpath(os.path.abspath(novel_root)))
+    escaped = filename.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    rows = conn.execute(
+        """
+        SELECT chapters.* FROM chapters
+        JOIN novels ON novels.id = chapters.novel_id
+        WHERE novels.slug = ? AND chapters.file_path LIKE ? ESCAPE '\\'
+        """,
+        (slug, "%" + escaped),
+    ).fetchall()
+    for row in rows:
+        if os.path.basename(os.path.normpath(row["file_path"])) == filename:
+            return row
+    return None
+
+
+def record_translation(
+    conn: sqlite3.Connection,
+    chapter_id: int,
+    *,
+    translation_hash: str,
+    source_hash: Optional[str],
+    profile: Optional[str] = None,
+    elapsed: Optional[float] = None,
+    source_body: Optional[str] = None,
+) -> None:
+    """Ghi nhận một lần dịch; ``source_body`` là bản gốc đã dịch, dùng để dịch lại một phần về sau.
+
+    Bản gốc được lưu nén (zstd/gzip như page cache) kèm hash, không lưu thô.
+    """
+    conn.execute(
+        """
+        UPDATE chapters SET
+            translated_at = ?,
+            translation_hash = ?,
+            translated_source_hash = ?,
+            translation_profile = ?,
+            translation_seconds = ?
+        WHERE id = ?
+        """,
+        (_now_iso(), translation_hash, source_hash, profile, elapsed, chapter_id),
+    )
+    if source_body is not None:
+        codec = default_codec()
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO translated_sources (chapter_id, body_hash, codec, data)
+            VALUES (?, ?, ?, ?)
+            """,
+            (
+                chapter_id,
+                hash_chapter_body(source_body),
+                codec,
+                compress(source_body.encode("utf-8"), codec),
+            ),
+        )
+
+
+def fetch_translated_source(conn: sqlite3.Connection, chapter_id: int) -> Optional[str]:
+    row = conn.execute(
+        "SELECT codec, data FROM translated_sources WHERE chapter_id = ?", (chapter_id,)
+    ).fetchone()
+    return decompress(row["data"], row["codec"]).decode("utf-8") if row else None
+
+
+def fetch_translation_progress(conn: sqlite3.Connection) -> List[sqlite3.Row]:
+    """Mỗi truyện một dòng: tổng số chương, đã dịch, còn lại, bản dịch đã cũ."""
+
+    return conn.execute(
+        """
+        SELECT
+            novels.id, novels.title, novels.slug,
+            COUNT(chapters.id) AS total,
+            COUNT(chapters.translated_at) AS translated,
+            COUNT(chapters.id) - COUNT(chapters.translated_at) AS remaining,
+            SUM(
+                chapters.translated_at IS NOT NULL
+                AND chapters.translated_source_hash IS NOT chapters.content_hash
+            ) AS stale,
+            SUM(chapters.translation_seconds) AS translation_seconds
+        FROM novels
+        LEFT JOIN chapters ON chapters.novel_id = novels.id
+        GROUP BY novels.id
+        ORDER BY novels.title COLLATE NOCASE
+        """
+    ).fetchall()
+
+
+def fetch_untranslated_chapters(conn: sqlite3.Connection, novel_id: int) -> List[sqlite3.Row]:
+    return conn.execute(
+        """
+        SELECT * FROM chapters
+        WHERE novel_id = ? AND translated_at IS NULL
+        ORDER BY chapter_index
+        """,
+        (novel_id,),
+    ).fetchall()
+
+
+def fetch_stale_translations(
+    conn: sqlite3.Connection,
+    novel_id: Optional[int] = None,
+) -> List[sqlite3.Row]:
+    """Chương đã dịch nhưng bản gốc đã đổi (``content_hash`` khác lúc dịch)."""
+
+    sql = """
+        SELECT * FROM chapters
+        WHERE translated_at IS NOT NULL
+        AND translated_source_hash IS NOT content_hash
+    """
+    params: Tuple[object, ...] = ()
+    if novel_id is not None:
+        sql += " AND novel_id = ?"
+        params = (novel_id,)
+    sql += " ORDER BY novel_id, chapter_index"
+    return conn.execute(sql, params).fetchall()
+
+
 def remove_chapter(
     conn: sqlite3.Connection,
     novel_id: int,
@@ -293,15 +780,41 @@ def remove_chapter(
 
 
 __all__ = [
+    "CommitBatcher",
+    "DEFAULT_COMMIT_EVERY",
+    "DEFAULT_COMMIT_INTERVAL",
     "DEFAULT_DB_FILE",
+    "SCHEMA_VERSION",
     "connect",
+    "count_chapters",
+    "database_path",
+    "chapter_body",
     "ensure_database",
+    "fetch_cached_chapters",
     "fetch_chapter_map",
+    "fetch_due_novels",
+    "fetch_novel_by_slug",
     "fetch_novel_by_url",
     "fetch_novels",
+    "fetch_stale_translations",
+    "fetch_translated_source",
+    "fetch_translation_progress",
+    "fetch_untranslated_chapters",
+    "find_chapter_by_file",
+    "hash_chapter_body",
+    "hash_chapter_text",
+    "immediate",
+    "delete_pages",
+    "fetch_pages",
     "latest_chapter_index",
+    "next_check_due",
     "record_chapter",
+    "record_pages",
+    "record_translation",
     "remove_chapter",
+    "update_chapter_content",
+    "update_chapter_file_sizes",
     "update_novel_scan",
+    "update_novel_schedule",
     "upsert_novel",
 ]
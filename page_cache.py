@@ -0,0 +1,139 @@
+"""Kho HTML thô đã nén, đánh địa chỉ theo nội dung, để tách lại chương mà không cần tải lại."""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # zstandard là tuỳ chọn, không có thì nén bằng gzip
+    zstandard = None
+
+CODEC_GZIP = "gzip"
+CODEC_ZSTD = "zstd"
+CODEC_EXTENSIONS = {CODEC_GZIP: "gz", CODEC_ZSTD: "zst"}
+# File mới hơn ngưỡng này không bị dọn: có thể là trang vừa lưu nhưng chưa kịp ghi vào bảng ``pages``.
+DEFAULT_PRUNE_MIN_AGE = 3600.0
+
+
+@dataclass
+class CachedPage:
+    url: str
+    digest: str
+    codec: str
+    encoding: Optional[str]
+
+
+def default_codec() -> str:
+    return CODEC_ZSTD if zstandard is not None else CODEC_GZIP
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Cần cài 'zstandard' để dùng codec zstd.")
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Cần cài 'zstandard' để đọc trang nén bằng zstd.")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def page_path(root: str, digest: str, codec: str) -> str:
+    return os.path.join(root, digest[:2], f"{digest}.html.{CODEC_EXTENSIONS[codec]}")
+
+
+def load_page(root: str, digest: str, codec: str) -> bytes:
+    """Đọc và giải nén một trang. Là hàm cấp module để dùng được trong process pool."""
+    with open(page_path(root, digest, codec), "rb") as handle:
+        return decompress(handle.read(), codec)
+
+
+class PageCache:
+    """Lưu mỗi trang tải về đúng một lần theo SHA-256 của nội dung thô.
+
+    Việc ghi file an toàn khi gọi từ nhiều thread. Ánh xạ URL -> trang được
+    gom vào hàng chờ để luồng chính ghi vào ``novel_index.sqlite``
+    (xem :meth:`take_pending`).
+    """
+
+    def __init__(self, root: str, *, codec: Optional[str] = None) -> None:
+        self.root = root
+        self.codec = codec or default_codec()
+        self._lock = threading.Lock()
+        self._pending: List[CachedPage] = []
+
+    def store(self, url: str, content: bytes, encoding: Optional[str] = None) -> CachedPage:
+        digest = hashlib.sha256(content).hexdigest()
+        path = page_path(self.root, digest, self.codec)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as handle:
+                handle.write(compress(content, self.codec))
+            os.replace(temp_path, path)
+        page = CachedPage(url=url, digest=digest, codec=self.codec, encoding=encoding)
+        with self._lock:
+            self._pending.append(page)
+        return page
+
+    def load(self, digest: str, codec: str) -> bytes:
+        return load_page(self.root, digest, codec)
+
+    def take_pending(self) -> List[CachedPage]:
+        with self._lock:
+            pending, self._pending = self._pending, []
+        return pending
+
+    def prune(
+        self,
+        keep: Iterable[Tuple[str, str]],
+        *,
+        min_age: float = DEFAULT_PRUNE_MIN_AGE,
+    ) -> Tuple[int, int]:
+        """Xoá các file không nằm trong ``keep`` (cặp digest, codec). Trả về (số file, số byte)."""
+        keep_paths = {page_path(self.root, digest, codec) for digest, codec in keep}
+        cutoff = time.time() - min_age
+        removed = freed = 0
+        if not os.path.isdir(self.root):
+            return removed, freed
+        for folder, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(folder, name)
+                if path in keep_paths:
+                    continue
+                try:
+                    stat = os.stat(path)
+                    if stat.st_mtime > cutoff:
+                        continue
+                    os.remove(path)
+                except OSError:
+                    continue
+                removed += 1
+                freed += stat.st_size
+        return removed, freed
+
+
+__all__ = [
+    "CODEC_GZIP",
+    "CODEC_ZSTD",
+    "CachedPage",
+    "DEFAULT_PRUNE_MIN_AGE",
+    "PageCache",
+    "compress",
+    "decompress",
+    "default_codec",
+    "load_page",
+    "page_path",
+]
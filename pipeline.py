@@ -0,0 +1,306 @@
+"""Dịch chương ngay khi crawler vừa ghi xong, thay cho việc gọi auto.py sau khi crawl xong.
+
+Crawler (luồng chính) đẩy từng chương mới vào một hàng đợi có giới hạn; một
+luồng dịch riêng giữ toàn bộ đối tượng Playwright và lấy chương ra dịch theo
+thứ tự truyện/chương. Khi hàng đợi đầy, crawler phải chờ, nên không thể tải
+vượt quá xa so với tiến độ dịch.
+
+Bộ truyện chưa có glossary chỉ bắt đầu dịch khi đã có đủ
+``auto.INITIAL_CHAPTER_COUNT`` chương đầu tiên (chương 1, 2, 3... chứ không phải
+bất kỳ chương nào tải xong trước) hoặc crawler đã tải xong bộ đó, để glossary
+được khởi tạo từ đầu truyện.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import os
+import queue
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import auto
+import chapter_store
+import db_writer
+
+DEFAULT_QUEUE_SIZE = 8
+
+
+@dataclass(order=True)
+class TranslationItem:
+    novel_order: int
+    filename: str
+    novel_root: str = field(compare=False)
+
+
+_STOP = TranslationItem(novel_order=1 << 62, filename="", novel_root="")
+
+
+class TranslationPipeline:
+    """Luồng dịch chạy song song với crawler.
+
+    ``submit`` chặn khi hàng đợi đã đủ ``queue_size`` chương (back-pressure)
+    và an toàn khi nhiều luồng crawler cùng gọi. Nếu luồng dịch gặp lỗi không
+    phục hồi được, các chương gửi tới sau đó bị bỏ qua để crawler không bị
+    treo; chúng sẽ được dịch ở lần chạy auto.py sau.
+
+    ``auth_state_paths`` và ``tabs`` có ý nghĩa như ``--auth-states``/``--tabs``
+    của auto.py; với nhiều tab, các chương sẵn sàng của cùng bộ truyện được
+    dịch song song theo lô tối đa ``tabs`` chương.
+    """
+
+    def __init__(
+        self,
+        profile_paths: Optional[Sequence[str]] = None,
+        *,
+        auth_state_paths: Optional[Sequence[str]] = None,
+        tabs: int = 1,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        headless: bool = False,
+        index_db: Optional[str] = None,
+    ) -> None:
+        self.profile_paths = list(profile_paths) if profile_paths else None
+        self.auth_state_paths = list(auth_state_paths) if auth_state_paths else None
+        self.tabs = max(1, tabs)
+        self.headless = headless
+        self.index_db = index_db
+        self._queue: "queue.PriorityQueue[TranslationItem]" = queue.PriorityQueue(
+            maxsize=max(1, queue_size)
+        )
+        self._lock = threading.Lock()
+        self._novel_order: Dict[str, int] = {}
+        self._order_counter = itertools.count()
+        self._submitted: Set[Tuple[str, str]] = set()
+        self._finished: Set[str] = set()
+        # Chỉ luồng dịch đọc/ghi: chương đang giữ lại và bộ truyện đã sẵn sàng dịch.
+        self._held: Dict[str, List[TranslationItem]] = {}
+        self._ready: Set[str] = set()
+        self._thread = threading.Thread(target=self._run, name="translation-pipeline", daemon=True)
+        self.translated = 0
+        self.failed = 0
+        self.error: Optional[Exception] = None
+
+    def start(self) -> "TranslationPipeline":
+        self._thread.start()
+        return self
+
+    @property
+    def alive(self) -> bool:
+        return self._thread.is_alive() and self.error is None
+
+    def submit(self, novel_root: str, file_path: str) -> bool:
+        """Đưa một chương (file trong goc/) vào hàng đợi dịch. Trả về False nếu bị bỏ qua."""
+        novel_root = os.path.abspath(novel_root)
+        filename = os.path.basename(file_path)
+        key = (novel_root, filename)
+        if chapter_store.text_exists(os.path.join(novel_root, "dich", filename)):
+            return False
+        with self._lock:
+            if key in self._submitted:
+                return False
+            self._submitted.add(key)
+            order = self._order_for(novel_root)
+        if self._put(TranslationItem(order, filename, novel_root)):
+            return True
+        with self._lock:
+            self._submitted.discard(key)
+        return False
+
+    def finish_novel(self, novel_root: str) -> None:
+        """Báo crawler đã tải xong bộ truyện: các chương đang giữ lại được dịch dù chưa đủ số chương."""
+        novel_root = os.path.abspath(novel_root)
+        with self._lock:
+            self._finished.add(novel_root)
+            order = self._novel_order.get(novel_root)
+        if order is not None:
+            # Mục không có tên file chỉ để đánh thức luồng dịch.
+            self._put(TranslationItem(order, "", novel_root))
+
+    def submit_backlog(self, novel_roots: Sequence[str]) -> int:
+        """Đưa nốt các chương chưa có bản dịch của những bộ truyện đã có trong thư mục gốc."""
+        count = 0
+        for novel_root in novel_roots:
+            for filename in auto.list_chapter_files(os.path.join(novel_root, "goc")):
+                if self.submit(novel_root, os.path.join(novel_root, "goc", filename)):
+                    count += 1
+            self.finish_novel(novel_root)
+        return count
+
+    def _order_for(self, novel_root: str) -> int:
+        order = self._novel_order.get(novel_root)
+        if order is None:
+            order = next(self._order_counter)
+            self._novel_order[novel_root] = order
+        return order
+
+    def _put(self, item: TranslationItem) -> bool:
+        while self.alive:
+            try:
+                self._queue.put(item, timeout=1)
+            except queue.Full:
+                continue
+            return True
+        return False
+
+    def close(self) -> None:
+        """Chờ dịch hết các chương đã gửi rồi đóng trình duyệt."""
+        while self._thread.is_alive():
+            try:
+                self._queue.put(_STOP, timeout=1)
+                break
+            except queue.Full:
+                continue
+        self._thread.join()
+
+    def _run(self) -> None:
+        if self.index_db:
+            auto.NOVEL_INDEX_DB = self.index_db
+        system_prompt = auto.load_system_prompt()
+        prepared: Dict[str, bool] = {}
+        session_manager = None
+
+        def translate(items: List[TranslationItem]) -> int:
+            novel_root = items[0].novel_root
+            paths = auto.novel_paths(novel_root)
+            if novel_root not in prepared:
+                prepared[novel_root] = auto.prepare_novel(
+                    session_manager,
+                    paths,
+                    auto.list_chapter_files(paths.input_folder),
+                    system_prompt,
+                ) and auto.harvest_pending_submissions(session_manager, paths, system_prompt)
+            if not prepared[novel_root]:
+                return 0
+            # Chương đã có bản dịch (ví dụ vừa thu hồi từ chat cũ) thì không gửi lại.
+            done = [
+                item.filename
+                for item in items
+                if chapter_store.text_exists(os.path.join(paths.output_folder, item.filename))
+            ]
+            filenames = [item.filename for item in items if item.filename not in done]
+            if session_manager.pages_per_context > 1:
+                auto.translate_in_tabs(
+                    session_manager,
+                    paths.db_path,
+                    paths.input_folder,
+                    paths.output_folder,
+                    filenames,
+                    system_prompt,
+                    paths.name,
+                )
+                return len(done) + sum(
+                    chapter_store.text_exists(os.path.join(paths.output_folder, filename))
+                    for filename in filenames
+                )
+            translated = len(done)
+            for filename in filenames:
+                success, can_continue = auto.translate_chapter(
+                    session_manager, paths, filename, system_prompt
+                )
+                translated += int(success)
+                if not can_continue:
+                    prepared[novel_root] = False
+                    break
+            return translated
+
+        try:
+            with auto.sync_playwright() as playwright:
+                session_manager = auto.BrowserSessionManager(
+                    playwright,
+                    self.auth_state_paths or self.profile_paths or auto.DEFAULT_PROFILE_PATHS,
+                    headless=self.headless,
+                    pages_per_context=self.tabs,
+                    use_storage_state=bool(self.auth_state_paths),
+                )
+                session_manager.launch_initial(system_prompt)
+                self._consume(translate)
+        except Exception as exc:  # noqa: BLE001
+            self.error = exc
+            print(f"[X] Luồng dịch dừng do lỗi: {exc}")
+        finally:
+            db_writer.close_shared_writer()
+            auto.close_story_stores()
+            if session_manager is not None:
+                try:
+                    session_manager.shutdown()
+                except Exception:  # noqa: BLE001
+                    pass
+            self._drain()
+
+    def _consume(self, translate: Callable[[List[TranslationItem]], int]) -> None:
+        """Lấy chương ra dịch theo lô cùng bộ truyện; ``translate`` trả về số chương dịch được."""
+        ready: List[TranslationItem] = []
+        stopping = False
+        while True:
+            while not stopping and len(ready) < self.tabs:
+                try:
+                    item = self._queue.get(block=not ready)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                self._hold(item, ready)
+            if stopping:
+                for held in self._held.values():
+                    for item in held:
+                        heapq.heappush(ready, item)
+                self._held.clear()
+            if not ready:
+                if stopping:
+                    return
+                continue
+            batch = [heapq.heappop(ready)]
+            while (
+                ready
+                and len(batch) < self.tabs
+                and ready[0].novel_root == batch[0].novel_root
+            ):
+                batch.append(heapq.heappop(ready))
+            translated = translate(batch)
+            self.translated += translated
+            self.failed += len(batch) - translated
+
+    def _hold(self, item: TranslationItem, ready: List[TranslationItem]) -> None:
+        held = self._held.setdefault(item.novel_root, [])
+        if item.filename:
+            held.append(item)
+        if not self._novel_ready(item.novel_root):
+            return
+        for ready_item in self._held.pop(item.novel_root):
+            heapq.heappush(ready, ready_item)
+
+    def _novel_ready(self, novel_root: str) -> bool:
+        if novel_root in self._ready:
+            return True
+        with self._lock:
+            finished = novel_root in self._finished
+        paths = auto.novel_paths(novel_root)
+        # Chương tải xong không theo thứ tự: phải chờ đúng các chương đầu tiên.
+        initial_ready = all(
+            chapter_store.text_exists(
+                os.path.join(paths.input_folder, chapter_store.chapter_filename(index))
+            )
+            for index in range(1, auto.INITIAL_CHAPTER_COUNT + 1)
+        )
+        if finished or os.path.exists(paths.db_path) or initial_ready:
+            self._ready.add(novel_root)
+            return True
+        return False
+
+    def _drain(self) -> List[TranslationItem]:
+        drained: List[TranslationItem] = []
+        while True:
+            try:
+                drained.append(self._queue.get_nowait())
+            except queue.Empty:
+                return drained
+
+
+__all__ = [
+    "DEFAULT_QUEUE_SIZE",
+    "TranslationItem",
+    "TranslationPipeline",
+]
@@ -98,6 +98,59 @@ Nhân vật 1 (Tên dịch)  | Nhân vật 2 (Tên dịch)  | Loại quan hệ
 ).strip()
 
 
+PARTIAL_TRANSLATION_PROMPT_TEMPLATE = dedent(
+    """
+**BẠN LÀ MỘT DỊCH GIẢ VĂN HỌC TRUNG-VIỆT GIÀU KINH NGHIỆM.**
+
+**Vai trò:** Chương truyện dưới đây đã được dịch, nhưng trang nguồn vừa sửa một số câu trong bản gốc. Nhiệm vụ của bạn là CHỈ cập nhật những phần bản dịch tương ứng với các câu đã sửa, giữ nguyên mọi phần còn lại.
+
+---
+
+### **DỮ LIỆU NGỮ CẢNH TỪ DATABASE**
+
+**1. BỐI CẢNH TRUYỆN:**
+{metadata_section}
+
+**2. GLOSSARY (Toàn bộ nhân vật đã biết):**
+{glossary_section}
+
+**3. RELATIONSHIPS (Toàn bộ mối quan hệ đã biết):**
+{relationships_section}
+
+---
+
+### **QUY TRÌNH & ĐỊNH DẠNG ĐẦU RA**
+
+Với MỖI thay đổi bên dưới:
+1. Tìm trong BẢN DỊCH HIỆN CÓ đoạn văn đang dịch phần "Bản gốc cũ". Chép nguyên văn đoạn đó (đúng từng ký tự, đủ dài để không trùng với chỗ khác) vào khối `[CŨ]`.
+2. Dịch lại đoạn đó theo "Bản gốc mới", giữ văn phong và cách xưng hô của bản dịch hiện có, rồi ghi vào khối `[MỚI]`.
+
+Chỉ trả về các khối theo đúng định dạng sau, không thêm lời giải thích:
+
+[THAY_THẾ]
+[CŨ]
+...
+[/CŨ]
+[MỚI]
+...
+[/MỚI]
+[/THAY_THẾ]
+
+---
+
+### **BẢN DỊCH HIỆN CÓ:**
+
+{existing_translation}
+
+---
+
+### **CÁC THAY ĐỔI TRONG BẢN GỐC:**
+
+{changes}
+    """
+).strip()
+
+
 def build_initialisation_prompt(chapter_texts: Sequence[Tuple[str, str]]) -> str:
     blocks = []
     for index, (name, text) in enumerate(chapter_texts, start=1):
@@ -124,7 +177,33 @@ def build_translation_prompt(
     )
 
 
+def build_partial_translation_prompt(
+    *,
+    metadata_section: str,
+    glossary_section: str,
+    relationships_section: str,
+    existing_translation: str,
+    changes: Sequence[Tuple[str, str]],
+) -> str:
+    """Prompt dịch lại riêng các câu đã sửa; ``changes`` là danh sách (bản gốc cũ, bản gốc mới)."""
+    blocks = []
+    for index, (old, new) in enumerate(changes, start=1):
+        blocks.append(
+            f"#### Thay đổi {index}\n"
+            f"- Bản gốc cũ: {old.strip() or '(không có)'}\n"
+            f"- Bản gốc mới: {new.strip() or '(đã xoá)'}\n"
+        )
+    return PARTIAL_TRANSLATION_PROMPT_TEMPLATE.format(
+        metadata_section=metadata_section.strip() or "(Không có dữ liệu)",
+        glossary_section=glossary_section.strip() or "(Không có dữ liệu)",
+        relationships_section=relationships_section.strip() or "(Không có dữ liệu)",
+        existing_translation=existing_translation.strip(),
+        changes="\n".join(blocks) if blocks else "(Không có dữ liệu)",
+    )
+
+
 __all__ = [
     "build_initialisation_prompt",
+    "build_partial_translation_prompt",
     "build_translation_prompt",
 ]
@@ -21,6 +21,12 @@ SUBSECTION_PATTERN = re.compile(
 )
 
 
+REPLACEMENT_PATTERN = re.compile(
+    r"\[THAY_THẾ\]\s*\[CŨ\](?P<old>.*?)\[/CŨ\]\s*\[MỚI\](?P<new>.*?)\[/MỚI\]\s*\[/THAY_THẾ\]",
+    re.DOTALL,
+)
+
+
 class ParseError(RuntimeError):
     pass
 
@@ -207,8 +213,20 @@ def split_translation_and_updates(
     return translation, glossary_additions, relationship_additions
 
 
+def parse_partial_translation_response(text: str) -> List[Tuple[str, str]]:
+    """Đọc các cặp (đoạn dịch cũ, đoạn dịch mới) từ phản hồi dịch lại một phần."""
+    replacements = [
+        (match.group("old").strip(), match.group("new").strip())
+        for match in REPLACEMENT_PATTERN.finditer(text)
+    ]
+    if not replacements:
+        raise ParseError("Không tìm thấy khối [THAY_THẾ] trong phản hồi.")
+    return replacements
+
+
 __all__ = [
     "ParseError",
     "parse_initialisation_response",
+    "parse_partial_translation_response",
     "split_translation_and_updates",
 ]
@@ -0,0 +1,110 @@
+"""Lịch kiểm tra cập nhật thích nghi cho từng truyện.
+
+Mỗi truyện có một khoảng kiểm tra riêng: truyện ra chương đều thì được kiểm
+tra khoảng nửa chu kỳ ra chương (ước lượng bằng trung bình trượt EWMA của
+khoảng cách giữa các lần có chương mới), lần kiểm tra không thấy gì mới thì
+giãn dần, truyện đã hoàn thành thì rất thưa.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Optional
+
+MIN_CHECK_INTERVAL = 3600.0
+DEFAULT_CHECK_INTERVAL = 86400.0
+MAX_CHECK_INTERVAL = 7 * 86400.0
+COMPLETED_CHECK_INTERVAL = 30 * 86400.0
+BACKOFF_FACTOR = 1.5
+EWMA_ALPHA = 0.3
+
+COMPLETED_MARKERS = ("完結", "完结", "完本", "全本", "已完成", "completed", "finished")
+
+
+@dataclass
+class Schedule:
+    update_interval: Optional[float]
+    check_interval: float
+    last_update_at: Optional[datetime]
+    next_check_at: datetime
+
+
+def utc_now() -> datetime:
+    return datetime.now(UTC).replace(microsecond=0)
+
+
+def format_timestamp(value: datetime) -> str:
+    return value.astimezone(UTC).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=UTC)
+
+
+def is_completed(status: Optional[str]) -> bool:
+    if not status:
+        return False
+    lowered = status.lower()
+    return any(marker in lowered for marker in COMPLETED_MARKERS)
+
+
+def _clamp(seconds: float) -> float:
+    return max(MIN_CHECK_INTERVAL, min(MAX_CHECK_INTERVAL, seconds))
+
+
+def next_schedule(
+    *,
+    now: datetime,
+    had_new: bool,
+    status: Optional[str],
+    update_interval: Optional[float],
+    check_interval: Optional[float],
+    last_update_at: Optional[datetime],
+) -> Schedule:
+    """Tính lịch mới sau một lần kiểm tra."""
+    check_interval = check_interval or DEFAULT_CHECK_INTERVAL
+    if had_new:
+        if last_update_at is not None:
+            gap = max(0.0, (now - last_update_at).total_seconds())
+            update_interval = (
+                gap if update_interval is None
+                else EWMA_ALPHA * gap + (1 - EWMA_ALPHA) * update_interval
+            )
+        last_update_at = now
+        check_interval = _clamp(update_interval / 2 if update_interval else DEFAULT_CHECK_INTERVAL)
+    else:
+        check_interval = _clamp(check_interval * BACKOFF_FACTOR)
+        if update_interval:
+            # Không giãn quá một chu kỳ ra chương đã quan sát được.
+            check_interval = min(check_interval, _clamp(update_interval))
+
+    if is_completed(status):
+        check_interval = max(check_interval, COMPLETED_CHECK_INTERVAL)
+
+    return Schedule(
+        update_interval=update_interval,
+        check_interval=check_interval,
+        last_update_at=last_update_at,
+        next_check_at=now + timedelta(seconds=check_interval),
+    )
+
+
+__all__ = [
+    "COMPLETED_CHECK_INTERVAL",
+    "DEFAULT_CHECK_INTERVAL",
+    "MAX_CHECK_INTERVAL",
+    "MIN_CHECK_INTERVAL",
+    "Schedule",
+    "format_timestamp",
+    "is_completed",
+    "next_schedule",
+    "parse_timestamp",
+    "utc_now",
+]
@@ -0,0 +1,300 @@
+"""Adapter cho từng nguồn truyện: phân tích mục lục, tách nội dung chương và phân trang.
+
+Mỗi adapter khai báo host mà nó phụ trách; :func:`adapter_for` chọn adapter theo
+URL. Muốn thêm nguồn mới chỉ cần viết một lớp con của :class:`SiteAdapter`,
+gọi :func:`register_adapter` và thêm HTML mẫu vào ``tests/fixtures/<name>/``.
+"""
+
+from __future__ import annotations
+
+import codecs
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+from lxml import etree, html as lxml_html
+
+from crawl_throttle import host_of
+
+STRIPPED_TAGS = ("script", "style", "noscript", "iframe")
+
+META_CHARSET_RE = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?([\w-]+)""", re.IGNORECASE)
+
+UNTITLED_CHAPTER = "Chương không tiêu đề"
+
+# ".../15877001.html" là trang 1, ".../15877001_2.html" là trang 2 của cùng chương.
+PAGE_SUFFIX_RE = re.compile(r"^(?P<stem>.+?)(?:_(?P<page>\d+))?\.html$")
+
+ANCHOR_HREF_XPATH = etree.XPath("//a/@href")
+
+
+@dataclass
+class ChapterLink:
+    index: int
+    title: str
+    url: str
+
+
+@dataclass
+class BookData:
+    title: str
+    author: Optional[str]
+    description: Optional[str]
+    cover_url: Optional[str]
+    status: Optional[str]
+    latest_chapter_name: Optional[str]
+    latest_chapter_url: Optional[str]
+    chapters: List[ChapterLink]
+
+
+@dataclass
+class ChapterPage:
+    """Kết quả tách một trang chương. ``body`` là None khi không thấy khối nội dung."""
+
+    title: str
+    body: Optional[str]
+    extra_pages: List[str] = field(default_factory=list)
+
+
+def normalise_encoding(name: Optional[str]) -> Optional[str]:
+    if not name:
+        return None
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def sniff_meta_charset(content: bytes) -> Optional[str]:
+    """Đọc ``<meta charset>`` (hoặc http-equiv Content-Type) trong 4KB đầu trang."""
+    match = META_CHARSET_RE.search(content[:4096])
+    if not match:
+        return None
+    return normalise_encoding(match.group(1).decode("ascii"))
+
+
+def class_xpath(name: str) -> str:
+    return f"//*[contains(concat(' ', normalize-space(@class), ' '), ' {name} ')]"
+
+
+def compile_xpaths(expressions: Sequence[str]) -> Tuple[etree.XPath, ...]:
+    return tuple(etree.XPath(expr) for expr in expressions)
+
+
+def _first_match(tree, xpaths):
+    for xpath in xpaths:
+        nodes = xpath(tree)
+        if nodes:
+            return nodes[0]
+    return None
+
+
+def parse_book_metadata(soup: BeautifulSoup, fallback_title: str) -> Dict[str, Optional[str]]:
+    def meta_property(name: str) -> Optional[str]:
+        tag = soup.find("meta", {"property": name})
+        if tag and tag.get("content"):
+            return tag.get("content").strip()
+        return None
+
+    book_title = meta_property("og:novel:book_name")
+    if not book_title:
+        h1 = soup.select_one("h1, .booktitle, .book-info h1")
+        if h1:
+            book_title = h1.get_text(strip=True)
+        else:
+            book_title = fallback_title
+
+    return {
+        "title": book_title,
+        "author": meta_property("og:novel:author"),
+        "description": meta_property("og:description") or meta_property("description"),
+        "cover_url": meta_property("og:image"),
+        "status": meta_property("og:novel:status"),
+        "latest_name": meta_property("og:novel:latest_chapter_name"),
+        "latest_url": meta_property("og:novel:latest_chapter_url"),
+    }
+
+
+class SiteAdapter:
+    """Giao diện chung cho một nguồn truyện.
+
+    Lớp con thường chỉ cần khai báo host, selector mục lục và các XPath cho tiêu
+    đề/nội dung (theo thứ tự ưu tiên); ghi đè phương thức khi trang có cấu trúc
+    đặc biệt.
+    """
+
+    name = "generic"
+    hosts: Tuple[str, ...] = ()
+    base_url = ""
+    index_link_selector = "a[href$='.html']"
+    title_xpaths: Tuple[etree.XPath, ...] = compile_xpaths(("//h1", "//title"))
+    content_xpaths: Tuple[etree.XPath, ...] = ()
+
+    def matches(self, url: str) -> bool:
+        host = host_of(url)
+        return any(host == known or host.endswith("." + known) for known in self.hosts)
+
+    def normalise_index_url(self, url: str) -> str:
+        return url
+
+    def is_chapter_url(self, url: str) -> bool:
+        return url.endswith(".html")
+
+    def parse_index(self, soup: BeautifulSoup, index_url: str) -> BookData:
+        meta = parse_book_metadata(soup, fallback_title=f"{self.name}_book")
+        links = []
+        for anchor in soup.select(self.index_link_selector):
+            href = anchor.get("href")
+            if not href:
+                continue
+            full_url = urljoin(index_url, href)
+            if not self.is_chapter_url(full_url):
+                continue
+            title = anchor.get_text(strip=True) or ""
+            links.append((title, full_url))
+
+        seen: Dict[str, ChapterLink] = {}
+        ordered: List[ChapterLink] = []
+        for idx, (title, link_url) in enumerate(links, start=1):
+            if link_url in seen:
+                continue
+            chapter_link = ChapterLink(index=idx, title=title or f"Chương {idx}", url=link_url)
+            seen[link_url] = chapter_link
+            ordered.append(chapter_link)
+
+        if not ordered:
+            raise RuntimeError("Không tìm thấy link chương. Có thể cấu trúc trang đã thay đổi.")
+
+        return BookData(
+            title=meta["title"],
+            author=meta["author"],
+            description=meta["description"],
+            cover_url=meta["cover_url"],
+            status=meta["status"],
+            latest_chapter_name=meta["latest_name"],
+            latest_chapter_url=meta["latest_url"],
+            chapters=ordered,
+        )
+
+    def parse_chapter(
+        self,
+        content: bytes,
+        encoding: Optional[str] = None,
+        url: str = "",
+    ) -> ChapterPage:
+        """Tách tiêu đề và nội dung chương bằng một lượt parse lxml."""
+        encoding = normalise_encoding(encoding) or sniff_meta_charset(content) or "utf-8"
+        parser = lxml_html.HTMLParser(encoding=encoding, remove_comments=True)
+        tree = lxml_html.document_fromstring(content, parser=parser)
+        etree.strip_elements(tree, *STRIPPED_TAGS, with_tail=False)
+
+        title_node = _first_match(tree, self.title_xpaths)
+        title = ""
+        if title_node is not None:
+            title = "".join(part.strip() for part in title_node.itertext())
+        node = _first_match(tree, self.content_xpaths)
+        if node is None:
+            return ChapterPage(title=title or UNTITLED_CHAPTER, body=None)
+        raw = " ".join(part.strip() for part in node.itertext() if part.strip())
+        return ChapterPage(
+            title=title or UNTITLED_CHAPTER,
+            body=re.sub(r"\s+", " ", raw).strip(),
+            extra_pages=self.extra_page_urls(tree, url),
+        )
+
+    def page_number(self, url: str) -> int:
+        match = PAGE_SUFFIX_RE.match(url.split("#")[0].split("?")[0])
+        if not match or not match.group("page"):
+            return 1
+        return int(match.group("page"))
+
+    def extra_page_urls(self, tree, url: str) -> List[str]:
+        """URL các trang tiếp theo khi một chương bị chia thành nhiều trang.
+
+        Mặc định nhận các link dạng ``<mã chương>_N.html`` cùng gốc với trang hiện tại.
+        """
+        match = PAGE_SUFFIX_RE.match(url.split("#")[0].split("?")[0]) if url else None
+        if not match:
+            return []
+        stem = match.group("stem")
+        found: Dict[str, int] = {}
+        for href in ANCHOR_HREF_XPATH(tree):
+            full_url = urljoin(url, str(href)).split("#")[0]
+            linked = PAGE_SUFFIX_RE.match(full_url)
+            if not linked or linked.group("stem") != stem or not linked.group("page"):
+                continue
+            page = int(linked.group("page"))
+            if page >= 2 and full_url != url:
+                found[full_url] = page
+        return sorted(found, key=found.__getitem__)
+
+
+class UukanshuAdapter(SiteAdapter):
+    name = "uukanshu"
+    hosts = ("uukanshu.cc",)
+    base_url = "https://uukanshu.cc"
+    index_link_selector = ".chapterlist a[href$='.html'], #list-chapterAll a[href$='.html']"
+    # Thứ tự ưu tiên: 'h1', '.chapter-title', '.bookname', 'title'.
+    title_xpaths = compile_xpaths(
+        ("//h1", class_xpath("chapter-title"), class_xpath("bookname"), "//title")
+    )
+    # '.readcotent', '.content', '#content', '.chapter-content'
+    content_xpaths = compile_xpaths(
+        (
+            class_xpath("readcotent"),
+            class_xpath("content"),
+            "//*[@id='content']",
+            class_xpath("chapter-content"),
+        )
+    )
+
+    def normalise_index_url(self, url: str) -> str:
+        if url.endswith("/"):
+            return url
+        match = re.search(r"(https?://[^/]+/book/\d+)/", url)
+        if match:
+            return match.group(1) + "/"
+        return url
+
+    def is_chapter_url(self, url: str) -> bool:
+        return "/book/" in url and url.endswith(".html")
+
+
+DEFAULT_ADAPTER: SiteAdapter = UukanshuAdapter()
+
+ADAPTERS: List[SiteAdapter] = [DEFAULT_ADAPTER]
+
+
+def register_adapter(adapter: SiteAdapter) -> SiteAdapter:
+    """Đăng ký adapter mới; adapter đăng ký sau được ưu tiên khi trùng host."""
+    ADAPTERS.insert(0, adapter)
+    return adapter
+
+
+def adapter_for(url: Optional[str]) -> SiteAdapter:
+    """Chọn adapter theo host của URL, không khớp host nào thì dùng adapter mặc định."""
+    if url:
+        for adapter in ADAPTERS:
+            if adapter.matches(url):
+                return adapter
+    return DEFAULT_ADAPTER
+
+
+__all__ = [
+    "ADAPTERS",
+    "BookData",
+    "ChapterLink",
+    "ChapterPage",
+    "DEFAULT_ADAPTER",
+    "SiteAdapter",
+    "UukanshuAdapter",
+    "adapter_for",
+    "class_xpath",
+    "compile_xpaths",
+    "normalise_encoding",
+    "parse_book_metadata",
+    "register_adapter",
+    "sniff_meta_charset",
+]
@@ -1,7 +1,12 @@
 import os
 import sqlite3
+import threading
 from contextlib import contextmanager
-from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import db_migrations
 
 SCHEMA_STATEMENTS: Tuple[str, ...] = (
     """
@@ -28,6 +33,37 @@ SCHEMA_STATEMENTS: Tuple[str, ...] = (
         UNIQUE(char1_vn_name, char2_vn_name, relationship_type)
     )
     """,
+    """
+    CREATE TABLE IF NOT EXISTS Submissions (
+        chapter TEXT PRIMARY KEY,
+        prompt_hash TEXT NOT NULL,
+        chat_url TEXT NOT NULL,
+        profile TEXT,
+        submitted_at TEXT NOT NULL
+    )
+    """,
+)
+
+# Append-only: each entry upgrades the database by one PRAGMA user_version step.
+MIGRATIONS: Tuple[db_migrations.Migration, ...] = (
+    SCHEMA_STATEMENTS,
+    (
+        "CREATE INDEX IF NOT EXISTS idx_relationships_char2 ON Relationships(char2_vn_name)",
+        "CREATE INDEX IF NOT EXISTS idx_glossary_vietnamese_name ON Glossary(vietnamese_name)",
+    ),
+)
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+BUSY_TIMEOUT_MS = 30000
+
+# Applied to every connection: the translator thread reads while the db_writer
+# thread holds a write transaction, so readers must not block and writers wait
+# for each other instead of failing with "database is locked".
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}",
 )
 
 
@@ -37,30 +73,123 @@ def _ensure_parent_folder(db_path: str) -> None:
         os.makedirs(parent, exist_ok=True)
 
 
+def _open(db_path: str, **kwargs) -> sqlite3.Connection:
+    _ensure_parent_folder(db_path)
+    conn = sqlite3.connect(db_path, **kwargs)
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
 def initialise_database(db_path: str) -> None:
     """Create the SQLite database file with the required schema if missing."""
-    _ensure_parent_folder(db_path)
-    with sqlite3.connect(db_path) as conn:
-        for statement in SCHEMA_STATEMENTS:
-            conn.execute(statement)
-        conn.commit()
+    conn = _open(db_path)
+    try:
+        db_migrations.migrate(conn, MIGRATIONS)
+    finally:
+        conn.close()
 
 
 @contextmanager
 def connect(db_path: str):
     """Context manager returning a connection with row factory set to Row."""
-    _ensure_parent_folder(db_path)
-    conn = sqlite3.connect(db_path)
+    conn = _open(db_path)
     conn.row_factory = sqlite3.Row
     try:
-        for statement in SCHEMA_STATEMENTS:
-            conn.execute(statement)
+        db_migrations.migrate(conn, MIGRATIONS)
         yield conn
         conn.commit()
     finally:
         conn.close()
 
 
+@dataclass
+class StorySnapshot:
+    """Metadata, glossary and relationships read in one go (rows ordered by id)."""
+
+    metadata: Dict[str, str]
+    glossary: List[sqlite3.Row]
+    relationships: List[sqlite3.Row]
+
+
+def load_snapshot(conn: sqlite3.Connection) -> StorySnapshot:
+    return StorySnapshot(
+        metadata=fetch_metadata(conn),
+        glossary=fetch_glossary(conn),
+        relationships=fetch_relationships(conn),
+    )
+
+
+class StoryStore:
+    """One long-lived connection per novel with an in-memory copy of the translation context.
+
+    The cached snapshot is dropped when this store writes through
+    :meth:`transaction` or when another connection commits (detected with
+    ``PRAGMA data_version``), so opening the database and re-reading the whole
+    glossary no longer happens on every prompt.
+    """
+
+    def __init__(self, db_path: str) -> None:
+        self.db_path = db_path
+        self.conn = _open(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        db_migrations.migrate(self.conn, MIGRATIONS)
+        self._snapshot: Optional[StorySnapshot] = None
+        self._data_version: Optional[int] = None
+
+    def snapshot(self) -> StorySnapshot:
+        version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if self._snapshot is None or version != self._data_version:
+            self._snapshot = load_snapshot(self.conn)
+            self._data_version = version
+        return self._snapshot
+
+    def invalidate(self) -> None:
+        self._snapshot = None
+
+    @contextmanager
+    def transaction(self, *, invalidate: bool = True) -> Iterator[sqlite3.Connection]:
+        """Yield the connection and commit on success.
+
+        Pass ``invalidate=False`` for writes that do not touch the cached
+        tables (e.g. ``Submissions``).
+        """
+        try:
+            yield self.conn
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+        finally:
+            if invalidate:
+                self.invalidate()
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+_STORES: Dict[str, StoryStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def store_for(db_path: str) -> StoryStore:
+    """Return the cached :class:`StoryStore` for ``db_path``, opening it on first use."""
+    key = os.path.abspath(db_path)
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        if store is None:
+            store = StoryStore(db_path)
+            _STORES[key] = store
+    return store
+
+
+def close_stores() -> None:
+    with _STORES_LOCK:
+        for store in _STORES.values():
+            store.close()
+        _STORES.clear()
+
+
 def write_metadata(conn: sqlite3.Connection, metadata: Dict[str, str]) -> None:
     if not metadata:
         return
@@ -205,16 +334,68 @@ def fetch_relationships(
     return rows
 
 
+def record_submission(
+    conn: sqlite3.Connection,
+    chapter: str,
+    *,
+    prompt_hash: str,
+    chat_url: str,
+    profile: Optional[str] = None,
+) -> None:
+    """Remember which AI Studio chat a chapter prompt was sent in."""
+    conn.execute(
+        """
+        INSERT OR REPLACE INTO Submissions(chapter, prompt_hash, chat_url, profile, submitted_at)
+        VALUES(?, ?, ?, ?, ?)
+        """,
+        (
+            chapter,
+            prompt_hash,
+            chat_url,
+            profile,
+            datetime.now(UTC).replace(microsecond=0).isoformat().replace("+00:00", "Z"),
+        ),
+    )
+
+
+def fetch_pending_submission(
+    conn: sqlite3.Connection,
+    chapter: str,
+) -> Optional[sqlite3.Row]:
+    return conn.execute(
+        "SELECT * FROM Submissions WHERE chapter = ?", (chapter,)
+    ).fetchone()
+
+
+def list_pending_submissions(conn: sqlite3.Connection) -> List[sqlite3.Row]:
+    return conn.execute("SELECT * FROM Submissions ORDER BY chapter").fetchall()
+
+
+def clear_submission(conn: sqlite3.Connection, chapter: str) -> int:
+    return conn.execute(
+        "DELETE FROM Submissions WHERE chapter = ?", (chapter,)
+    ).rowcount or 0
+
+
 __all__ = [
+    "StorySnapshot",
+    "StoryStore",
+    "clear_submission",
+    "close_stores",
     "connect",
     "fetch_glossary",
     "fetch_glossary_by_original_names",
     "fetch_metadata",
+    "fetch_pending_submission",
     "fetch_relationships",
     "initialise_database",
     "insert_glossary_entries",
     "insert_relationship_entries",
     "list_glossary_entries",
+    "list_pending_submissions",
+    "load_snapshot",
+    "record_submission",
+    "store_for",
     "write_metadata",
     "purge_placeholder_entries",
 ]
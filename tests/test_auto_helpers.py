@@ -1,6 +1,11 @@
+import os
 import re
+import threading
 from typing import List
 
+import auto
+from story_db import close_stores, connect, initialise_database, list_pending_submissions, record_submission
+
 
 CHINESE_SEQUENCE_PATTERN = re.compile(
     r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\U00020000-\U0002EBEF]+"
@@ -31,4 +36,526 @@ def test_extract_chinese_sequences_deduplicate_order():
 
 def test_extract_chinese_sequences_no_chinese():
     sequences = extract_chinese_sequences("Hello world, no Chinese here.")
-    assert sequences == []
\ No newline at end of file
+    assert sequences == []
+
+class FakeSessionManager:
+    def __init__(self, tabs, events, *, recycle_after=None):
+        self.pages = [FakePage(index) for index in range(tabs)]
+        self.current_profile = "profile-1"
+        self.events = events
+        self.recycle_after = recycle_after
+        self.completed = 0
+
+    @property
+    def page(self):
+        return self.pages[0]
+
+    def record_usage(self):
+        return 0
+
+    def should_recycle(self):
+        return self.recycle_after is not None and self.completed >= self.recycle_after
+
+    def recycle(self, system_prompt):
+        self.events.append(("recycle",))
+        self.recycle_after = None
+        self.pages = [FakePage(index) for index in range(len(self.pages))]
+
+    def rotate(self, system_prompt):
+        self.events.append(("rotate",))
+        self.pages = [FakePage(index) for index in range(len(self.pages))]
+
+
+class FakePage:
+    url = "https://aistudio.google.com/prompts/new_chat"
+
+    def __init__(self, index):
+        self.index = index
+
+
+def run_tabs(monkeypatch, tmp_path, *, tabs, filenames, send_results=None, responses=None, recycle_after=None):
+    """Chạy translate_in_tabs với tab giả; ``responses`` ánh xạ (file, lần) -> kết quả poll."""
+    events = []
+    manager = FakeSessionManager(tabs, events, recycle_after=recycle_after)
+    send_results = send_results or {}
+    responses = responses or {}
+
+    def fake_start(page, db_path, input_folder, filename, attempt):
+        events.append(("start", page.index, filename, attempt))
+        if not send_results.get((filename, attempt), True):
+            return None
+        return auto.TabJob(filename, attempt, "prompt", "hash", started_at=0.0)
+
+    def fake_poll(page, job):
+        result = responses.get((job.filename, job.attempt), (True, "bản dịch", False))
+        if isinstance(result, Exception):
+            responses[(job.filename, job.attempt)] = (True, "bản dịch", False)
+            raise result
+        return result
+
+    def fake_complete(page, db_path, filename, prompt, response_text, output_path, system_prompt):
+        events.append(("done", page.index, filename))
+        manager.completed += 1
+        return True
+
+    def fake_reopen(page, system_prompt):
+        events.append(("reopen", page.index))
+        return True
+
+    monkeypatch.setattr(auto, "start_tab_job", fake_start)
+    monkeypatch.setattr(auto, "poll_tab_job", fake_poll)
+    monkeypatch.setattr(auto, "complete_translation", fake_complete)
+    monkeypatch.setattr(auto, "reopen_new_chat", fake_reopen)
+    monkeypatch.setattr(auto, "reset_chat_session", lambda page, system_prompt: True)
+    monkeypatch.setattr(auto, "remember_translation", lambda *args, **kwargs: True)
+    monkeypatch.setattr(auto.time, "sleep", lambda seconds: None)
+    auto.translate_in_tabs(
+        manager, str(tmp_path / "story.sqlite"), str(tmp_path), str(tmp_path), filenames, None, "truyen"
+    )
+    return events
+
+
+def test_translate_in_tabs_reopens_tab_before_retrying_failed_send(monkeypatch, tmp_path):
+    events = run_tabs(
+        monkeypatch,
+        tmp_path,
+        tabs=1,
+        filenames=["c1.txt", "c2.txt"],
+        send_results={("c1.txt", 1): False},
+    )
+    assert events == [
+        ("start", 0, "c1.txt", 1),
+        ("reopen", 0),
+        ("start", 0, "c2.txt", 1),
+        ("done", 0, "c2.txt"),
+        ("start", 0, "c1.txt", 2),
+        ("done", 0, "c1.txt"),
+    ]
+
+
+def test_translate_in_tabs_reopens_tab_after_empty_response(monkeypatch, tmp_path):
+    events = run_tabs(
+        monkeypatch,
+        tmp_path,
+        tabs=1,
+        filenames=["c1.txt"],
+        responses={("c1.txt", 1): (False, None, False)},
+    )
+    assert events == [("start", 0, "c1.txt", 1), ("reopen", 0), ("start", 0, "c1.txt", 2), ("done", 0, "c1.txt")]
+
+
+def test_translate_in_tabs_requeues_running_jobs_first_on_rate_limit(monkeypatch, tmp_path):
+    events = run_tabs(
+        monkeypatch,
+        tmp_path,
+        tabs=2,
+        filenames=["c1.txt", "c2.txt", "c3.txt"],
+        responses={("c1.txt", 1): auto.RateLimitError("quota")},
+    )
+    rotate_at = events.index(("rotate",))
+    after = [event for event in events[rotate_at + 1:] if event[0] == "start"]
+    assert [event[2] for event in after[:2]] == ["c1.txt", "c2.txt"]
+    assert sorted(event[2] for event in events if event[0] == "done") == ["c1.txt", "c2.txt", "c3.txt"]
+
+
+def test_translate_in_tabs_drains_all_tabs_before_recycling(monkeypatch, tmp_path):
+    events = run_tabs(
+        monkeypatch,
+        tmp_path,
+        tabs=2,
+        filenames=["c1.txt", "c2.txt", "c3.txt", "c4.txt"],
+        recycle_after=1,
+    )
+    recycle_at = events.index(("recycle",))
+    before, after = events[:recycle_at], events[recycle_at + 1:]
+    assert [event[2] for event in before if event[0] == "start"] == ["c1.txt", "c2.txt"]
+    assert sorted(event[2] for event in before if event[0] == "done") == ["c1.txt", "c2.txt"]
+    assert [event[2] for event in after if event[0] == "start"] == ["c3.txt", "c4.txt"]
+
+
+def test_page_state_from_dict_converts_and_defaults():
+    state = auto.PageState.from_dict(
+        {
+            "turnCount": 2,
+            "contentCount": "3",
+            "textLength": 14,
+            "textHash": 3425950320,
+            "stopVisible": 1,
+            "blocked": None,
+            "text": "Đoạn 1\n\nĐoạn 2",
+        }
+    )
+    assert state == auto.PageState(
+        turn_count=2,
+        content_count=3,
+        text_length=14,
+        text_hash=3425950320,
+        stop_visible=True,
+        blocked=False,
+        rate_limited=False,
+        text="Đoạn 1\n\nĐoạn 2",
+    )
+    assert auto.PageState.from_dict({}) == auto.PageState()
+
+
+class StubPage:
+    def __init__(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.calls = []
+
+    def evaluate(self, script, args):
+        self.calls.append((script, args))
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def test_probe_page_state_passes_selectors_to_script():
+    page = StubPage({"turnCount": 1, "stopVisible": True})
+    state = auto.probe_page_state(page, with_text=True)
+    assert state.turn_count == 1 and state.stop_visible
+    script, args = page.calls[0]
+    assert script == auto.PAGE_STATE_SCRIPT
+    assert args == [
+        auto.RESPONSE_TURN_SELECTOR,
+        auto.RESPONSE_CONTENT_SELECTOR,
+        auto.RESPONSE_CHUNK_SEPARATOR,
+        [("button", "Stop")],
+        [("button", "Content blocked")],
+        True,
+        False,
+    ]
+
+
+def test_probe_page_state_returns_none_on_playwright_error():
+    page = StubPage(error=auto.Error("Execution context was destroyed"))
+    assert auto.probe_page_state(page) is None
+    assert auto.probe_page_state(StubPage(None)) == auto.PageState()
+
+
+def test_read_page_state_retries_failed_probes(monkeypatch):
+    monkeypatch.setattr(auto.time, "sleep", lambda seconds: None)
+    page = StubPage(error=auto.Error("Target closed"))
+    assert auto.read_page_state(page) == auto.PageState()
+    assert len(page.calls) == auto.PROBE_RETRIES
+
+    results = [None, None, auto.PageState(turn_count=2)]
+    monkeypatch.setattr(auto, "probe_page_state", lambda page, **kwargs: results.pop(0))
+    assert auto.read_page_state(object()).turn_count == 2
+    assert results == []
+
+
+def test_failed_probe_is_not_treated_as_finished_generation(monkeypatch):
+    monkeypatch.setattr(auto.time, "sleep", lambda seconds: None)
+    results = [None, auto.PageState(stop_visible=True), None, auto.PageState()]
+    monkeypatch.setattr(auto, "probe_page_state", lambda page, **kwargs: results.pop(0))
+    assert auto.is_generating(object())
+    assert auto.wait_for_generation_end(FakePage(0), timeout=60)
+    assert results == []
+
+
+def test_selector_text_filters_splits_has_text_and_plain_selectors():
+    assert auto.selector_text_filters("button:has-text('Stop'), .stop-button") == [
+        ("button", "Stop"),
+        (".stop-button", ""),
+    ]
+    assert auto.selector_text_filters(':has-text("Content blocked")') == [("*", "Content blocked")]
+
+
+class FakeContext:
+    def __init__(self, browser):
+        self.browser = browser
+        self.pages = []
+        self.closed = False
+
+    def new_page(self):
+        page = FakePage(len(self.pages))
+        self.pages.append(page)
+        return page
+
+    def storage_state(self, path):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.contexts = []
+        self.closed = False
+
+    def is_connected(self):
+        return not self.closed
+
+    def new_context(self, storage_state):
+        context = FakeContext(self)
+        self.contexts.append(context)
+        return context
+
+    def close(self):
+        self.closed = True
+
+
+class FakeChromium:
+    def __init__(self):
+        self.browsers = []
+
+    def launch(self, **kwargs):
+        browser = FakeBrowser()
+        self.browsers.append(browser)
+        return browser
+
+
+def test_recycle_keeps_shared_browser_in_storage_state_mode(monkeypatch, tmp_path):
+    auth_path = tmp_path / "auth.json"
+    auth_path.write_text("{}", encoding="utf-8")
+    chromium = FakeChromium()
+    playwright = type("FakePlaywright", (), {"chromium": chromium})()
+    monkeypatch.setattr(auto.BrowserSessionManager, "_open_ai_studio", lambda self, page, prompt: None)
+    manager = auto.BrowserSessionManager(
+        playwright, [str(auth_path)], pages_per_context=2, use_storage_state=True
+    )
+    manager.launch_initial(None)
+    first_context = chromium.browsers[0].contexts[0]
+
+    manager.recycle(None)
+
+    assert len(chromium.browsers) == 1
+    assert not chromium.browsers[0].closed
+    assert first_context.closed
+    assert len(chromium.browsers[0].contexts) == 2
+    assert len(manager.pages) == 2 and manager.pages[0] is not first_context.pages[0]
+
+
+class FakeProcess:
+    def __init__(self, name, rss_mb, children=()):
+        self._name = name
+        self._rss = rss_mb * 1024 * 1024
+        self._children = list(children)
+
+    def name(self):
+        return self._name
+
+    def memory_info(self):
+        return type("MemoryInfo", (), {"rss": self._rss})()
+
+    def children(self, recursive=False):
+        return self._children
+
+
+def test_resolve_auth_state_paths_expands_folders_and_deduplicates(tmp_path):
+    folder = tmp_path / "auth"
+    folder.mkdir()
+    for name in ("b.json", "a.json", "notes.txt"):
+        (folder / name).write_text("{}", encoding="utf-8")
+    extra = str(folder / "a.json")
+    args = auto.argparse.Namespace(auth_states=f"{folder}, ,{extra}")
+    assert auto.resolve_auth_state_paths(args) == [str(folder / "a.json"), str(folder / "b.json")]
+    assert auto.resolve_auth_state_paths(auto.argparse.Namespace(auth_states=None)) == []
+
+
+def test_sample_browser_rss_counts_only_browser_processes(monkeypatch):
+    descendants = [
+        FakeProcess("node", 300),
+        FakeProcess("chrome", 200),
+        FakeProcess("chrome_crashpad_handler", 5),
+        FakeProcess("Chromium Helper (Renderer)", 150),
+        FakeProcess("python3", 80),
+    ]
+    fake_psutil = type(
+        "FakePsutil",
+        (),
+        {"Error": Exception, "Process": staticmethod(lambda pid: FakeProcess("python", 50, descendants))},
+    )
+    monkeypatch.setattr(auto, "psutil", fake_psutil)
+    assert auto.sample_browser_rss_mb() == 355
+    monkeypatch.setattr(auto, "psutil", None)
+    assert auto.sample_browser_rss_mb() is None
+
+
+def test_click_strategy_cache_orders_by_last_success_per_profile():
+    cache = auto.ClickStrategyCache()
+    cache.profile = "/profiles/a"
+    assert cache.order("button.run") == ["click", "force", "dispatch"]
+
+    cache.record("button.run", "click", False)
+    cache.record("button.run", "dispatch", True)
+    assert cache.order("button.run") == ["dispatch", "click", "force"]
+    assert cache.order("button.other") == ["click", "force", "dispatch"]
+
+    cache.profile = "/profiles/b"
+    assert cache.order("button.run") == ["click", "force", "dispatch"]
+
+    cache.profile = "/profiles/a"
+    cache.record("button.run", "dispatch", True)
+    cache.record("button.run", "dispatch", False)
+    assert cache.order("button.run") == ["dispatch", "click", "force"]
+    assert cache.report() == [
+        "a | button.run | click: 0/1 thành công (0%)",
+        "a | button.run | dispatch: 2/3 thành công (66%)",
+    ]
+
+
+class FakeLocator:
+    """Có ``repr`` giống Locator của Playwright: selector được in bằng ``repr`` của Python."""
+
+    def __init__(self, selector):
+        self.selector = selector
+
+    def __repr__(self):
+        return f"<Locator frame=<Frame name= url='https://aistudio.google.com/'> selector={self.selector!r}>"
+
+
+def test_locator_selector_reads_locator_repr():
+    locator = FakeLocator('button[aria-label="Run"] >> internal:has-text="Run"i')
+    assert auto.locator_selector(locator, "nút") == 'button[aria-label="Run"] >> internal:has-text="Run"i'
+
+    mixed = FakeLocator("""button[aria-label="Don't stop"]""")
+    assert auto.locator_selector(mixed, "nút") == """button[aria-label="Don't stop"]"""
+
+    assert auto.locator_selector(object(), "nút Run") == "nút Run"
+
+
+def test_harvest_pending_submissions_runs_every_row_at_startup(monkeypatch, tmp_path):
+    paths = auto.novel_paths(str(tmp_path / "truyen"))
+    os.makedirs(paths.input_folder)
+    os.makedirs(paths.output_folder)
+    for name in ("c1.txt", "c2.txt", "c3.txt"):
+        with open(os.path.join(paths.input_folder, name), "w", encoding="utf-8") as handle:
+            handle.write("原文")
+    with open(os.path.join(paths.output_folder, "c3.txt"), "w", encoding="utf-8") as handle:
+        handle.write("đã dịch")
+    initialise_database(paths.db_path)
+    with connect(paths.db_path) as conn:
+        for name in ("c1.txt", "c2.txt", "c3.txt", "c4.txt"):
+            record_submission(
+                conn,
+                name,
+                prompt_hash=auto.compute_prompt_hash("prompt"),
+                chat_url=f"https://aistudio.google.com/prompts/{name}",
+            )
+
+    events = []
+    monkeypatch.setattr(auto, "build_chapter_prompt", lambda db_path, chapter_text: "prompt")
+    monkeypatch.setattr(
+        auto,
+        "harvest_saved_response",
+        lambda page, chat_url: events.append(("open", chat_url.rsplit("/", 1)[1]))
+        or ("bản dịch" if chat_url.endswith("c1.txt") else None),
+    )
+
+    def fake_complete(page, db_path, filename, prompt, response_text, output_path, system_prompt):
+        events.append(("done", filename, response_text))
+        auto.forget_submission(db_path, filename)
+        return True
+
+    monkeypatch.setattr(auto, "complete_translation", fake_complete)
+    monkeypatch.setattr(auto, "reopen_new_chat", lambda page, system_prompt: events.append(("reopen",)))
+    monkeypatch.setattr(auto, "reset_chat_session", lambda page, system_prompt: True)
+    monkeypatch.setattr(auto, "remember_translation", lambda *args, **kwargs: True)
+    try:
+        manager = FakeSessionManager(1, events)
+        assert auto.harvest_pending_submissions(manager, paths, None)
+        assert events == [
+            ("open", "c1.txt"),
+            ("done", "c1.txt", "bản dịch"),
+            ("open", "c2.txt"),
+            ("reopen",),
+        ]
+        auto.db_writer.shared_writer().wait(paths.db_path)
+        assert list_pending_submissions(auto.store_for(paths.db_path).conn) == []
+    finally:
+        close_stores()
+
+
+def test_wait_for_generation_end_reports_saved_chat_url_without_blocking(monkeypatch):
+    page = FakePage(0)
+    probes = []
+
+    def fake_probe(probed_page, **kwargs):
+        probes.append(probed_page.url)
+        if len(probes) == 2:
+            probed_page.url = "https://aistudio.google.com/prompts/abc123"
+        return auto.PageState(stop_visible=len(probes) < 4)
+
+    monkeypatch.setattr(auto, "probe_page_state", fake_probe)
+    monkeypatch.setattr(auto.time, "sleep", lambda seconds: None)
+    urls = []
+    assert auto.wait_for_generation_end(page, timeout=60, on_chat_url=urls.append)
+    assert urls == ["https://aistudio.google.com/prompts/abc123"]
+    assert len(probes) == 4
+
+
+def test_submission_writes_go_through_the_writer_thread(monkeypatch, tmp_path):
+    db_path = str(tmp_path / "story.sqlite")
+    initialise_database(db_path)
+    writer_threads = []
+    real_record = auto.record_submission
+
+    def spy_record(conn, *args, **kwargs):
+        writer_threads.append(threading.current_thread().name)
+        real_record(conn, *args, **kwargs)
+
+    monkeypatch.setattr(auto, "record_submission", spy_record)
+    auto.remember_submission(db_path, "c1.txt", "hash", "https://aistudio.google.com/prompts/1", None).result()
+    auto.forget_submission(db_path, "c1.txt").result()
+    assert writer_threads == ["db-writer"]
+    with connect(db_path) as conn:
+        assert list_pending_submissions(conn) == []
+
+
+def test_retranslate_changed_chapters_is_capped_and_skips_missing_sources(monkeypatch, tmp_path):
+    paths = auto.novel_paths(str(tmp_path / "truyen-a"))
+    os.makedirs(paths.input_folder)
+    os.makedirs(paths.output_folder)
+    index_db = str(tmp_path / "index.sqlite")
+    with auto.novel_db.connect(index_db) as conn:
+        novel_id = auto.novel_db.upsert_novel(
+            conn, title="A", slug="truyen-a", index_url="https://a/", root_path=str(tmp_path / "truyen-a")
+        )
+        for index in (1, 2, 3):
+            filename = f"chuong_{index:03d}.txt"
+            for folder in (paths.input_folder, paths.output_folder):
+                with open(os.path.join(folder, filename), "w", encoding="utf-8") as handle:
+                    handle.write("mới")
+            auto.novel_db.record_chapter(
+                conn,
+                novel_id=novel_id,
+                chapter_index=index,
+                title=filename,
+                source_url=f"https://a/{index}.html",
+                file_path=os.path.join(paths.input_folder, filename),
+                content_hash="mới",
+            )
+            chapter_id = conn.execute("SELECT id FROM chapters WHERE chapter_index = ?", (index,)).fetchone()[0]
+            auto.novel_db.record_translation(
+                conn,
+                chapter_id,
+                translation_hash="t",
+                source_hash="cũ",
+                source_body=None if index == 1 else "cũ",
+            )
+
+    partial = []
+    monkeypatch.setattr(auto, "NOVEL_INDEX_DB", index_db)
+    monkeypatch.setattr(
+        auto,
+        "retranslate_partially",
+        lambda page, db_path, input_path, output_path, old_body, profile=None: partial.append(
+            os.path.basename(input_path)
+        )
+        or True,
+    )
+    monkeypatch.setattr(auto, "reset_chat_session", lambda page, system_prompt: True)
+    manager = FakeSessionManager(1, [])
+
+    monkeypatch.setattr(auto, "RETRANSLATE_BUDGET", 0)
+    assert auto.retranslate_changed_chapters(manager, paths, None)
+    assert partial == []
+
+    monkeypatch.setattr(auto, "RETRANSLATE_BUDGET", 1)
+    assert auto.retranslate_changed_chapters(manager, paths, None)
+    assert partial == ["chuong_002.txt"]
+    assert auto.RETRANSLATE_BUDGET == 0
@@ -0,0 +1,39 @@
+from chapter_diff import changed_ratio, diff_passages, splice_translation, split_segments
+from prompt_builder import build_partial_translation_prompt
+from response_parser import parse_partial_translation_response
+
+
+OLD = "他走了。她笑了！“你好吗？”天黑了。"
+
+
+def test_split_segments_keeps_closing_quotes():
+	assert split_segments(OLD) == ["他走了。", "她笑了！", "“你好吗？”", "天黑了。"]
+
+
+def test_diff_passages_reports_changed_and_inserted_sentences():
+	new = "他走了。她哭了！“你好吗？”天黑了。风起了。"
+	passages = [(passage.old, passage.new) for passage in diff_passages(OLD, new)]
+	assert passages == [("她笑了！", "她哭了！"), ("天黑了。", "天黑了。风起了。")]
+	assert 0 < changed_ratio(OLD, new) < 0.5
+	assert changed_ratio(OLD, OLD) == 0.0
+
+
+def test_splice_translation_replaces_unique_passages_only():
+	translation = "Hắn đi rồi. Nàng cười. Trời tối."
+	assert splice_translation(translation, [("Nàng cười.", "Nàng khóc.")]) == "Hắn đi rồi. Nàng khóc. Trời tối."
+	assert splice_translation(translation, [("Nàng hát.", "Nàng khóc.")]) is None
+	assert splice_translation("A. A.", [("A.", "B.")]) is None
+
+
+def test_partial_translation_prompt_and_response_round_trip():
+	prompt = build_partial_translation_prompt(
+		metadata_section="",
+		glossary_section="",
+		relationships_section="",
+		existing_translation="Hắn đi rồi. Nàng cười.",
+		changes=[("她笑了！", "她哭了！")],
+	)
+	assert "Nàng cười." in prompt
+	assert "- Bản gốc mới: 她哭了！" in prompt
+	response = "[THAY_THẾ]\n[CŨ]\nNàng cười.\n[/CŨ]\n[MỚI]\nNàng khóc.\n[/MỚI]\n[/THAY_THẾ]"
+	assert parse_partial_translation_response(response) == [("Nàng cười.", "Nàng khóc.")]
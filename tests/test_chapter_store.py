@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+import chapter_store
+import cralw
+
+
+@pytest.fixture(autouse=True)
+def close_stores():
+	yield
+	chapter_store.close_stores()
+
+
+def make_novel(tmp_path):
+	novel_root, goc, dich = cralw.ensure_directories(str(tmp_path / "truyen"), "truyen-a")
+	cralw.write_chapter_file(os.path.join(goc, "chuong_001.txt"), "第一章", "一二三")
+	with open(os.path.join(dich, "chuong_001.txt"), "w", encoding="utf-8") as handle:
+		handle.write("Chương 1")
+	return novel_root, goc, dich
+
+
+def test_plain_files_are_used_until_novel_is_packed(tmp_path):
+	novel_root, goc, _ = make_novel(tmp_path)
+	assert chapter_store.packed_store_for(novel_root) is None
+	assert chapter_store.text_sizes(goc) is None
+	assert chapter_store.list_texts(goc) == ["chuong_001.txt"]
+	assert chapter_store.read_text(os.path.join(goc, "chuong_001.txt")).endswith("一二三")
+
+
+def test_pack_routes_reads_and_writes_and_export_restores_files(tmp_path):
+	novel_root, goc, dich = make_novel(tmp_path)
+	assert chapter_store.pack_novel(novel_root, remove_files=True) == 2
+	assert os.listdir(goc) == []
+
+	cralw.write_chapter_file(os.path.join(goc, "chuong_002.txt"), "第二章", "四五六")
+	assert not os.path.exists(os.path.join(goc, "chuong_002.txt"))
+	assert chapter_store.list_texts(goc) == ["chuong_001.txt", "chuong_002.txt"]
+	assert chapter_store.list_texts(dich) == ["chuong_001.txt"]
+	assert chapter_store.read_text(os.path.join(dich, "chuong_001.txt")) == "Chương 1"
+	assert chapter_store.text_exists(os.path.join(goc, "chuong_002.txt"))
+	assert not chapter_store.text_exists(os.path.join(dich, "chuong_002.txt"))
+
+	sizes = cralw.scan_file_sizes([goc])
+	assert sizes[os.path.join(os.path.normpath(goc), "chuong_002.txt")] == len(
+		chapter_store.read_text(os.path.join(goc, "chuong_002.txt")).encode("utf-8")
+	)
+
+	assert chapter_store.export_novel(novel_root, remove_store=True) == 3
+	assert not os.path.exists(os.path.join(novel_root, chapter_store.PACKED_DB_NAME))
+	with open(os.path.join(goc, "chuong_002.txt"), encoding="utf-8") as handle:
+		assert handle.read().endswith("四五六")
+
+
+def test_unpacked_lookup_is_cached_until_pack_and_export(tmp_path, monkeypatch):
+	novel_root, goc, dich = make_novel(tmp_path)
+	store_path = os.path.join(novel_root, chapter_store.PACKED_DB_NAME)
+	assert chapter_store.packed_store_for(novel_root) is None
+
+	checked = []
+	real_exists = os.path.exists
+	monkeypatch.setattr(
+		chapter_store.os.path, "exists", lambda path: checked.append(path) or real_exists(path)
+	)
+	for _ in range(3):
+		chapter_store.read_text(os.path.join(goc, "chuong_001.txt"))
+		chapter_store.write_text(os.path.join(dich, "chuong_002.txt"), "Chương 2")
+	assert store_path not in checked
+
+	chapter_store.pack_novel(novel_root)
+	chapter_store.write_text(os.path.join(dich, "chuong_003.txt"), "Chương 3")
+	assert not real_exists(os.path.join(dich, "chuong_003.txt"))
+
+	chapter_store.export_novel(novel_root, remove_store=True)
+	assert chapter_store.packed_store_for(novel_root) is None
+	assert chapter_store.text_exists(os.path.join(dich, "chuong_003.txt"))
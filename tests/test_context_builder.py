@@ -1,5 +1,6 @@
 from context_builder import build_context_sections, detect_relevant_characters
 from story_db import (
+    StoryStore,
     connect,
     initialise_database,
     insert_glossary_entries,
@@ -150,3 +151,45 @@ def test_build_context_sections_includes_relationship_when_both_characters_prese
             conn, "Trương Tam và Lý Tứ cùng xuất hiện trong chương"
         )
     assert "Bạn bè" in relationships
+
+
+def test_story_store_reuses_snapshot_until_data_changes(tmp_path):
+    db_path = str(tmp_path / "story.sqlite")
+    setup_sample_db(db_path)
+    store = StoryStore(db_path)
+    try:
+        first = store.snapshot()
+        assert store.snapshot() is first
+
+        with connect(db_path) as other:
+            insert_glossary_entries(
+                other,
+                [{"original_name": "王五", "vietnamese_name": "Vương Ngũ"}],
+            )
+        refreshed = store.snapshot()
+        assert refreshed is not first
+        assert "Vương Ngũ" in [row["vietnamese_name"] for row in refreshed.glossary]
+
+        with store.transaction() as conn:
+            write_metadata(conn, {"genre": "Đô thị"})
+        assert store.snapshot().metadata["genre"] == "Đô thị"
+
+        with store.transaction(invalidate=False):
+            pass
+        assert store.snapshot() is store.snapshot()
+    finally:
+        store.close()
+
+
+def test_build_context_sections_same_output_from_store(tmp_path):
+    db_path = str(tmp_path / "story.sqlite")
+    setup_sample_db(db_path)
+    store = StoryStore(db_path)
+    try:
+        for text in ("張三 gặp 李四", "李四 bước vào căn phòng", "Không có ai quen"):
+            with connect(db_path) as conn:
+                expected = build_context_sections(conn, text)
+            assert build_context_sections(store, text) == expected
+    finally:
+        store.close()
+
@@ -1,3 +1,8 @@
+import os
+import time
+
+import pytest
+
 import novel_db
 import cralw
 
@@ -112,3 +117,393 @@ def test_load_input_urls(tmp_path):
 		"https://example.com/book/1/",
 		"https://example.com/book/2/",
 	]
+
+
+def test_download_chapters_records_any_completion_order(tmp_path, monkeypatch):
+	def fake_download(session, chapter, goc_folder, min_length, throttle=None, page_cache=None):
+		if chapter.index == 2:
+			raise RuntimeError("quá ngắn")
+		return f"{goc_folder}/{chapter.index}.txt", f"hash{chapter.index}", chapter.title
+
+	monkeypatch.setattr(cralw, "download_chapter", fake_download)
+	monkeypatch.setattr(cralw.time, "sleep", lambda _: None)
+	chapters = [
+		cralw.ChapterLink(index=idx, title=f"Chương {idx}", url=f"https://example.com/book/1/{idx}.html")
+		for idx in range(1, 6)
+	]
+	options = cralw.CrawlOptions(workers=3, throttle=cralw.HostThrottle(max_concurrency=3, min_gap=0.0))
+	results = list(cralw.download_chapters(None, chapters, str(tmp_path), 10, options))
+	succeeded = sorted(chapter.index for chapter, result, _ in results if result)
+	failed = [chapter.index for chapter, result, error in results if error]
+	assert succeeded == [1, 3, 4, 5]
+	assert failed == [2]
+
+
+class FakeResponse:
+	def __init__(self, status_code, text="", headers=None, url="https://example.com/", apparent_encoding="utf-8"):
+		self.status_code = status_code
+		self.text = text
+		self.content = text.encode("utf-8")
+		self.url = url
+		self.headers = {"Content-Type": "text/html; charset=utf-8", **(headers or {})}
+		self.apparent_encoding = apparent_encoding
+		self.encoding = "utf-8"
+
+
+class FakeSession:
+	def __init__(self, responses):
+		self.responses = list(responses)
+		self.sent_headers = []
+
+	def get(self, url, timeout=None, headers=None):
+		self.sent_headers.append(headers or {})
+		return self.responses.pop(0)
+
+
+def test_fetch_changed_index_uses_validators_and_latest_url(tmp_path):
+	index_url = "https://example.com/book/1/"
+	head = (
+		"<html><head><meta content='https://example.com/book/1/2.html' "
+		"property=\"og:novel:latest_chapter_url\"></head><body></body></html>"
+	)
+	with novel_db.connect(str(tmp_path / "db.sqlite")) as conn:
+		novel_id = novel_db.upsert_novel(
+			conn, title="Truyện A", slug="truyen-a", index_url=index_url, root_path=str(tmp_path)
+		)
+		for idx in (1, 2):
+			novel_db.record_chapter(
+				conn,
+				novel_id=novel_id,
+				chapter_index=idx,
+				title=f"Chương {idx}",
+				source_url=f"{index_url}{idx}.html",
+				file_path=str(tmp_path / f"{idx}.txt"),
+				content_hash=None,
+			)
+		novel_db.update_novel_scan(
+			conn,
+			novel_id,
+			last_scan_at=None,
+			latest_index=2,
+			latest_chapter_url=f"{index_url}2.html",
+			index_etag='"v1"',
+		)
+		novel = novel_db.fetch_novel_by_url(conn, index_url)
+
+		session = FakeSession([FakeResponse(304)])
+		assert cralw.fetch_changed_index(session, conn, novel) is None
+		assert session.sent_headers[0] == {"If-None-Match": '"v1"'}
+
+		session = FakeSession([FakeResponse(200, head, {"ETag": '"v2"'})])
+		assert cralw.fetch_changed_index(session, conn, novel) is None
+		assert novel_db.fetch_novel_by_url(conn, index_url)["index_etag"] == '"v2"'
+
+		changed = head.replace("2.html", "3.html")
+		session = FakeSession([FakeResponse(200, changed)])
+		page = cralw.fetch_changed_index(session, conn, novel)
+		assert page is not None and page.html == changed
+
+
+def test_determine_new_chapters_trusts_stored_size_and_verifies_disk(tmp_path):
+	goc = tmp_path / "goc"
+	goc.mkdir()
+	(goc / "chuong_001.txt").write_text("Nội dung", encoding="utf-8")
+	with novel_db.connect(str(tmp_path / "db.sqlite")) as conn:
+		novel_id = novel_db.upsert_novel(
+			conn, title="Test", slug="test", index_url="https://example.com/book/1/", root_path=str(tmp_path)
+		)
+		for idx in (1, 2):
+			novel_db.record_chapter(
+				conn,
+				novel_id=novel_id,
+				chapter_index=idx,
+				title=f"Chương {idx}",
+				source_url=f"https://example.com/book/1/{idx}.html",
+				file_path=str(goc / f"chuong_{idx:03d}.txt"),
+				content_hash="hash",
+				file_size=12,
+			)
+		existing_map = novel_db.fetch_chapter_map(conn, novel_id)
+
+	chapters = [
+		cralw.ChapterLink(index=idx, title=f"Chương {idx}", url=f"https://example.com/book/1/{idx}.html")
+		for idx in (1, 2, 3)
+	]
+	assert [c.index for c in cralw.determine_new_chapters(existing_map, chapters)] == [3]
+	disk_sizes = cralw.scan_file_sizes([str(goc), str(tmp_path / "absent")])
+	verified = cralw.determine_new_chapters(existing_map, chapters, disk_sizes)
+	assert [c.index for c in verified] == [2, 3]
+
+
+def test_parse_chapter_html_picks_first_selector_and_strips_scripts():
+	page = (
+		"<html><head><meta charset='gbk'><title>Trang</title></head><body>"
+		"<div class='bookname'>书名</div><h1> 第一章 </h1>"
+		"<div id='content'>不用</div>"
+		"<div class='box content'>少年<script>ads()</script><p>握剑</p><style>p{}</style></div>"
+		"</body></html>"
+	).encode("gbk")
+	title, body = cralw.parse_chapter_html(page)
+	assert title == "第一章"
+	assert body == "少年 握剑"
+	assert cralw.parse_chapter_html(b"<html><body><p>x</p></body></html>")[1] is None
+
+
+def test_encoding_cache_prefers_header_and_meta_then_caches_detection():
+	cache = cralw.EncodingCache()
+	header = FakeResponse(200, "<html></html>")
+	header.encoding = "GBK"
+	assert cache.resolve(header) == "gbk"
+
+	meta = FakeResponse(200, "<meta charset='big5'>", headers={"Content-Type": "text/html"})
+	assert cache.resolve(meta) == "big5"
+
+	bare = FakeResponse(200, "<p></p>", headers={"Content-Type": "text/html"}, apparent_encoding="GB2312")
+	assert cache.resolve(bare) == "gb2312"
+	later = FakeResponse(200, "<p></p>", headers={"Content-Type": "text/html"}, apparent_encoding="ascii")
+	assert cache.resolve(later) == "gb2312"
+
+
+class UrlSession:
+	def __init__(self, pages):
+		self.pages = pages
+		self.requested = []
+
+	def get(self, url, timeout=None, headers=None):
+		self.requested.append(url)
+		response = FakeResponse(200, self.pages[url], url=url)
+		response.raise_for_status = lambda: None
+		return response
+
+
+def test_extract_chapter_follows_paginated_pages_in_order():
+	base = "https://uukanshu.cc/book/1/100"
+
+	def page(body, links):
+		anchors = "".join(f"<a href='{link}'>{link}</a>" for link in links)
+		return f"<html><body><h1>第一章</h1><div class='readcotent'>{body}</div>{anchors}</body></html>"
+
+	session = UrlSession(
+		{
+			f"{base}.html": page("一", ["100_2.html", "100_3.html", "101.html"]),
+			f"{base}_2.html": page("二", ["100.html", "100_3.html", "100_4.html"]),
+			f"{base}_3.html": page("三", ["100_2.html"]),
+			f"{base}_4.html": page("四", []),
+		}
+	)
+	title, body = cralw.extract_chapter(f"{base}.html", session)
+	assert title == "第一章"
+	assert body == "一 二 三 四"
+	assert sorted(session.requested) == sorted(session.pages)
+
+
+
+def test_download_retries_back_off_and_record_short_body_with_throttle(tmp_path, monkeypatch):
+	url = "https://uukanshu.cc/book/1/100.html"
+	session = UrlSession({url: "<html><body><h1>第一章</h1><div class='readcotent'>短</div></body></html>"})
+	throttle = cralw.HostThrottle(max_concurrency=4, min_gap=0.0)
+	sleeps = []
+	monkeypatch.setattr(cralw.time, "sleep", sleeps.append)
+	chapter = cralw.ChapterLink(index=1, title="第一章", url=url)
+
+	with pytest.raises(RuntimeError, match="quá ngắn"):
+		cralw.download_chapter_with_retries(session, chapter, str(tmp_path), 400, throttle)
+
+	assert sleeps == [1.5, 3.0]
+	state = throttle._state("uukanshu.cc")
+	assert (state.successes, state.failures) == (0, 3)
+
+
+def test_download_chapters_keeps_a_bounded_window_of_downloads(monkeypatch, tmp_path):
+	started = []
+
+	def fake_download(session, chapter, goc_folder, min_length, throttle, page_cache=None):
+		started.append(chapter.index)
+		return chapter.url, "hash", chapter.title
+
+	monkeypatch.setattr(cralw, "download_chapter_with_retries", fake_download)
+	chapters = [cralw.ChapterLink(index=index, title=f"{index}", url=f"https://a/{index}.html") for index in range(1, 11)]
+	options = cralw.CrawlOptions(workers=2, max_in_flight=3)
+	results = cralw.download_chapters(None, chapters, str(tmp_path), 10, options)
+
+	next(results)
+	time.sleep(0.1)
+	assert len(started) == 3
+	assert len(list(results)) == 9
+	assert sorted(started) == list(range(1, 11))
+
+def test_sync_registered_novels_runs_novels_in_parallel_with_own_connections(tmp_path, monkeypatch):
+	with novel_db.connect(str(tmp_path / "index.sqlite")) as conn:
+		for idx in range(1, 4):
+			novel_db.upsert_novel(
+				conn,
+				title=f"Truyện {idx}",
+				slug=f"truyen-{idx}",
+				index_url=f"https://uukanshu.cc/book/{idx}/",
+				root_path=str(tmp_path / f"truyen-{idx}"),
+			)
+		conn.commit()
+
+		barrier = cralw.threading.Barrier(3, timeout=5)
+		worker_conns = []
+
+		def fake_sync(session, worker_conn, *, index_url, root_folder, min_length, options, index_page=None):
+			worker_conns.append(worker_conn)
+			barrier.wait()
+			slug = index_url.rstrip("/").rsplit("/", 1)[-1]
+			if index_url.endswith("/2/"):
+				raise RuntimeError("lỗi mạng")
+			worker_conn.execute(
+				"UPDATE novels SET status = ? WHERE slug = ?", (f"đang-{slug}", f"truyen-{slug}")
+			)
+			worker_conn.commit()
+			return f"truyen-{slug}", int(slug)
+
+		monkeypatch.setattr(cralw, "sync_single_novel", fake_sync)
+		options = cralw.CrawlOptions(novel_workers=3, verify_files=True)
+		durations = {}
+		results = cralw.sync_registered_novels(
+			None, conn, root_folder=str(tmp_path), min_length=10, options=options, durations=durations
+		)
+		rows = {row["slug"]: row for row in novel_db.fetch_novels(conn)}
+		statuses = {slug: row["status"] for slug, row in rows.items()}
+		failed_next_check = cralw.scheduler.parse_timestamp(rows["truyen-2"]["next_check_at"])
+
+	assert len({id(worker_conn) for worker_conn in worker_conns}) == 3
+	assert conn not in worker_conns
+	assert statuses == {"truyen-1": "đang-1", "truyen-2": None, "truyen-3": "đang-3"}
+	# Truyện lỗi vẫn được lùi lịch kiểm tra để --watch không gọi lại ngay.
+	assert failed_next_check > cralw.scheduler.utc_now()
+	assert results == {"truyen-1": 1, "truyen-3": 3}
+	assert sorted(durations) == ["truyen-1", "truyen-3"]
+	summary = cralw.summarise_new_chapters(results, {"truyen-1": 12.4})
+	assert summary == "truyen-1: +1 (12.4s), truyen-3: +3"
+
+
+def test_watch_backs_off_failed_novel_and_never_busy_loops(tmp_path, monkeypatch):
+	class StopWatch(Exception):
+		pass
+
+	with novel_db.connect(str(tmp_path / "index.sqlite")) as conn:
+		novel_db.upsert_novel(
+			conn,
+			title="Truyện lỗi",
+			slug="truyen-loi",
+			index_url="https://uukanshu.cc/book/9/",
+			root_path=str(tmp_path / "truyen-loi"),
+		)
+		conn.commit()
+
+		fetches = []
+
+		def failing_fetch(session, conn, novel, **kwargs):
+			fetches.append(novel["slug"])
+			raise RuntimeError("site không phản hồi")
+
+		sleeps = []
+
+		def fake_sleep(seconds):
+			sleeps.append(seconds)
+			if len(sleeps) == 3:
+				raise StopWatch
+
+		monkeypatch.setattr(cralw, "fetch_changed_index", failing_fetch)
+		monkeypatch.setattr(cralw.time, "sleep", fake_sleep)
+		with pytest.raises(StopWatch):
+			cralw.watch_registered_novels(
+				None,
+				conn,
+				root_folder=str(tmp_path),
+				min_length=10,
+				options=cralw.CrawlOptions(novel_workers=1),
+			)
+
+	assert fetches == ["truyen-loi"]
+	assert all(seconds >= cralw.MIN_WATCH_SLEEP for seconds in sleeps)
+	assert sleeps[1] >= cralw.scheduler.MIN_CHECK_INTERVAL - 5
+
+
+def test_novel_db_uses_wal_and_skips_schema_when_version_matches(tmp_path):
+	db_path = str(tmp_path / "index.sqlite")
+	legacy = cralw.sqlite3.connect(db_path)
+	legacy.execute("CREATE TABLE chapters (id INTEGER PRIMARY KEY, novel_id INTEGER, source_url TEXT)")
+	legacy.commit()
+	legacy.close()
+
+	with novel_db.connect(db_path) as conn:
+		assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+		assert conn.execute("PRAGMA user_version").fetchone()[0] == novel_db.SCHEMA_VERSION
+		columns = {row["name"] for row in conn.execute("PRAGMA table_info(chapters)")}
+		assert "file_size" in columns
+		conn.execute("DROP TABLE pages")
+
+	with novel_db.connect(db_path) as conn:
+		tables = {row["name"] for row in conn.execute("SELECT name FROM sqlite_master")}
+		assert "pages" not in tables
+
+
+def test_commit_batcher_makes_rows_visible_to_other_readers(tmp_path):
+	db_path = str(tmp_path / "index.sqlite")
+	with novel_db.connect(db_path) as writer, novel_db.connect(db_path) as reader:
+		novel_id = novel_db.upsert_novel(
+			writer, title="Truyện", slug="truyen", index_url="https://uukanshu.cc/book/1/", root_path="/x"
+		)
+		batcher = novel_db.CommitBatcher(writer, every=2, interval=3600)
+		for idx in (1, 2, 3):
+			novel_db.record_chapter(
+				writer,
+				novel_id=novel_id,
+				chapter_index=idx,
+				title=f"Chương {idx}",
+				source_url=f"https://uukanshu.cc/book/1/{idx}.html",
+				file_path=f"/x/{idx}.txt",
+				content_hash=None,
+			)
+			batcher.tick()
+		assert novel_db.count_chapters(reader, novel_id) == 2
+		batcher.flush()
+		assert novel_db.count_chapters(reader, novel_id) == 3
+
+
+def test_translation_progress_and_stale_chapters(tmp_path):
+	novel_root, goc_folder, _ = cralw.ensure_directories(str(tmp_path / "truyen"), "truyen-a")
+	with novel_db.connect(str(tmp_path / "index.sqlite")) as conn:
+		novel_id = novel_db.upsert_novel(
+			conn, title="Truyện A", slug="truyen-a", index_url="https://uukanshu.cc/book/1/", root_path=novel_root
+		)
+
+		def download(index, body):
+			path = f"{goc_folder}/{cralw.make_chapter_filename(index)}"
+			cralw.write_chapter_file(path, f"第{index}章", body)
+			novel_db.record_chapter(
+				conn,
+				novel_id=novel_id,
+				chapter_index=index,
+				title=f"第{index}章",
+				source_url=f"https://uukanshu.cc/book/1/{index}.html",
+				file_path=path,
+				content_hash=novel_db.hash_chapter_body(body),
+			)
+			return path
+
+		first = download(1, "一二三")
+		download(2, "四五六")
+		with open(first, encoding="utf-8") as handle:
+			source_text = handle.read()
+		chapter = novel_db.find_chapter_by_file(
+			conn, os.path.abspath(novel_root), os.path.basename(first)
+		)
+		assert chapter["chapter_index"] == 1
+		novel_db.record_translation(
+			conn, chapter["id"], translation_hash="t1", source_hash=novel_db.hash_chapter_text(source_text), elapsed=3.5,
+			source_body=novel_db.chapter_body(source_text),
+		)
+		assert novel_db.fetch_translated_source(conn, chapter["id"]) == "一二三"
+
+		progress = novel_db.fetch_translation_progress(conn)[0]
+		assert (progress["total"], progress["translated"], progress["remaining"], progress["stale"]) == (2, 1, 1, 0)
+		assert [row["chapter_index"] for row in novel_db.fetch_untranslated_chapters(conn, novel_id)] == [2]
+
+		download(1, "一二三四")
+		assert [row["chapter_index"] for row in novel_db.fetch_stale_translations(conn)] == [1]
+		assert novel_db.fetch_translation_progress(conn)[0]["stale"] == 1
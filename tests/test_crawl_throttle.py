@@ -0,0 +1,88 @@
+import threading
+import time
+
+from crawl_throttle import AimdThrottle, HostThrottle, host_of, parse_retry_after
+
+
+def test_host_of_normalises_case():
+    assert host_of("https://UUKanshu.cc/book/1/2.html") == "uukanshu.cc"
+
+
+def test_slot_limits_concurrency_per_host():
+    throttle = HostThrottle(max_concurrency=2, min_gap=0.0)
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def worker():
+        nonlocal active, peak
+        with throttle.slot("https://example.com/a"):
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.05)
+            with lock:
+                active -= 1
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak == 2
+
+
+def test_slot_spaces_requests_to_same_host():
+    throttle = HostThrottle(max_concurrency=4, min_gap=0.05, jitter=0.0)
+    started = []
+    for _ in range(3):
+        with throttle.slot("https://example.com/a"):
+            started.append(time.monotonic())
+    gaps = [b - a for a, b in zip(started, started[1:])]
+    assert all(gap >= 0.045 for gap in gaps)
+
+
+def test_parse_retry_after_seconds_and_invalid():
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after("") is None
+    assert parse_retry_after("không phải ngày") is None
+
+
+def test_aimd_grows_additively_and_cuts_multiplicatively():
+    throttle = AimdThrottle(max_concurrency=4, min_gap=0.1)
+    url = "https://example.com/a"
+    for _ in range(20):
+        throttle.record(url, ok=True, elapsed=0.2, status=200)
+    state = throttle._state("example.com")
+    assert state.concurrency == 4
+    assert abs(state.delay - 0.1) < 1e-9
+
+    throttle.record(url, ok=False, elapsed=0.2, status=429)
+    assert state.concurrency == 2
+    assert state.delay > 0.1
+    assert state.throttled == 1
+
+    throttle.record(url, ok=True, elapsed=30.0, status=200)
+    assert state.concurrency == 1
+
+
+def test_retry_after_pauses_host():
+    throttle = HostThrottle(max_concurrency=2, min_gap=0.0)
+    url = "https://example.com/a"
+    throttle.record(url, ok=False, elapsed=0.1, status=503, retry_after=0.1)
+    started = time.monotonic()
+    with throttle.slot(url):
+        pass
+    assert time.monotonic() - started >= 0.09
+
+
+def test_record_rejected_turns_success_into_failure():
+    throttle = AimdThrottle(max_concurrency=4, min_gap=0.1)
+    url = "https://example.com/a"
+    for _ in range(20):
+        throttle.record(url, ok=True, elapsed=0.2, status=200)
+    state = throttle._state("example.com")
+    throttle.record_rejected(url)
+    assert (state.successes, state.failures) == (19, 1)
+    assert state.concurrency == 2
+    assert state.delay > 0.1
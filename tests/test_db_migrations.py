@@ -0,0 +1,95 @@
+import sqlite3
+
+import pytest
+
+import db_migrations
+import novel_db
+import story_db
+
+
+def test_migrate_runs_each_migration_once():
+	calls = []
+	migrations = (
+		("CREATE TABLE items (id INTEGER PRIMARY KEY)",),
+		(lambda conn: calls.append("second"), "CREATE INDEX idx_items_id ON items(id)"),
+	)
+	conn = sqlite3.connect(":memory:")
+	assert db_migrations.migrate(conn, migrations) == 2
+	assert db_migrations.migrate(conn, migrations) == 2
+	assert calls == ["second"]
+	assert db_migrations.schema_version(conn) == 2
+
+
+def test_failed_migration_rolls_back_and_keeps_version():
+	migrations = (
+		("CREATE TABLE items (id INTEGER PRIMARY KEY)",),
+		("CREATE TABLE extra (id INTEGER)", "INSERT INTO missing VALUES (1)"),
+	)
+	conn = sqlite3.connect(":memory:")
+	with pytest.raises(sqlite3.OperationalError):
+		db_migrations.migrate(conn, migrations)
+	assert db_migrations.schema_version(conn) == 1
+	tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+	assert tables == {"items"}
+
+
+def test_story_db_upgrades_legacy_file_with_indexes(tmp_path):
+	db_path = str(tmp_path / "story_data.sqlite")
+	legacy = sqlite3.connect(db_path)
+	for statement in story_db.SCHEMA_STATEMENTS:
+		legacy.execute(statement)
+	legacy.execute("INSERT INTO Glossary(original_name, vietnamese_name) VALUES('李', 'Lý')")
+	legacy.commit()
+	legacy.close()
+
+	with story_db.connect(db_path) as conn:
+		assert db_migrations.schema_version(conn) == story_db.SCHEMA_VERSION
+		indexes = {row["name"] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+		assert "idx_relationships_char2" in indexes
+		assert [row["vietnamese_name"] for row in story_db.list_glossary_entries(conn)] == ["Lý"]
+
+
+def test_novel_db_adds_columns_missing_from_legacy_file(tmp_path):
+	db_path = str(tmp_path / "novel_index.sqlite")
+	legacy = sqlite3.connect(db_path)
+	legacy.execute(
+		"CREATE TABLE novels (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, slug TEXT NOT NULL UNIQUE,"
+		" index_url TEXT NOT NULL UNIQUE, root_path TEXT NOT NULL, created_at TEXT NOT NULL, updated_at TEXT NOT NULL)"
+	)
+	legacy.execute(
+		"CREATE TABLE chapters (id INTEGER PRIMARY KEY AUTOINCREMENT, novel_id INTEGER NOT NULL,"
+		" chapter_index INTEGER NOT NULL, source_url TEXT NOT NULL, file_path TEXT NOT NULL, downloaded_at TEXT NOT NULL)"
+	)
+	legacy.commit()
+	legacy.close()
+
+	with novel_db.connect(db_path) as conn:
+		assert db_migrations.schema_version(conn) == novel_db.SCHEMA_VERSION
+		novel_columns = {row[1] for row in conn.execute("PRAGMA table_info(novels)")}
+		chapter_columns = {row[1] for row in conn.execute("PRAGMA table_info(chapters)")}
+	for table, columns in novel_db.ADDED_COLUMNS.items():
+		present = novel_columns if table == "novels" else chapter_columns
+		assert {column for column, _ in columns} <= present
+
+
+def test_novel_db_compresses_translated_sources_from_older_schema(tmp_path):
+	db_path = str(tmp_path / "novel_index.sqlite")
+	conn = sqlite3.connect(db_path)
+	db_migrations.migrate(conn, novel_db.MIGRATIONS[:4])
+	conn.execute(
+		"INSERT INTO novels (title, slug, index_url, root_path, created_at, updated_at)"
+		" VALUES ('T', 't', 'https://a/', 'truyen/t', 'x', 'x')"
+	)
+	conn.execute(
+		"INSERT INTO chapters (novel_id, chapter_index, source_url, file_path, downloaded_at)"
+		" VALUES (1, 1, 'https://a/1.html', 'truyen/t/goc/chuong_001.txt', 'x')"
+	)
+	conn.execute("INSERT INTO translated_sources (chapter_id, body) VALUES (1, ?)", ("一二三" * 100,))
+	conn.commit()
+	conn.close()
+
+	with novel_db.connect(db_path) as conn:
+		row = conn.execute("SELECT body_hash, length(data) AS size FROM translated_sources").fetchone()
+		assert row["body_hash"] == novel_db.hash_chapter_body("一二三" * 100)
+		assert row["size"] < len(("一二三" * 100).encode("utf-8"))
+		assert novel_db.fetch_translated_source(conn, 1) == "一二三" * 100
@@ -0,0 +1,65 @@
+import sqlite3
+import threading
+
+import pytest
+
+import story_db
+from db_writer import DatabaseWriter
+
+
+def _insert_names(conn, names):
+	return story_db.insert_glossary_entries(
+		conn, [{"original_name": name, "vietnamese_name": name} for name in names]
+	)
+
+
+def test_writer_returns_row_counts_and_flushes_on_close(tmp_path):
+	db_path = str(tmp_path / "story.sqlite")
+	writer = DatabaseWriter()
+	futures = [
+		writer.submit(db_path, story_db.connect, _insert_names, [f"名{index}"])
+		for index in range(20)
+	]
+	writer.close()
+	assert [future.result() for future in futures] == [1] * 20
+	with story_db.connect(db_path) as conn:
+		assert len(story_db.fetch_glossary(conn)) == 20
+	with pytest.raises(RuntimeError):
+		writer.submit(db_path, story_db.connect, _insert_names, ["後"])
+
+
+def test_failed_job_does_not_discard_rest_of_batch(tmp_path):
+	db_path = str(tmp_path / "story.sqlite")
+	writer = DatabaseWriter()
+	gate = threading.Event()
+	blocker = writer.submit(db_path, story_db.connect, lambda conn: gate.wait(5))
+
+	def broken(conn):
+		_insert_names(conn, ["壞"])
+		raise ValueError("hỏng")
+
+	first = writer.submit(db_path, story_db.connect, _insert_names, ["甲"])
+	failed = writer.submit(db_path, story_db.connect, broken)
+	last = writer.submit(db_path, story_db.connect, _insert_names, ["乙"])
+	gate.set()
+	writer.wait(db_path)
+	assert blocker.result() is True
+	assert first.result() == 1 and last.result() == 1
+	with pytest.raises(ValueError):
+		failed.result()
+	writer.close()
+	with story_db.connect(db_path) as conn:
+		names = [row["original_name"] for row in story_db.fetch_glossary(conn)]
+	assert names == ["甲", "乙"]
+
+
+def test_open_failure_is_reported_through_future(tmp_path):
+	writer = DatabaseWriter()
+
+	def opener(path):
+		raise sqlite3.OperationalError("không mở được")
+
+	future = writer.submit(str(tmp_path / "x.sqlite"), opener, _insert_names, ["甲"])
+	writer.close()
+	with pytest.raises(sqlite3.OperationalError):
+		future.result()
@@ -0,0 +1,88 @@
+import os
+
+import novel_db
+import cralw
+from page_cache import CODEC_GZIP, PageCache, page_path
+
+
+def test_store_is_content_addressed_and_round_trips(tmp_path):
+	cache = PageCache(str(tmp_path), codec=CODEC_GZIP)
+	first = cache.store("https://example.com/1.html", b"<html>a</html>", "utf-8")
+	second = cache.store("https://example.com/2.html", b"<html>a</html>", "utf-8")
+	assert first.digest == second.digest
+	assert cache.load(first.digest, first.codec) == b"<html>a</html>"
+	assert [page.url for page in cache.take_pending()] == [
+		"https://example.com/1.html",
+		"https://example.com/2.html",
+	]
+	assert cache.take_pending() == []
+
+
+def test_reextract_rewrites_chapter_files_from_cache(tmp_path):
+	cache = PageCache(str(tmp_path / "cache"), codec=CODEC_GZIP)
+	url = "https://example.com/book/1/1.html"
+	body = "少年握剑。" * 50
+	html = f"<html><head><meta charset='gbk'></head><body><h1>第一章</h1><div class='readcotent'>{body}</div></body></html>"
+	cache.store(url, html.encode("gbk"), "gbk")
+	chapter_path = tmp_path / "goc" / "chuong_001.txt"
+
+	with novel_db.connect(str(tmp_path / "db.sqlite")) as conn:
+		novel_id = novel_db.upsert_novel(
+			conn, title="Test", slug="test", index_url="https://example.com/book/1/", root_path=str(tmp_path)
+		)
+		novel_db.record_chapter(
+			conn,
+			novel_id=novel_id,
+			chapter_index=1,
+			title="cũ",
+			source_url=url,
+			file_path=str(chapter_path),
+			content_hash=None,
+		)
+		cralw.flush_page_cache(conn, cache)
+		rewritten, failed = cralw.reextract_from_cache(conn, cache, min_length=10, workers=1)
+		row = novel_db.fetch_chapter_map(conn, novel_id)[1]
+
+	assert (rewritten, failed) == (1, 0)
+	assert row["title"] == "第一章" and row["file_size"] > 0
+	assert chapter_path.read_text(encoding="utf-8").endswith(body)
+	assert row["content_hash"]
+
+
+def test_prune_keeps_only_pages_reextract_needs(tmp_path):
+	cache = PageCache(str(tmp_path / "cache"), codec=CODEC_GZIP)
+	index_url = "https://example.com/book/1/"
+	url = "https://example.com/book/1/1.html"
+	old = cache.store(url, b"<html>v1</html>", "utf-8")
+	with novel_db.connect(str(tmp_path / "db.sqlite")) as conn:
+		novel_id = novel_db.upsert_novel(
+			conn, title="Test", slug="test", index_url=index_url, root_path=str(tmp_path)
+		)
+		novel_db.record_chapter(
+			conn,
+			novel_id=novel_id,
+			chapter_index=1,
+			title="Chương 1",
+			source_url=url,
+			file_path=str(tmp_path / "goc" / "chuong_001.txt"),
+			content_hash=None,
+		)
+		cralw.flush_page_cache(conn, cache)
+		current = cache.store(url, b"<html>v2</html>", "utf-8")
+		follow_up = cache.store("https://example.com/book/1/1_2.html", b"<html>p2</html>", "utf-8")
+		index = cache.store(index_url, b"<html>index</html>", "utf-8")
+		cralw.flush_page_cache(conn, cache)
+		for folder, _, names in os.walk(cache.root):
+			for name in names:
+				os.utime(os.path.join(folder, name), (0, 0))
+		fresh = cache.store("https://example.com/book/1/2.html", b"<html>fresh</html>", "utf-8")
+
+		removed_rows, removed_files, freed = cralw.prune_page_cache(conn, cache)
+		urls = sorted(row["url"] for row in novel_db.fetch_pages(conn))
+
+	assert (removed_rows, removed_files) == (1, 2) and freed > 0
+	assert urls == [url, "https://example.com/book/1/1_2.html"]
+	for page in (current, follow_up, fresh):
+		assert cache.load(page.digest, page.codec)
+	for page in (old, index):
+		assert not os.path.exists(page_path(cache.root, page.digest, page.codec))
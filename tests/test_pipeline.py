@@ -0,0 +1,165 @@
+import threading
+import time
+
+from pipeline import TranslationPipeline
+
+
+class RecordingPipeline(TranslationPipeline):
+	def __init__(self, release, **kwargs):
+		super().__init__(**kwargs)
+		self.release = release
+		self.seen = []
+		self.batches = []
+
+	def _run(self):
+		self.release.wait(5)
+		self._consume(self.record)
+
+	def record(self, items):
+		self.batches.append([item.filename for item in items])
+		self.seen.extend((item.novel_order, item.filename) for item in items)
+		return len(items)
+
+
+def test_pipeline_orders_chapters_and_skips_translated(tmp_path):
+	novel_a = tmp_path / "a"
+	novel_b = tmp_path / "b"
+	for novel in (novel_a, novel_b):
+		(novel / "goc").mkdir(parents=True)
+		(novel / "dich").mkdir()
+	(novel_a / "dich" / "chuong_002.txt").write_text("đã dịch", encoding="utf-8")
+
+	release = threading.Event()
+	pipeline = RecordingPipeline(release, queue_size=10).start()
+	assert pipeline.submit(str(novel_b), str(novel_b / "goc" / "chuong_003.txt"))
+	assert pipeline.submit(str(novel_a), str(novel_a / "goc" / "chuong_001.txt"))
+	assert not pipeline.submit(str(novel_a), str(novel_a / "goc" / "chuong_002.txt"))
+	assert pipeline.submit(str(novel_b), str(novel_b / "goc" / "chuong_001.txt"))
+	assert not pipeline.submit(str(novel_b), str(novel_b / "goc" / "chuong_001.txt"))
+	release.set()
+	pipeline.close()
+
+	assert pipeline.seen == [(0, "chuong_001.txt"), (0, "chuong_003.txt"), (1, "chuong_001.txt")]
+	assert pipeline.translated == 3
+
+
+def test_pipeline_submit_blocks_until_translator_catches_up(tmp_path):
+	(tmp_path / "goc").mkdir()
+	release = threading.Event()
+	pipeline = RecordingPipeline(release, queue_size=1).start()
+	assert pipeline.submit(str(tmp_path), "chuong_001.txt")
+
+	done = threading.Event()
+	worker = threading.Thread(target=lambda: (pipeline.submit(str(tmp_path), "chuong_002.txt"), done.set()))
+	worker.start()
+	assert not done.wait(0.3)
+	release.set()
+	assert done.wait(5)
+	pipeline.close()
+	assert pipeline.translated == 2
+
+
+def _write_chapters(novel, *names):
+	(novel / "goc").mkdir(parents=True, exist_ok=True)
+	for name in names:
+		(novel / "goc" / name).write_text("原文", encoding="utf-8")
+
+
+def test_pipeline_holds_new_novel_until_enough_chapters(tmp_path):
+	novel = tmp_path / "moi"
+	_write_chapters(novel, "chuong_001.txt")
+	release = threading.Event()
+	release.set()
+	pipeline = RecordingPipeline(release, queue_size=10).start()
+	assert pipeline.submit(str(novel), "chuong_001.txt")
+	_write_chapters(novel, "chuong_002.txt")
+	assert pipeline.submit(str(novel), "chuong_002.txt")
+	time.sleep(0.3)
+	assert pipeline.seen == []
+
+	_write_chapters(novel, "chuong_003.txt")
+	assert pipeline.submit(str(novel), "chuong_003.txt")
+	deadline = time.monotonic() + 5
+	while len(pipeline.seen) < 3 and time.monotonic() < deadline:
+		time.sleep(0.05)
+	assert [name for _, name in pipeline.seen] == ["chuong_001.txt", "chuong_002.txt", "chuong_003.txt"]
+	pipeline.close()
+
+
+
+def test_pipeline_waits_for_the_first_chapters_not_any_chapters(tmp_path):
+	novel = tmp_path / "lon-xon"
+	release = threading.Event()
+	release.set()
+	pipeline = RecordingPipeline(release, queue_size=10).start()
+	for name in ("chuong_002.txt", "chuong_004.txt", "chuong_005.txt", "chuong_003.txt"):
+		_write_chapters(novel, name)
+		assert pipeline.submit(str(novel), name)
+	time.sleep(0.3)
+	assert pipeline.seen == []
+
+	_write_chapters(novel, "chuong_001.txt")
+	assert pipeline.submit(str(novel), "chuong_001.txt")
+	deadline = time.monotonic() + 5
+	while len(pipeline.seen) < 5 and time.monotonic() < deadline:
+		time.sleep(0.05)
+	assert [name for _, name in pipeline.seen] == [f"chuong_{index:03d}.txt" for index in range(1, 6)]
+	pipeline.close()
+
+def test_pipeline_releases_short_novel_when_crawl_finishes(tmp_path):
+	novel = tmp_path / "ngan"
+	_write_chapters(novel, "chuong_001.txt")
+	release = threading.Event()
+	release.set()
+	pipeline = RecordingPipeline(release, queue_size=10).start()
+	assert pipeline.submit(str(novel), "chuong_001.txt")
+	time.sleep(0.3)
+	assert pipeline.seen == []
+	pipeline.finish_novel(str(novel))
+	deadline = time.monotonic() + 5
+	while not pipeline.seen and time.monotonic() < deadline:
+		time.sleep(0.05)
+	assert pipeline.seen == [(0, "chuong_001.txt")]
+	pipeline.close()
+
+
+def test_pipeline_submit_is_thread_safe(tmp_path):
+	novels = [tmp_path / f"truyen_{index}" for index in range(4)]
+	release = threading.Event()
+	pipeline = RecordingPipeline(release, queue_size=100).start()
+	start = threading.Barrier(8)
+
+	def crawl():
+		start.wait()
+		for novel in novels:
+			for index in range(5):
+				pipeline.submit(str(novel), f"chuong_{index:03d}.txt")
+
+	threads = [threading.Thread(target=crawl) for _ in range(8)]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+	release.set()
+	pipeline.close()
+
+	assert len(pipeline.seen) == 20
+	assert sorted({order for order, _ in pipeline.seen}) == [0, 1, 2, 3]
+
+
+def test_pipeline_batches_chapters_of_one_novel_per_tab_count(tmp_path):
+	novel_a = tmp_path / "a"
+	novel_b = tmp_path / "b"
+	_write_chapters(novel_a, "chuong_001.txt", "chuong_002.txt", "chuong_003.txt")
+	_write_chapters(novel_b, "chuong_001.txt", "chuong_002.txt", "chuong_003.txt")
+	release = threading.Event()
+	pipeline = RecordingPipeline(release, queue_size=10, tabs=2).start()
+	for novel in (novel_a, novel_b):
+		for name in ("chuong_001.txt", "chuong_002.txt", "chuong_003.txt"):
+			assert pipeline.submit(str(novel), name)
+	release.set()
+	pipeline.close()
+
+	assert all(len(batch) <= 2 for batch in pipeline.batches)
+	assert sum(pipeline.batches, []) == ["chuong_001.txt", "chuong_002.txt", "chuong_003.txt"] * 2
+	assert pipeline.translated == 6
@@ -0,0 +1,73 @@
+from datetime import UTC, datetime, timedelta
+
+import cralw
+import novel_db
+from scheduler import (
+	COMPLETED_CHECK_INTERVAL,
+	DEFAULT_CHECK_INTERVAL,
+	MIN_CHECK_INTERVAL,
+	next_schedule,
+)
+
+NOW = datetime(2024, 5, 1, 12, 0, tzinfo=UTC)
+
+
+def test_new_chapters_tighten_schedule_to_half_update_interval():
+	schedule = next_schedule(
+		now=NOW,
+		had_new=True,
+		status="連載中",
+		update_interval=None,
+		check_interval=None,
+		last_update_at=NOW - timedelta(hours=12),
+	)
+	assert schedule.update_interval == 12 * 3600
+	assert schedule.check_interval == 6 * 3600
+	assert schedule.next_check_at == NOW + timedelta(hours=6)
+	assert schedule.last_update_at == NOW
+
+
+def test_no_news_backs_off_and_completed_novels_wait_long():
+	quiet = next_schedule(
+		now=NOW,
+		had_new=False,
+		status=None,
+		update_interval=None,
+		check_interval=MIN_CHECK_INTERVAL,
+		last_update_at=None,
+	)
+	assert quiet.check_interval == MIN_CHECK_INTERVAL * 1.5
+
+	capped = next_schedule(
+		now=NOW,
+		had_new=False,
+		status=None,
+		update_interval=2 * 3600,
+		check_interval=DEFAULT_CHECK_INTERVAL,
+		last_update_at=None,
+	)
+	assert capped.check_interval == 2 * 3600
+
+	completed = next_schedule(
+		now=NOW,
+		had_new=False,
+		status="已完結",
+		update_interval=3600,
+		check_interval=None,
+		last_update_at=None,
+	)
+	assert completed.check_interval == COMPLETED_CHECK_INTERVAL
+
+
+def test_record_novel_check_controls_due_novels(tmp_path):
+	with novel_db.connect(str(tmp_path / "db.sqlite")) as conn:
+		novel_id = novel_db.upsert_novel(
+			conn, title="A", slug="a", index_url="https://example.com/book/1/", root_path=str(tmp_path)
+		)
+		now = "2000-01-01T00:00:00Z"
+		assert [row["id"] for row in novel_db.fetch_due_novels(conn, now)] == [novel_id]
+		cralw.record_novel_check(conn, novel_id, had_new=True, status="已完本")
+		row = novel_db.fetch_novel_by_url(conn, "https://example.com/book/1/")
+		assert row["status"] == "已完本"
+		assert novel_db.fetch_due_novels(conn, row["last_update_at"]) == []
+		assert novel_db.next_check_due(conn) == row["next_check_at"]
@@ -0,0 +1,41 @@
+import json
+from pathlib import Path
+
+import pytest
+from bs4 import BeautifulSoup
+
+from site_adapters import ADAPTERS, DEFAULT_ADAPTER, UukanshuAdapter, adapter_for
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def _adapters_with_fixtures():
+	return [adapter for adapter in ADAPTERS if (FIXTURES / adapter.name / "expected.json").exists()]
+
+
+@pytest.mark.parametrize("adapter", _adapters_with_fixtures(), ids=lambda adapter: adapter.name)
+def test_adapter_parses_recorded_fixtures(adapter):
+	folder = FIXTURES / adapter.name
+	expected = json.loads((folder / "expected.json").read_text(encoding="utf-8"))
+	assert adapter_for(expected["index_url"]) is adapter
+
+	soup = BeautifulSoup((folder / "index.html").read_bytes(), "lxml")
+	book = adapter.parse_index(soup, expected["index_url"])
+	assert book.title == expected["book_title"]
+	assert book.author == expected["author"]
+	assert book.status == expected["status"]
+	assert len(book.chapters) == expected["chapter_count"]
+	assert book.chapters[0].title == expected["first_chapter"]
+	assert book.latest_chapter_url == expected["latest_chapter_url"]
+
+	page = adapter.parse_chapter((folder / "chapter.html").read_bytes(), None, expected["chapter_url"])
+	assert page.title == expected["chapter_title"]
+	assert page.body.startswith(expected["body_starts_with"])
+	for fragment in expected["body_excludes"]:
+		assert fragment not in page.body
+
+
+def test_adapter_for_unknown_host_falls_back_to_default():
+	assert isinstance(adapter_for("https://uukanshu.cc/book/1/"), UukanshuAdapter)
+	assert adapter_for("https://example.org/book/1/") is DEFAULT_ADAPTER
+	assert DEFAULT_ADAPTER.normalise_index_url("https://uukanshu.cc/book/1/2.html") == "https://uukanshu.cc/book/1/"
@@ -0,0 +1,48 @@
+import story_db
+from story_db import (
+    clear_submission,
+    connect,
+    fetch_pending_submission,
+    initialise_database,
+    list_pending_submissions,
+    record_submission,
+)
+
+
+def test_record_and_clear_submission(tmp_path):
+    db_path = str(tmp_path / "story.sqlite")
+    initialise_database(db_path)
+    with connect(db_path) as conn:
+        record_submission(
+            conn,
+            "chuong_001.txt",
+            prompt_hash="abc",
+            chat_url="https://aistudio.google.com/prompts/1",
+            profile="/profiles/a",
+        )
+        record_submission(
+            conn,
+            "chuong_001.txt",
+            prompt_hash="def",
+            chat_url="https://aistudio.google.com/prompts/2",
+        )
+    with connect(db_path) as conn:
+        pending = fetch_pending_submission(conn, "chuong_001.txt")
+        assert pending["prompt_hash"] == "def"
+        assert pending["chat_url"].endswith("/2")
+        assert len(list_pending_submissions(conn)) == 1
+        assert clear_submission(conn, "chuong_001.txt") == 1
+        assert fetch_pending_submission(conn, "chuong_001.txt") is None
+
+
+def test_connections_use_wal_and_busy_timeout(tmp_path):
+    db_path = str(tmp_path / "story.sqlite")
+    initialise_database(db_path)
+    with connect(db_path) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == story_db.BUSY_TIMEOUT_MS
+    store = story_db.StoryStore(db_path)
+    try:
+        assert store.conn.execute("PRAGMA busy_timeout").fetchone()[0] == story_db.BUSY_TIMEOUT_MS
+    finally:
+        store.close()